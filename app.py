@@ -7,6 +7,7 @@ import os
 import sys
 import socket
 import threading
+from contextlib import nullcontext
 import dash
 from dash import html, dcc, Input, Output, State, callback_context, dash_table
 import dash_bootstrap_components as dbc
@@ -57,12 +58,15 @@ def _import_cyto_with_stub():
         raise
 
 cyto = _import_cyto_with_stub()
+import numpy as np
 import pandas as pd
 import sqlite3  # retained for legacy paths; progressive migration to db_util
 from datetime import datetime, timezone
 import base64
 import io
 import json
+import re
+from functools import lru_cache
 from pathlib import Path
 from dash.exceptions import PreventUpdate
 from flask import jsonify
@@ -92,7 +96,8 @@ try:
     from utils.database import DatabaseManager  # type: ignore
     from utils.calculations import CostCalculator, compute_unit_price, compute_install_cost  # type: ignore
     from utils.onedrive import OneDriveManager  # type: ignore
-    from utils.db_util import get_connection, backend  # unified backend connection helper and current backend
+    from utils.image_cache import build_node_thumbnail, thumb_url  # type: ignore
+    from utils.db_util import get_connection, get_conn, writer, backend, checkpoint_wal, backup_sqlite  # unified backend connection helper and current backend
 except Exception as e:  # Fallback minimal stubs to keep module importable
     print(f"[startup][warn] Failed importing utils modules: {e}")
     class DatabaseManager:  # type: ignore
@@ -109,6 +114,25 @@ except Exception as e:  # Fallback minimal stubs to keep module importable
     class OneDriveManager:  # type: ignore
         def __init__(self, local_path): pass
         def sync_database(self): return False, 'onedrive disabled'
+    def build_node_thumbnail(sign_type_id, src_path): return None
+    def thumb_url(sign_type_id, src_path=None): return ''
+    def checkpoint_wal(db_path=None): return None
+    def backup_sqlite(target, db_path=None, pages=1024):
+        import shutil
+        shutil.copy2(db_path or DATABASE_PATH, target)
+    from contextlib import contextmanager
+    @contextmanager
+    def get_conn(readonly=False):
+        conn = get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    @contextmanager
+    def writer():
+        with get_conn() as conn:
+            yield conn
+            conn.commit()
 
 db_manager = DatabaseManager(DATABASE_PATH)
 try:
@@ -118,31 +142,44 @@ except Exception as e:
 cost_calculator = CostCalculator(DATABASE_PATH)
 onedrive_manager = OneDriveManager(Path.cwd())
 
+# Bump when ensure_extended_schema gains a migration; stored in PRAGMA user_version.
+EXTENDED_SCHEMA_VERSION = 1
+
+# Columns added after the base schema: table -> [(column, ALTER ... ADD COLUMN clause)]
+_EXTENDED_COLUMNS = {
+    'sign_types': [
+        ('material_alt', 'material_alt TEXT'),
+        ('material_multiplier', 'material_multiplier REAL DEFAULT 0'),
+        ('install_type', 'install_type TEXT'),
+        ('install_time_hours', 'install_time_hours REAL DEFAULT 0'),
+        ('per_sign_install_rate', 'per_sign_install_rate REAL DEFAULT 0'),
+    ],
+    'building_signs': [('custom_price', 'custom_price REAL')],
+}
+
 def ensure_extended_schema():
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info('sign_types')"); cols = {r[1] for r in cur.fetchall()}
-        if 'material_alt' not in cols:
-            try: cur.execute("ALTER TABLE sign_types ADD COLUMN material_alt TEXT")
-            except Exception: pass
-        if 'material_multiplier' not in cols:
-            try: cur.execute("ALTER TABLE sign_types ADD COLUMN material_multiplier REAL DEFAULT 0")
-            except Exception: pass
-        if 'install_type' not in cols:
-            try: cur.execute("ALTER TABLE sign_types ADD COLUMN install_type TEXT")
-            except Exception: pass
-        if 'install_time_hours' not in cols:
-            try: cur.execute("ALTER TABLE sign_types ADD COLUMN install_time_hours REAL DEFAULT 0")
-            except Exception: pass
-        if 'per_sign_install_rate' not in cols:
-            try: cur.execute("ALTER TABLE sign_types ADD COLUMN per_sign_install_rate REAL DEFAULT 0")
-            except Exception: pass
-        cur.execute("PRAGMA table_info('building_signs')"); bcols = {r[1] for r in cur.fetchall()}
-        if 'custom_price' not in bcols:
-            try: cur.execute("ALTER TABLE building_signs ADD COLUMN custom_price REAL")
-            except Exception: pass
-        conn.commit(); conn.close()
+        with writer() as conn:
+            cur = conn.cursor()
+            cur.execute("PRAGMA user_version")
+            if (cur.fetchone()[0] or 0) >= EXTENDED_SCHEMA_VERSION:
+                return
+            def table_cols(table):
+                cur.execute(f"PRAGMA table_info('{table}')")
+                return {r[1] for r in cur}
+            for table, columns in _EXTENDED_COLUMNS.items():
+                cols = table_cols(table)
+                for col, ddl in columns:
+                    if col not in cols:
+                        try: cur.execute(f"ALTER TABLE {table} ADD COLUMN {ddl}")
+                        except Exception as e: print(f"[schema][warn] {table}.{col}: {e}")
+            # Stamp only a complete migration so a failed ALTER is retried next start
+            missing = [f"{t}.{c}" for t, columns in _EXTENDED_COLUMNS.items()
+                       for c in {c for c, _ in columns} - table_cols(t)]
+            if missing:
+                print(f"[schema][warn] extended schema incomplete, missing {', '.join(missing)}")
+                return
+            cur.execute(f"PRAGMA user_version={EXTENDED_SCHEMA_VERSION}")
     except Exception as e:
         print(f"[schema][warn] {e}")
 
@@ -171,50 +208,66 @@ app.title = "Sign Package Estimator"
 
 # Expose a lightweight /health endpoint for remote diagnostics
 server = app.server
-@server.route('/health')
-def health_route():  # type: ignore
+@lru_cache(maxsize=1)
+def _health_static():
+    """Process-lifetime facts for /health (version file, bundle layout), computed on first hit."""
+    frozen = bool(getattr(sys, 'frozen', False))
+    cyto_pkg_json = None
     try:
-        db_exists = os.path.exists(DATABASE_PATH)
-        size = os.path.getsize(DATABASE_PATH) if db_exists else 0
-        frozen = bool(getattr(sys, 'frozen', False))
-        cyto_pkg_json = None
-        try:
-            import importlib.util as _ilu, pathlib as _pl
-            _cy = _ilu.find_spec('dash_cytoscape')
-            if _cy and _cy.origin:
-                pj = _pl.Path(_cy.origin).parent / 'package.json'
-                cyto_pkg_json = pj.exists()
-        except Exception:
-            cyto_pkg_json = False
-        version = '0.0.0'
+        import importlib.util as _ilu, pathlib as _pl
+        _cy = _ilu.find_spec('dash_cytoscape')
+        if _cy and _cy.origin:
+            pj = _pl.Path(_cy.origin).parent / 'package.json'
+            cyto_pkg_json = pj.exists()
+    except Exception:
+        cyto_pkg_json = False
+    version = '0.0.0'
+    try:
+        candidates = []
+        # If running from a PyInstaller bundle, packaged files are under sys._MEIPASS
         try:
-            candidates = []
-            # If running from a PyInstaller bundle, packaged files are under sys._MEIPASS
-            try:
-                base = Path(getattr(sys, '_MEIPASS'))  # type: ignore[attr-defined]
-                candidates.append(base / 'VERSION.txt')
-            except Exception:
-                pass
-            # Also try alongside source app.py
-            candidates.append(Path(__file__).parent / 'VERSION.txt')
-            for vf in candidates:
-                if vf.exists():
-                    version = vf.read_text(errors='ignore').strip()
-                    break
+            base = Path(getattr(sys, '_MEIPASS'))  # type: ignore[attr-defined]
+            candidates.append(base / 'VERSION.txt')
         except Exception:
             pass
+        # Also try alongside source app.py
+        candidates.append(Path(__file__).parent / 'VERSION.txt')
+        for vf in candidates:
+            if vf.exists():
+                version = vf.read_text(errors='ignore').strip()
+                break
+    except Exception:
+        pass
+    return {
+        'version': version,
+        'python': f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
+        'frozen': frozen,
+        'dash_cytoscape_package_json': cyto_pkg_json,
+    }
+
+@server.route('/health')
+def health_route():  # type: ignore
+    try:
+        # One stat per hit; the DB is never opened here, so polling costs no connections
+        try:
+            size = os.stat(DATABASE_PATH).st_size
+            db_exists = True
+        except OSError:
+            size = 0
+            db_exists = False
+        static = _health_static()
         return jsonify({
             'status': 'ok',
-            'version': version,
-            'python': f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
+            'version': static['version'],
+            'python': static['python'],
             'db_exists': db_exists,
             'db_size_bytes': size,
             'svg_status': os.environ.get('SIGN_APP_SVG_STATUS'),
             'env_mismatch': os.environ.get('SIGN_APP_ENV_MISMATCH'),
             'lan_status': os.environ.get('SIGN_APP_LAN_STATUS'),
             'cwd': str(Path.cwd()),
-            'frozen': frozen,
-            'dash_cytoscape_package_json': cyto_pkg_json
+            'frozen': static['frozen'],
+            'dash_cytoscape_package_json': static['dash_cytoscape_package_json']
         })
     except Exception as e:  # noqa: BLE001
         return jsonify({'status':'error','error':str(e)}), 500
@@ -231,17 +284,23 @@ def _interpreter_sanity():
     # Defensive: ensure sys.executable exists
     if not os.path.exists(sys.executable):
         print(f"[startup][warn] sys.executable missing ({sys.executable}); continuing but environment may be broken.")
-    # Cross-platform venv mismatch detection (e.g., pyvenv.cfg referencing mac path on Windows)
+    # Cross-platform venv mismatch detection (e.g., pyvenv.cfg referencing mac path on Windows).
+    # Result is inherited via the environment, so reloader children skip the file scan.
+    if os.environ.get('SIGN_APP_ENV_CHECKED'):
+        return
+    os.environ['SIGN_APP_ENV_CHECKED'] = '1'
     try:
         venv_cfg = Path(sys.prefix) / 'pyvenv.cfg'
         mismatch = False
         origin = None
         if venv_cfg.exists():
-            text = venv_cfg.read_text(errors='ignore')
-            if os.name == 'nt' and '\nhome = /users/' in text.lower():
-                mismatch = True; origin = 'macOS'
-            if os.name != 'nt' and '\\python.exe' in text.lower():
-                mismatch = True; origin = 'Windows'
+            with venv_cfg.open(errors='ignore') as fh:
+                for line in fh:
+                    line = line.lower()
+                    if os.name == 'nt' and line.startswith('home = /users/'):
+                        mismatch = True; origin = 'macOS'; break
+                    if os.name != 'nt' and '\\python.exe' in line:
+                        mismatch = True; origin = 'Windows'; break
         if mismatch:
             os.environ['SIGN_APP_ENV_MISMATCH'] = f"venv-origin:{origin}"  # used by banner callback
             print(f"[startup][env][warn] Detected cross-platform virtualenv mismatch (origin {origin}). Recommend recreating venv on this platform.")
@@ -325,11 +384,27 @@ TAB_DEFS = [
     ('tab_tags','Tags','estimator'),
     ('tab_notes','Notes','estimator')
 ]
+# Tab components never change per role; built once and reused by every role/tabs callback
+TABS_BY_ROLE = {
+    role: [dbc.Tab(label=lbl, tab_id=tid) for tid, lbl, min_role in TAB_DEFS if ROLE_RANK.get(min_role, 1) <= rank]
+    for role, rank in ROLE_RANK.items()
+}
 def build_tabs_for_role(role: str):
-    rank = ROLE_RANK.get(role or 'viewer',1)
-    return [dbc.Tab(label=lbl, tab_id=tid) for tid,lbl,min_role in TAB_DEFS if ROLE_RANK.get(min_role,1) <= rank]
+    return TABS_BY_ROLE.get(role or 'viewer', TABS_BY_ROLE['viewer'])
+
+# Case-insensitive sign type lookup for note entities (served by idx_sign_types_lower_name)
+_NOTE_SIGN_TYPE_SQL = 'SELECT id FROM sign_types WHERE lower(name)=lower(?)'
+
+def _note_sign_type_id(name):
+    """Sign type id for a note entity given by name (case-insensitive), or None.
+
+    One statement text shared by the note callbacks, so pooled connections
+    (cached_statements=256) reuse the prepared lookup.
+    """
+    with get_conn(readonly=True) as conn:
+        row = conn.execute(_NOTE_SIGN_TYPE_SQL, (str(name),)).fetchone()
+    return row[0] if row else None
 
-# Add utils to path
 @app.callback(
     Output('note-add-feedback','children'),
     Input('add-note-btn','n_clicks'),
@@ -347,17 +422,14 @@ def add_note_cb(n, etype, ent_id, text, include_values):
     try:
         # For sign_type we need name -> id lookup in notes table design uses entity_id; we will allow sign_types by name mapping here
         if etype == 'sign_type' and not str(ent_id).isdigit():
-            # backend-agnostic lookup via helper
-            conn = get_connection(); cur = conn.cursor()
-            cur.execute('SELECT id FROM sign_types WHERE lower(name)=lower(?)',(str(ent_id),))
-            row = cur.fetchone(); conn.close()
-            if not row:
+            ent_key = _note_sign_type_id(ent_id)
+            if ent_key is None:
                 return dbc.Alert('Sign type not found', color='danger')
-            ent_key = row[0]
         else:
             ent_key = int(ent_id)
         inc = 'inc' in (include_values or [])
         db_manager.add_note(etype, ent_key, text.strip(), include_in_export=inc)
+        trigger_sync_now.set()
         return dbc.Alert('Note added', color='success', dismissable=True)
     except Exception as e:
         return dbc.Alert(f'Error: {e}', color='danger')
@@ -376,26 +448,14 @@ def load_notes_cb(n, etype, ent_id):
         return []
     try:
         if etype == 'sign_type' and not str(ent_id).isdigit():
-            conn = get_connection(); cur = conn.cursor()
-            cur.execute('SELECT id FROM sign_types WHERE lower(name)=lower(?)',(str(ent_id),))
-            row = cur.fetchone(); conn.close()
-            if not row:
+            ent_key = _note_sign_type_id(ent_id)
+            if ent_key is None:
                 return []
-            ent_key = row[0]
         else:
             ent_key = int(ent_id)
         rows = db_manager.list_notes(etype, ent_key, export_only=False)
-        # rows: id, note, include_in_export?, created_at (depending on select)
-        data = []
-        for r in rows:
-            if len(r) == 4:
-                nid, note, include_flag, created = r
-                data.append({'id':nid,'note':note,'include_in_export':'Yes' if include_flag else '','created_at':created})
-            else:
-                # export_only path returns 3 columns
-                nid, note, created = r
-                data.append({'id':nid,'note':note,'include_in_export':'(export)','created_at':created})
-        return data
+        return [{'id': r['id'], 'note': r['note'], 'include_in_export': 'Yes' if r['include_in_export'] else '',
+                 'created_at': r['created_at']} for r in rows]
     except Exception:
         return []
 
@@ -411,14 +471,16 @@ def toggle_note_include(n, note_id):
     if not note_id:
         return dbc.Alert('Note ID required', color='danger')
     try:
-        conn = get_connection(); cur = conn.cursor()
-        cur.execute('SELECT include_in_export FROM notes WHERE id=?',(int(note_id),))
-        row = cur.fetchone()
-        if not row:
-            conn.close(); return dbc.Alert('Note not found', color='danger')
-        new_val = 0 if row[0] else 1
-        cur.execute('UPDATE notes SET include_in_export=? WHERE id=?',(new_val, int(note_id)))
-        conn.commit(); conn.close()
+        with writer() as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT include_in_export FROM notes WHERE id=?',(int(note_id),))
+            row = cur.fetchone()
+            if not row:
+                return dbc.Alert('Note not found', color='danger')
+            new_val = 0 if row[0] else 1
+            cur.execute('UPDATE notes SET include_in_export=? WHERE id=?',(new_val, int(note_id)))
+        bump_data_version()
+        trigger_sync_now.set()
         return dbc.Alert('Include flag toggled', color='success', dismissable=True)
     except Exception as e:
         return dbc.Alert(f'Error: {e}', color='danger')
@@ -433,34 +495,46 @@ from dash.dependencies import ALL
     Output('template-id-item','options'),
     Output('apply-template-id','options'),
     Input({'kind':ALL,'action':ALL}, 'n_clicks'),
-    Input('global-dropdown-refresh','n_intervals'),
+    Input('dd-refresh-token','data'),
     State('template-order-mode','value'),
     prevent_initial_call=False
 )
-def refresh_dropdown_options(_pattern_clicks, _interval, template_order_mode):
+def refresh_dropdown_options(_pattern_clicks, _token, template_order_mode):
     try:
-        conn = get_connection(); cur = conn.cursor()
-        cur.execute('SELECT id, name FROM projects ORDER BY name')
-        projects = [{'label':r[1], 'value': r[0]} for r in cur.fetchall()]
-        cur.execute('SELECT id, name FROM pricing_profiles ORDER BY name')
-        profiles = [{'label':r[1], 'value': r[0]} for r in cur.fetchall()]
-        if template_order_mode == 'alpha':
-            cur.execute('SELECT id, name FROM bid_templates ORDER BY lower(name) ASC')
-        else:
-            cur.execute('SELECT id, name FROM bid_templates ORDER BY created_at DESC')
-        templates = [{'label':r[1], 'value': r[0]} for r in cur.fetchall()]
+        # Fires on pattern-matched buttons and when a writer bumps dd-refresh-token;
+        # the lists only change when the data key does.
+        projects, profiles, templates = _keyed_cache_call(_dropdown_options_cached, template_order_mode)
         # apply-template-id uses same templates list
-        conn.close()
         return projects, projects, profiles, profiles, templates, templates
     except Exception as e:
         print(f"[dropdown-refresh][error] {e}")
         empty = []
         return empty, empty, empty, empty, empty, empty
 
+# Projects, pricing profiles and bid templates in one statement. Column 1 tags
+# the list; columns 4/5 are ascending/descending sort keys so each list keeps
+# its own order (templates: alphabetical or newest first).
+_DROPDOWN_OPTIONS_SQL = ("SELECT 'p', id, name, name, NULL FROM projects "
+                         "UNION ALL SELECT 'f', id, name, name, NULL FROM pricing_profiles "
+                         "UNION ALL SELECT 't', id, name, {asc}, {desc} FROM bid_templates "
+                         "ORDER BY 1, 4, 5 DESC")
+_DROPDOWN_OPTIONS_SQL_ALPHA = _DROPDOWN_OPTIONS_SQL.format(asc='lower(name)', desc='NULL')
+_DROPDOWN_OPTIONS_SQL_RECENT = _DROPDOWN_OPTIONS_SQL.format(asc='NULL', desc='created_at')
+
+@lru_cache(maxsize=4)
+def _dropdown_options_cached(template_order_mode, _key):
+    sql = _DROPDOWN_OPTIONS_SQL_ALPHA if template_order_mode == 'alpha' else _DROPDOWN_OPTIONS_SQL_RECENT
+    lists = {'p': [], 'f': [], 't': []}
+    with get_conn(readonly=True) as conn:
+        for kind, oid, name, _asc, _desc in conn.execute(sql):
+            lists[kind].append({'label': name, 'value': oid})
+    return lists['p'], lists['f'], lists['t']
+
 # ------------------- Pricing Profiles Callbacks ------------------- #
 @app.callback(
     Output('pp-create-feedback','children'),
     Output('pp-table','data'),
+    Output('dd-refresh-token','data', allow_duplicate=True),
     Input({'kind':'pp','action':ALL}, 'n_clicks'),
     State('pp-name','value'),
     State('pp-tax','value'),
@@ -470,20 +544,14 @@ def refresh_dropdown_options(_pattern_clicks, _interval, template_order_mode):
     prevent_initial_call=True
 )
 def handle_pricing_profiles(pp_clicks, name, tax, install, margin, default_values):
-    # Determine which button fired
-    triggered_actions = []
-    if callback_context.triggered:
-        for t in callback_context.triggered:
-            try:
-                tid = eval(t['prop_id'].split('.')[0])  # pattern IDs are serialized as dict strings
-                if isinstance(tid, dict) and tid.get('kind')=='pp':
-                    triggered_actions.append(tid.get('action'))
-            except Exception:
-                continue
+    # Determine which button fired (pattern ids arrive pre-parsed as dicts)
+    tid = callback_context.triggered_id
+    triggered_actions = [tid.get('action')] if isinstance(tid, dict) and tid.get('kind') == 'pp' else []
     msg = dash.no_update
+    token = dash.no_update
     if 'create' in triggered_actions:
         if not name:
-            return dbc.Alert('Profile name required', color='danger'), dash.no_update
+            return dbc.Alert('Profile name required', color='danger'), dash.no_update, dash.no_update
         try:
             pid = db_manager.create_pricing_profile(
                 name.strip(),
@@ -492,23 +560,34 @@ def handle_pricing_profiles(pp_clicks, name, tax, install, margin, default_value
                 float(margin or 1) or 1.0,
                 is_default=('d' in (default_values or []))
             )
+            bump_data_version()
+            trigger_sync_now.set()
+            token = _dd_refresh_token()
             msg = dbc.Alert(f'Created profile (ID {pid})', color='success', dismissable=True)
         except Exception as e:
             msg = dbc.Alert(f'Error: {e}', color='danger')
-    # Load all profiles
-    conn = get_connection(); cur = conn.cursor()
-    cur.execute('SELECT id, name, sales_tax_rate, installation_rate, margin_multiplier, is_default FROM pricing_profiles ORDER BY id DESC')
-    rows = [
-        {
-            'id':r[0], 'name':r[1],
-            'sales_tax_rate': f"{(r[2] or 0)*100:.2f}%",
-            'installation_rate': f"{(r[3] or 0)*100:.2f}%",
-            'margin_multiplier': f"{r[4]:.3f}",
-            'is_default': 'Yes' if r[5] else ''
-        } for r in cur.fetchall()
-    ]
-    conn.close()
-    return msg, rows
+    return msg, _keyed_cache_call(_list_pricing_profiles), token
+
+# pp-table rows formatted by the database; MSSQL has FORMAT() where SQLite has printf().
+if backend == 'mssql':
+    _PRICING_PROFILES_TABLE_SQL = (
+        "SELECT id, name, CONCAT(FORMAT(COALESCE(sales_tax_rate,0)*100,'0.00'),'%'), "
+        "CONCAT(FORMAT(COALESCE(installation_rate,0)*100,'0.00'),'%'), FORMAT(COALESCE(margin_multiplier,0),'0.000'), "
+        "CASE WHEN is_default=1 THEN 'Yes' ELSE '' END FROM pricing_profiles ORDER BY id DESC"
+    )
+else:
+    _PRICING_PROFILES_TABLE_SQL = (
+        "SELECT id, name, printf('%.2f%%', COALESCE(sales_tax_rate,0)*100), "
+        "printf('%.2f%%', COALESCE(installation_rate,0)*100), printf('%.3f', COALESCE(margin_multiplier,0)), "
+        "CASE WHEN is_default THEN 'Yes' ELSE '' END FROM pricing_profiles ORDER BY id DESC"
+    )
+_PRICING_PROFILES_TABLE_COLS = ('id', 'name', 'sales_tax_rate', 'installation_rate', 'margin_multiplier', 'is_default')
+
+@lru_cache(maxsize=4)
+def _list_pricing_profiles(_key):
+    """Formatted pp-table rows, newest first; shared by the create and make-default callbacks."""
+    with get_conn(readonly=True) as conn:
+        return [dict(zip(_PRICING_PROFILES_TABLE_COLS, r)) for r in conn.execute(_PRICING_PROFILES_TABLE_SQL)]
 
 @app.callback(
     Output('pp-assign-feedback','children'),
@@ -541,38 +620,39 @@ def make_default_profile(n, profile_id):
     if not profile_id:
         return dbc.Alert('Profile ID required', color='danger'), dash.no_update
     try:
-        # Set chosen default by marking is_default=1 and all others 0
-        conn = get_connection(); cur = conn.cursor()
-        cur.execute('UPDATE pricing_profiles SET is_default=0')
-        cur.execute('UPDATE pricing_profiles SET is_default=1 WHERE id=?',(int(profile_id),))
-        conn.commit()
-        cur.execute('SELECT id, name, sales_tax_rate, installation_rate, margin_multiplier, is_default FROM pricing_profiles ORDER BY id DESC')
-        rows = [
-            {
-                'id':r[0], 'name':r[1],
-                'sales_tax_rate': f"{(r[2] or 0)*100:.2f}%",
-                'installation_rate': f"{(r[3] or 0)*100:.2f}%",
-                'margin_multiplier': f"{r[4]:.3f}",
-                'is_default': 'Yes' if r[5] else ''
-            } for r in cur.fetchall()
-        ]
-        conn.close()
-        return dbc.Alert('Default profile updated', color='success', dismissable=True), rows
+        # One statement flips the chosen row on and the current default off; untouched rows aren't rewritten
+        pid = int(profile_id)
+        with writer() as conn:
+            conn.execute('UPDATE pricing_profiles SET is_default = CASE WHEN id=? THEN 1 ELSE 0 END WHERE is_default=1 OR id=?', (pid, pid))
+        bump_data_version()
+        return dbc.Alert('Default profile updated', color='success', dismissable=True), _keyed_cache_call(_list_pricing_profiles)
     except Exception as e:
         return dbc.Alert(f'Error: {e}', color='danger'), dash.no_update
 
-# Background autosync (database only) if enabled
+# Background autosync (database only) if enabled.
+# Write callbacks set trigger_sync_now to wake the loop early; passes are at least
+# _AUTOSYNC_MIN_GAP_SEC apart so a burst of writes collapses into one sync.
+trigger_sync_now = threading.Event()
+_AUTOSYNC_MIN_GAP_SEC = 5.0
 if ONEDRIVE_SYNC_DIR and ONEDRIVE_AUTOSYNC_SEC > 0:
-    import threading, time
+    import time
     def _autosync_loop():
+        last = None
         while True:
+            if last is not None:
+                gap = _AUTOSYNC_MIN_GAP_SEC - (time.monotonic() - last)
+                if gap > 0:
+                    time.sleep(gap)
+            trigger_sync_now.clear()
             try:
+                checkpoint_wal(DATABASE_PATH)
                 ok, msg = onedrive_manager.sync_database()
                 if ok:
                     print(f"[autosync] {msg}")
             except Exception as e:
                 print(f"[autosync][error] {e}")
-            time.sleep(ONEDRIVE_AUTOSYNC_SEC)
+            last = time.monotonic()
+            trigger_sync_now.wait(ONEDRIVE_AUTOSYNC_SEC)
     threading.Thread(target=_autosync_loop, daemon=True).start()
 
 ## Legacy single-image upload callback removed (replaced by multi-image system) – stray code block cleaned.
@@ -580,11 +660,8 @@ if ONEDRIVE_SYNC_DIR and ONEDRIVE_AUTOSYNC_SEC > 0:
 # Attempt secondary import from Book2.csv if dataset appears empty/minimal
 def _attempt_import_book2():
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM sign_types")
-        count = cur.fetchone()[0]
-        conn.close()
+        with get_conn(readonly=True) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM sign_types").fetchone()[0]
         if count > 5:
             return
         csv_path = Path('Book2.csv')
@@ -592,71 +669,60 @@ def _attempt_import_book2():
             return
         print('[startup] Importing Book2.csv into sign_types...')
         import pandas as pd
-        df = pd.read_csv(csv_path)
-        # Normalize columns -> best effort mapping
-        def parse_cost(val):
-            if isinstance(val, str):
-                return float(val.replace('$','').replace(',','') or 0) if any(ch.isdigit() for ch in val) else 0.0
-            try: return float(val or 0)
-            except: return 0.0
-        records = []
-        for r in df.to_dict('records'):
-            name = str(r.get('Code') or r.get('Desc') or r.get('full_name') or '').strip()
-            if not name:
-                continue
-            width = r.get('Width') or 0
-            height = r.get('Height') or 0
-            material = r.get('Material2') or r.get('Material') or ''
+        # Only the mapped columns are parsed (callable usecols tolerates missing ones);
+        # text columns stay text so codes like '401.10' survive as written.
+        wanted = {'Code','Desc','full_name','Width','Height','Material','Material2','Unnamed: 24','material_multiplier'}
+        chunks = pd.read_csv(csv_path, usecols=lambda c: c in wanted,
+                             dtype={'Code':'string','Desc':'string','full_name':'string','Material':'string','Material2':'string'},
+                             chunksize=2000)
+        def chunk_records(df):
+            # Normalize columns -> best effort mapping, one column operation at a time
+            def first_text(cols):
+                """Row-wise first non-empty text among cols ('' when none)."""
+                out = pd.Series('', index=df.index, dtype=object)
+                for col in reversed(cols):
+                    if col in df.columns:
+                        vals = df[col].astype(object).where(df[col].notna(), '').astype(str).str.strip()
+                        out = vals.where(vals != '', out)
+                return out
+            def numeric(col):
+                if col not in df.columns:
+                    return pd.Series(0.0, index=df.index)
+                return pd.to_numeric(df[col], errors='coerce').fillna(0.0)
+            names = first_text(['Code', 'Desc', 'full_name']).str[:120]
+            materials = first_text(['Material2', 'Material']).str[:120]
+            widths, heights = numeric('Width'), numeric('Height')
             # Derive price_per_sq_ft from 'Unnamed: 24' if numeric else material_multiplier
-            ppsf_raw = r.get('Unnamed: 24') or r.get('material_multiplier') or 0
-            # compute derived fields (example heuristic)
-            try:
-                ppsf = float(str(ppsf_raw).replace('$','').replace(',','')) if ppsf_raw not in (None,'') else 0.0
-            except Exception:
-                ppsf = 0.0
-            records.append((name[:120], '', 0.0, material[:120], ppsf, float(width or 0), float(height or 0)))
-        if records:
-            conn = get_connection()
+            u24 = df['Unnamed: 24'] if 'Unnamed: 24' in df.columns else pd.Series(None, index=df.index, dtype=object)
+            mm = df['material_multiplier'] if 'material_multiplier' in df.columns else pd.Series(0, index=df.index)
+            raw = u24.where(u24.notna() & (u24 != '') & (u24 != 0), mm)
+            ppsf = pd.to_numeric(raw.astype(str).str.replace(r'[$,]', '', regex=True), errors='coerce').fillna(0.0)
+            # Rows without a name are dropped by mask; tolist() yields native floats for sqlite3
+            keep = names != ''
+            n = int(keep.sum())
+            return list(zip(names[keep].tolist(), [''] * n, [0.0] * n, materials[keep].tolist(),
+                            ppsf[keep].astype(float).tolist(), widths[keep].astype(float).tolist(),
+                            heights[keep].astype(float).tolist()))
+        imported = 0
+        with writer() as conn:
             cur = conn.cursor()
-            cur.executemany('''INSERT OR IGNORE INTO sign_types (name, description, unit_price, material, price_per_sq_ft, width, height) VALUES (?,?,?,?,?,?,?)''', records)
-            conn.commit(); conn.close()
-            print(f"[startup] Imported {len(records)} records from Book2.csv")
+            for df in chunks:
+                records = chunk_records(df)
+                cur.executemany('''INSERT OR IGNORE INTO sign_types (name, description, unit_price, material, price_per_sq_ft, width, height) VALUES (?,?,?,?,?,?,?)''', records)
+                imported += len(records)
+        if imported:
+            bump_data_version()
+            print(f"[startup] Imported {imported} records from Book2.csv")
     except Exception as e:
         print(f"[startup][import][warn] {e}")
-# ---------------- Consolidated Role/Tab Globals (moved here after cleanup) ---------------- #
-ROLE_OPTIONS = [
-    {'label': 'Admin', 'value': 'admin'},
-    {'label': 'Estimator', 'value': 'estimator'},
-    {'label': 'Sales', 'value': 'sales'},
-    {'label': 'Viewer', 'value': 'viewer'}
-]
-ROLE_RANK = {'admin':4,'estimator':3,'sales':2,'viewer':1}
-TAB_DEFS = [
-    ('projects-tab','Projects','viewer'),
-    ('signs-tab','Sign Types','estimator'),
-    ('groups-tab','Sign Groups','estimator'),
-    ('building-tab','Building View','viewer'),
-    ('estimates-tab','Estimates','viewer'),
-    ('import-tab','Import Data','viewer'),
-    ('tab_profiles','Pricing Profiles','admin'),
-    ('tab_snapshots','Snapshots','estimator'),
-    ('tab_templates','Bid Templates','estimator'),
-    ('tab_tags','Tags','estimator'),
-    ('tab_notes','Notes','estimator')
-]
-def build_tabs_for_role(role: str):
-    rank = ROLE_RANK.get(role or 'viewer',1)
-    tabs = []
-    for tid,label,min_role in TAB_DEFS:
-        if ROLE_RANK.get(min_role,1) <= rank:
-            tabs.append(dbc.Tab(label=label, tab_id=tid))
-    return tabs
 # App layout
 app.layout = dbc.Container([
     # Store for current role (session) and persisted last-used role (local)
     dcc.Store(id='current-role', storage_type='session'),
     dcc.Store(id='persisted-role', storage_type='local'),
     dcc.Store(id='persisted-active-tab', storage_type='local'),
+    # main-tabs active_tab after it has been stable for a moment; server-side tab work keys on this
+    dcc.Store(id='debounced-tab', data='projects-tab'),
     # Header with role selector
     dbc.Row([
         dbc.Col([
@@ -680,7 +746,7 @@ app.layout = dbc.Container([
             dbc.Tabs(id='main-tabs', active_tab='projects-tab')
         ])
     ], className='mb-3'),
-    dcc.Interval(id='global-dropdown-refresh', interval=int(os.getenv('SIGN_APP_DROPDOWN_REFRESH_MS','300000')), n_intervals=0),
+    dcc.Store(id='dd-refresh-token', data=0),
     dcc.Store(id='app-state', data={}),
     dcc.Store(id='last-error-message'),
     # dcc.Store for diagnostics banner dismissed (removed)
@@ -725,12 +791,13 @@ def update_role_and_tabs(current_role_value, persisted_role, persisted_tab):
     """
     # Determine role to use (persisted overrides initial default if different and valid)
     resolved_role = current_role_value or 'viewer'
+    role_changed = callback_context.triggered_id == 'role-selector'
     if persisted_role and isinstance(persisted_role, dict):
         pr = persisted_role.get('role')
-        if pr in {r['value'] for r in ROLE_OPTIONS} and pr != current_role_value and callback_context.triggered and 'role-selector' in callback_context.triggered[0]['prop_id']:
+        if pr in {r['value'] for r in ROLE_OPTIONS} and pr != current_role_value and role_changed:
             # User actively changed role; keep selection not persisted override
             pass
-        elif pr in {r['value'] for r in ROLE_OPTIONS} and (not callback_context.triggered or 'role-selector' not in callback_context.triggered[0]['prop_id']):
+        elif pr in {r['value'] for r in ROLE_OPTIONS} and not role_changed:
             # Initial load path: override with persisted
             resolved_role = pr
     tabs = build_tabs_for_role(resolved_role)
@@ -749,19 +816,43 @@ def update_role_and_tabs(current_role_value, persisted_role, persisted_tab):
 # Restore active tab on load once tabs are present
 # We no longer need a separate restore_active_tab; init_role_and_tab handles both early.
 
-# Persist active tab when user switches
-@app.callback(
+# Persist active tab when user switches (browser-only; no server round-trip per tab click)
+app.clientside_callback(
+    """
+    function(activeTab) {
+        return activeTab ? {active_tab: activeTab} : window.dash_clientside.no_update;
+    }
+    """,
     Output('persisted-active-tab','data'),
     Input('main-tabs','active_tab'),
     prevent_initial_call=False
 )
-def persist_active_tab(active_tab):
-    if not active_tab:
-        raise PreventUpdate
-    return {'active_tab': active_tab}
 
 # If there is no persisted active tab yet when tabs first render, the above will save the default
 
+# Debounce tab switches: rapid clicks/arrow keys only render (and hit the DB for) the tab the
+# user settles on. A superseded wait resolves to no_update so no promise is left pending.
+app.clientside_callback(
+    """
+    function(activeTab, current) {
+        var nu = window.dash_clientside.no_update;
+        var d = window.__tabDebounce || (window.__tabDebounce = {});
+        if (d.timer) { clearTimeout(d.timer); d.timer = null; d.resolve(nu); }
+        if (!activeTab || activeTab === current) { return nu; }
+        return new Promise(function(resolve) {
+            d.resolve = resolve;
+            d.timer = setTimeout(function() { d.timer = null; resolve(activeTab); }, 250);
+        });
+    }
+    """,
+    Output('debounced-tab','data'),
+    Input('main-tabs','active_tab'),
+    State('debounced-tab','data')
+)
+
+# Tabs below (and the import tab) have no DB-derived content; their tables/dropdowns are
+# filled by callbacks, so each layout is built once and reused on every tab switch.
+@lru_cache(maxsize=1)
 def render_pricing_profiles_tab():
     return html.Div([
         html.H4('Pricing Profiles'),
@@ -816,6 +907,7 @@ def render_pricing_profiles_tab():
         ])
     ], style={'padding':'16px'})
 
+@lru_cache(maxsize=1)
 def render_snapshots_tab():
     return html.Div([
         html.H4('Estimate Snapshots'),
@@ -846,6 +938,7 @@ def render_snapshots_tab():
         ])
     ], style={'padding':'16px'})
 
+@lru_cache(maxsize=1)
 def render_templates_tab():
     return html.Div([
         html.H4('Bid Templates'),
@@ -892,6 +985,7 @@ def render_templates_tab():
         ])
     ], style={'padding':'16px'})
 
+@lru_cache(maxsize=1)
 def render_tags_tab():
     return html.Div([
         html.H4('Sign Type Tags'),
@@ -905,6 +999,7 @@ def render_tags_tab():
         html.Pre(id='tag-list-output', style={'background':'#f8f9fa','padding':'8px','maxHeight':'260px','overflowY':'auto','fontSize':'12px'})
     ], style={'padding':'16px'})
 
+@lru_cache(maxsize=1)
 def render_notes_tab():
     return html.Div([
         html.H4('Notes'),
@@ -946,7 +1041,7 @@ def render_notes_tab():
 
 @app.callback(
     Output('tab-content','children'),
-    Input('main-tabs','active_tab'),
+    Input('debounced-tab','data'),
     State('current-role','data')
 )
 def render_active_tab(tab_id, role):
@@ -981,72 +1076,187 @@ def render_active_tab(tab_id, role):
             html.Code(str(e)[:260])
         ], color='danger', className='mt-3')
 
+# ------------------ Data version (read-model cache invalidation) ------------------ #
+# Write callbacks call bump_data_version(); cached read models (tree figure) key on
+# it plus the DB file mtimes, so writes from paths that don't bump (or from another
+# process sharing the file) still invalidate.
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+def bump_data_version():
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+
+def _dd_refresh_token():
+    """dd-refresh-token value for a writer that changed project/profile/template names."""
+    return _data_version
+
+def _data_cache_key():
+    """Current cache key, or None when caching is unsafe (non-file backend)."""
+    if backend == 'mssql':
+        return None
+    stamps = []
+    for suffix in ('', '-wal'):
+        try:
+            stamps.append(os.stat(DATABASE_PATH + suffix).st_mtime_ns)
+        except OSError:
+            stamps.append(0)
+    return (_data_version, *stamps)
+
+def _fetchone_dict(conn, sql, params=()):
+    """Single row as {column: value}, or None; for point lookups where a DataFrame is overkill.
+
+    Column names come from cursor.description, so this works for sqlite3 and pyodbc
+    cursors alike (a sqlite3.Row factory would not).
+    """
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return dict(zip([d[0] for d in cur.description], row))
+
+def _keyed_cache_call(cached_fn, *args):
+    """Call an lru_cache'd loader whose last argument is the data cache key.
+
+    Repeat calls with unchanged data return the same object; without a key
+    (mssql) the loader runs uncached.
+    """
+    key = _data_cache_key()
+    if key is None:
+        return cached_fn.__wrapped__(*args, None)
+    return cached_fn(*args, key)
+
+_tree_fig_cache = {'key': None, 'fig': None}
+_PROJECTS_CACHE = {'key': None, 'rows': []}
+# id, name, created_date first (list/options); the rest feed projects-store for the edit form
+_PROJECT_COLS = ('id', 'name', 'created_date', 'description', 'sales_tax_rate',
+                 'installation_rate', 'include_installation', 'include_sales_tax')
+
+def _project_rows():
+    """Project tuples in _PROJECT_COLS order, newest first; cached on the data key."""
+    key = _data_cache_key()
+    if key is None or _PROJECTS_CACHE['key'] != key:
+        with get_conn() as conn:
+            rows = [tuple(r) for r in conn.execute(f"SELECT {', '.join(_PROJECT_COLS)} FROM projects ORDER BY id DESC")]
+        _PROJECTS_CACHE.update(key=key, rows=rows)
+    return _PROJECTS_CACHE['rows']
+
+def _projects_store_data(rows=None):
+    """JSON records for projects-store (read clientside by the edit form)."""
+    return [dict(zip(_PROJECT_COLS, r)) for r in (_project_rows() if rows is None else rows)]
+
+def _projects_list_outputs(rows):
+    """(projects list component, dropdown options, debug text) built in one pass over rows."""
+    items, options, debug = [], [], []
+    for pid, name, created, *_ in rows:
+        items.append(html.Li(f"{name} (ID {pid}) - {created}"))
+        options.append({'label': name, 'value': pid})
+        debug.append(f"{pid}:{name}")
+    list_children = html.Ul(items, className='mb-0') if items else html.Div('No projects yet.')
+    return list_children, options, (' | '.join(debug) or 'none')
+
+# sign_types rarely changes compared to building assignments; keep name->id and the
+# dropdown options in process and reload only when the data cache key moves.
+_SIGN_TYPE_CACHE = {'key': None, 'by_name': {}, 'options': []}
+
+def _sign_type_cache():
+    key = _data_cache_key()
+    if key is None or _SIGN_TYPE_CACHE['key'] != key:
+        with get_conn() as conn:
+            rows = conn.execute('SELECT id, name, unit_price FROM sign_types ORDER BY name').fetchall()
+        _SIGN_TYPE_CACHE.update(
+            key=key,
+            by_name={name: sid for sid, name, _ in rows},
+            options=[{"label": f"{name} (${price})", "value": sid} for sid, name, price in rows],
+        )
+    return _SIGN_TYPE_CACHE
+
+# Projects -> buildings -> signs in one pass; LEFT JOINs keep empty projects/buildings.
+_PROJECT_TREE_SQL = '''SELECT p.id, p.name, b.id, b.name, st.name, bs.quantity
+                          FROM projects p
+                          LEFT JOIN buildings b ON b.project_id = p.id
+                          LEFT JOIN building_signs bs ON bs.building_id = b.id
+                          LEFT JOIN sign_types st ON st.id = bs.sign_type_id
+                          ORDER BY p.id, LOWER(b.name), b.id, bs.sign_type_id'''
+
 def get_project_tree_data():
     nodes = []
     try:
-        conn = get_connection()
-        projects_df = pd.read_sql_query("SELECT id, name FROM projects", conn)
-        for _, p in projects_df.iterrows():
-            pid = f"project_{p['id']}"; nodes.append({'id':pid,'label':p['name'],'type':'project','level':0})
-            buildings_df = pd.read_sql_query("SELECT id, name FROM buildings WHERE project_id=?", conn, params=(p['id'],))
-            for _, b in buildings_df.iterrows():
-                bid = f"building_{b['id']}"; nodes.append({'id':bid,'label':b['name'],'type':'building','level':1,'parent':pid})
-                signs_df = pd.read_sql_query('''SELECT st.name, bs.quantity FROM building_signs bs JOIN sign_types st ON bs.sign_type_id=st.id WHERE bs.building_id=?''', conn, params=(b['id'],))
-                for _, s in signs_df.iterrows():
-                    nodes.append({'id':f"sign_{b['id']}_{s['name']}", 'label':f"{s['name']} ({s['quantity']})", 'type':'sign', 'level':2, 'parent':bid})
-        conn.close()
+        last_pid = last_bid = None
+        with get_conn(readonly=True) as conn:
+            for p_id, p_name, b_id, b_name, s_name, qty in conn.execute(_PROJECT_TREE_SQL):
+                pid = f"project_{p_id}"
+                if p_id != last_pid:
+                    nodes.append({'id':pid,'label':p_name,'type':'project','level':0}); last_pid = p_id
+                if b_id is None:
+                    continue
+                bid = f"building_{b_id}"
+                if b_id != last_bid:
+                    nodes.append({'id':bid,'label':b_name,'type':'building','level':1,'parent':pid}); last_bid = b_id
+                if s_name is not None:
+                    nodes.append({'id':f"sign_{b_id}_{s_name}", 'label':f"{s_name} ({qty})", 'type':'sign', 'level':2, 'parent':bid})
     except Exception as e:
         print(f"[tree-data][warn] {e}")
     return nodes
 
 def safe_tree_figure():
+    key = _data_cache_key()
+    if key is not None and _tree_fig_cache['key'] == key:
+        return _tree_fig_cache['fig']
     try:
         nodes = get_project_tree_data()
         if not nodes:
             fig = go.Figure(); fig.update_layout(height=400, margin=dict(l=10,r=10,t=30,b=10)); return fig
-        levels = {}
-        for n in nodes: levels.setdefault(n['level'], []).append(n)
         x_gap = 240; y_gap = 42
-        pos = {}
-        for lvl, arr in levels.items():
-            for i, n in enumerate(arr): pos[n['id']] = (lvl*x_gap, i*y_gap)
-        edge_x=[]; edge_y=[]
-        for n in nodes:
-            if 'parent' in n and n['parent'] in pos:
-                x0,y0 = pos[n['parent']]; x1,y1 = pos[n['id']]
-                edge_x += [x0,x1,None]; edge_y += [y0,y1,None]
+        # Column per level, row = order within the level; positions are index-aligned with nodes
+        level = np.fromiter((n['level'] for n in nodes), dtype=np.int64, count=len(nodes))
+        levels = {lvl: np.flatnonzero(level == lvl) for lvl in np.unique(level)}
+        pos_x = level * float(x_gap)
+        pos_y = np.empty(len(nodes))
+        for idx in levels.values():
+            pos_y[idx] = np.arange(len(idx)) * y_gap
+        index = {n['id']: i for i, n in enumerate(nodes)}
+        edges = [(index[n['parent']], i) for i, n in enumerate(nodes) if n.get('parent') in index]
         fig = go.Figure()
-        if edge_x:
+        if edges:
+            p_idx, c_idx = np.array(edges).T
+            gap = np.full(len(edges), np.nan)  # NaN breaks the line between segments
+            edge_x = np.column_stack([pos_x[p_idx], pos_x[c_idx], gap]).ravel()
+            edge_y = np.column_stack([pos_y[p_idx], pos_y[c_idx], gap]).ravel()
             fig.add_trace(go.Scatter(x=edge_x,y=edge_y,mode='lines',line=dict(color='#cccccc',width=0.5),hoverinfo='none'))
         color_map={'project':'#1f77b4','building':'#ff7f0e','sign':'#2ca02c'}
-        for lvl, arr in levels.items():
+        for idx in levels.values():
             fig.add_trace(go.Scatter(
-                x=[pos[n['id']][0] for n in arr],
-                y=[pos[n['id']][1] for n in arr],
+                x=pos_x[idx],
+                y=pos_y[idx],
                 mode='markers+text',
-                marker=dict(size=14,color=[color_map.get(n['type'],'#888') for n in arr]),
-                text=[n['label'] for n in arr], textposition='middle right',
+                marker=dict(size=14,color=[color_map.get(nodes[i]['type'],'#888') for i in idx]),
+                text=[nodes[i]['label'] for i in idx], textposition='middle right',
                 hovertemplate='%{text}<extra></extra>', showlegend=False
             ))
         fig.update_layout(height=600, margin=dict(l=10,r=10,t=35,b=10), xaxis=dict(visible=False), yaxis=dict(visible=False))
+        _tree_fig_cache.update(key=key, fig=fig)
         return fig
     except Exception as e:
         fig = go.Figure(); fig.add_annotation(text=f"Tree error: {e}", showarrow=False, x=0.5, y=0.5, xref='paper', yref='paper'); fig.update_layout(height=400)
         return fig
 
+def _tree_update():
+    """Tree figure for write callbacks, computed last; a tree failure leaves the
+    figure unchanged instead of replacing the callback's feedback with an error."""
+    try:
+        return safe_tree_figure()
+    except Exception as e:
+        print(f"[tree][warn] tree refresh skipped: {e}")
+        return dash.no_update
+
 def render_projects_tab():
     """Render the projects management tab."""
     # Load current projects for initial render
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT id, name, created_date FROM projects ORDER BY id DESC", conn)
-    conn.close()
-    if df.empty:
-        project_list_component = html.Div("No projects yet.")
-        project_options = []
-    else:
-        rows = [html.Li(f"{r.name} (ID {r.id}) - {r.created_date}") for r in df.itertuples()]
-        project_list_component = html.Ul(rows, className="mb-0")
-        project_options = [{"label": r.name, "value": r.id} for r in df.itertuples()]
+    projects = _project_rows()
+    project_list_component, project_options, _ = _projects_list_outputs(projects)
     return dbc.Row([
         dbc.Col([
             dbc.Card([
@@ -1210,6 +1420,7 @@ def render_projects_tab():
                             dbc.Label("Edit Existing", width=4),
                             dbc.Col(dcc.Dropdown(id='project-edit-dropdown', placeholder='Select project to edit', options=project_options), width=8)
                         ], className="mb-3"),
+                        dcc.Store(id='projects-store', data=_projects_store_data(projects)),
                         dbc.Row([
                             dbc.Label("Debug Projects", width=4),
                             dbc.Col(html.Small(id='projects-debug-list', className='text-muted'), width=8)
@@ -1257,28 +1468,9 @@ def render_projects_tab():
         ], width=4)
     ])
 
+@lru_cache(maxsize=1)
 def render_signs_tab():
-    """Render the sign types management tab."""
-    # Preload current sign_types so the table isn't empty if callback hasn't fired yet
-    try:
-        conn = get_connection()
-        preload_df = pd.read_sql_query(
-            "SELECT name, description, material_alt, unit_price, material, price_per_sq_ft, material_multiplier, width, height, install_type, install_time_hours, per_sign_install_rate, image_path FROM sign_types ORDER BY name",
-            conn
-        )
-        # Also preload material pricing so user immediately sees saved materials
-        try:
-            material_df = pd.read_sql_query("SELECT material_name, price_per_sq_ft FROM material_pricing ORDER BY material_name", conn)
-        except Exception as me:
-            print(f"[render_signs_tab][warn] failed preloading material_pricing: {me}")
-            material_df = pd.DataFrame(columns=['material_name','price_per_sq_ft'])
-        conn.close()
-        preload_records = preload_df.to_dict('records')
-        preload_materials = material_df.to_dict('records')
-    except Exception as e:
-        print(f"[render_signs_tab][warn] failed preloading sign_types: {e}")
-        preload_records = []
-        preload_materials = []
+    """Render the sign types management tab (static shell; hydrate_signs_tab fills the data)."""
     return dbc.Row([
         dbc.Col([
             dbc.Card([
@@ -1293,8 +1485,7 @@ def render_signs_tab():
                                     {'label':'10','value':10},
                                     {'label':'25','value':25},
                                     {'label':'50','value':50},
-                                    {'label':'100','value':100},
-                                    {'label':'All','value':-1}
+                                    {'label':'100','value':100}
                                 ],
                                 value=10,
                                 clearable=False,
@@ -1333,17 +1524,25 @@ def render_signs_tab():
                             {"name": "Install Hrs", "id": "install_time_hours", "type": "numeric", "editable": True},
                             {"name": "Per Sign Install $", "id": "per_sign_install_rate", "type": "numeric", "editable": True}
                         ],
-                        data=preload_records,
+                        data=[],
                         editable=True,
                         row_deletable=True,
+                        # Paging/sort/filter run in SQL (page_signs_table); only one page is sent
+                        page_action='custom',
+                        page_current=0,
                         page_size=10,
+                        sort_action='custom',
+                        sort_mode='single',
+                        sort_by=[],
+                        filter_action='custom',
+                        filter_query='',
                         style_table={"overflowX": "auto"}
                     ),
                     dbc.Button("Add New Sign Type", id="add-sign-btn", color="success", className="mt-3 me-2"),
                     dbc.Badge(id="signs-save-status", color="secondary", className="ms-2")
                 ]),
-                # Store original unfiltered sign types dataset to allow restoring after filters
-                dcc.Store(id='signs-table-master-store', data=preload_records)
+                # Mounting this store fires hydrate_signs_tab once the tab is in the DOM
+                dcc.Store(id='signs-preload')
             ]),
             dbc.Card([
                 dbc.CardHeader(html.H5("Sign Type Images")),
@@ -1351,7 +1550,7 @@ def render_signs_tab():
                     dbc.Row([
                         dbc.Col([
                             dbc.Label('Select Sign Type'),
-                            dcc.Dropdown(id='sign-image-sign-dropdown', options=[{'label':r['name'],'value':r['name']} for r in preload_records], placeholder='Choose sign type...')
+                            dcc.Dropdown(id='sign-image-sign-dropdown', options=[], placeholder='Choose sign type...')
                         ], width=6),
                         dbc.Col([
                             dbc.Label('Upload Images'),
@@ -1379,7 +1578,7 @@ def render_signs_tab():
                             {"name":"Material","id":"material_name","editable":True},
                             {"name":"Price / Sq Ft","id":"price_per_sq_ft","type":"numeric","editable":True}
                         ],
-                        data=preload_materials, editable=True, row_deletable=True, page_size=8, style_table={'overflowX':'auto'}
+                        data=[], editable=True, row_deletable=True, page_size=8, style_table={'overflowX':'auto'}
                     ),
                     dbc.Button('Add Material', id='add-material-btn', color='secondary', className='mt-2 me-2'),
                     dbc.Button('Save Materials', id='save-materials-btn', color='primary', className='mt-2 me-2'),
@@ -1398,15 +1597,118 @@ def render_signs_tab():
         ], id='debug-signs-card', className='mt-2')
     ])
 
+_SIGNS_TAB_COLS = ('name', 'description', 'material_alt', 'unit_price', 'material', 'price_per_sq_ft', 'material_multiplier',
+                   'width', 'height', 'install_type', 'install_time_hours', 'per_sign_install_rate', 'image_path')
+_SIGNS_TAB_NUMERIC_COLS = frozenset({'unit_price', 'price_per_sq_ft', 'material_multiplier', 'width', 'height',
+                                     'install_time_hours', 'per_sign_install_rate'})
+_MATERIALS_SQL = "SELECT material_name, price_per_sq_ft FROM material_pricing ORDER BY material_name"
+# DataTable filter_query operators -> SQL
+_DT_FILTER_OPS = {'eq': '=', '=': '=', 'ne': '!=', '!=': '!=', 'lt': '<', '<': '<', 'le': '<=', '<=': '<=',
+                  'gt': '>', '>': '>', 'ge': '>=', '>=': '>=', 'contains': 'LIKE', 'datestartswith': 'LIKE'}
+_DT_FILTER_RE = re.compile(r'^\s*\{(?P<col>[^}]+)\}\s+[si]?(?P<op>contains|datestartswith|eq|ne|lt|le|gt|ge|!=|<=|>=|=|<|>)\s+(?P<val>.+?)\s*$')
+
+def _datatable_filter_sql(filter_query, allowed_cols, numeric_cols=()):
+    """Translate a DataTable filter_query into (where clauses, params); unknown parts are ignored.
+
+    Values stay strings (sign codes are often numeric-looking) except for comparisons on numeric_cols.
+    """
+    clauses, params = [], []
+    for part in (filter_query or '').split(' && '):
+        m = _DT_FILTER_RE.match(part)
+        if not m or m.group('col') not in allowed_cols:
+            continue
+        col, op, raw = m.group('col'), m.group('op'), m.group('val')
+        value = raw
+        if raw[0] == raw[-1] and raw[0] in ('"', "'", '`') and len(raw) > 1:
+            value = raw[1:-1].replace('\\' + raw[0], raw[0])
+        if op in ('contains', 'datestartswith'):
+            # Literal match: escape LIKE wildcards ('[' is one on mssql)
+            value = re.sub(r'([\\%_\[])', r'\\\1', str(value))
+            value = f"%{value}%" if op == 'contains' else f"{value}%"
+        elif col in numeric_cols:
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+        clauses.append(f"{col} LIKE ? ESCAPE '\\'" if _DT_FILTER_OPS[op] == 'LIKE' else f"{col} {_DT_FILTER_OPS[op]} ?")
+        params.append(value)
+    return clauses, params
+
+def _signs_page(page_current, page_size, sort_by=None, filter_query='', install_filter='all'):
+    """Return (records, total, page) for one page of sign types, filtered and sorted in SQL.
+
+    page is page_current clamped to the last page, so the table can be moved back onto it.
+    """
+    clauses, params = _datatable_filter_sql(filter_query, _SIGNS_TAB_COLS, _SIGNS_TAB_NUMERIC_COLS)
+    if install_filter in ('ext', 'non_ext'):
+        clauses.append("LOWER(LTRIM(RTRIM(COALESCE(install_type,'')))) " + ('=' if install_filter == 'ext' else '<>') + " 'ext'")
+    where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    order = 'name'
+    if sort_by and sort_by[0].get('column_id') in _SIGNS_TAB_COLS:
+        order = f"{sort_by[0]['column_id']} {'DESC' if sort_by[0].get('direction') == 'desc' else 'ASC'}, name"
+    page_size = max(1, int(page_size or 10))
+    with get_conn(readonly=True) as conn:
+        total = conn.execute(f'SELECT COUNT(*) FROM sign_types{where}', params).fetchone()[0]
+        # Clamp so a narrowing filter never strands the table on an empty page
+        page = min(max(0, int(page_current or 0)), max(0, (total - 1) // page_size))
+        offset = page * page_size
+        if backend == 'mssql':
+            sql = f"SELECT {', '.join(_SIGNS_TAB_COLS)} FROM sign_types{where} ORDER BY {order} OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+            cur = conn.execute(sql, params + [offset, page_size])
+        else:
+            sql = f"SELECT {', '.join(_SIGNS_TAB_COLS)} FROM sign_types{where} ORDER BY {order} LIMIT ? OFFSET ?"
+            cur = conn.execute(sql, params + [page_size, offset])
+        records = [dict(zip(_SIGNS_TAB_COLS, r)) for r in cur]
+    return records, total, page
+
+@app.callback(
+    Output('material-pricing-table','data', allow_duplicate=True),
+    Output('sign-image-sign-dropdown','options'),
+    Input('signs-preload','data'),
+    prevent_initial_call='initial_duplicate'
+)
+def hydrate_signs_tab(_):
+    """Load material pricing and sign type names after the Sign Types tab shell has rendered."""
+    options, materials = [], []
+    try:
+        with get_conn(readonly=True) as conn:
+            options = [{'label': name, 'value': name} for (name,) in conn.execute("SELECT name FROM sign_types ORDER BY name")]
+            # Also load material pricing so user immediately sees saved materials
+            try:
+                materials = [{'material_name': m, 'price_per_sq_ft': p} for m, p in
+                             conn.execute(_MATERIALS_SQL)]
+            except Exception as me:
+                print(f"[signs-tab][warn] failed loading material_pricing: {me}")
+    except Exception as e:
+        print(f"[signs-tab][warn] failed loading sign_types: {e}")
+    return materials, options
+
+@app.callback(
+    Output('signs-table','data', allow_duplicate=True),
+    Output('signs-table','page_count'),
+    Output('signs-table','page_current', allow_duplicate=True),
+    Input('signs-table','page_current'),
+    Input('signs-table','page_size'),
+    Input('signs-table','sort_by'),
+    Input('signs-table','filter_query'),
+    Input('signs-install-filter','value'),
+    prevent_initial_call='initial_duplicate'
+)
+def page_signs_table(page_current, page_size, sort_by, filter_query, install_filter):
+    """Serve the current page of the Sign Types table (LIMIT/OFFSET instead of shipping every row)."""
+    try:
+        records, total, page = _signs_page(page_current, page_size, sort_by, filter_query, install_filter)
+    except Exception as e:
+        print(f"[signs-tab][warn] failed loading sign_types page: {e}")
+        return [], 1, dash.no_update
+    return records, max(1, -(-total // max(1, int(page_size or 10)))), (page if page != page_current else dash.no_update)
+
 def render_groups_tab():
     """Render the sign groups management tab."""
     # Preload sign types & groups
-    conn = get_connection()
-    sign_types_df = pd.read_sql_query("SELECT id, name FROM sign_types ORDER BY name", conn)
-    groups_df = pd.read_sql_query("SELECT id, name FROM sign_groups ORDER BY name", conn)
-    conn.close()
-    sign_type_options = [{"label": r.name, "value": r.id} for r in sign_types_df.itertuples()]
-    group_options = [{"label": r.name, "value": r.id} for r in groups_df.itertuples()]
+    with get_conn(readonly=True) as conn:
+        sign_type_options = [{"label": name, "value": sid} for sid, name in conn.execute("SELECT id, name FROM sign_types ORDER BY name")]
+        group_options = [{"label": name, "value": gid} for gid, name in conn.execute("SELECT id, name FROM sign_groups ORDER BY name")]
     return dbc.Row([
         dbc.Col([
             dbc.Card([
@@ -1468,10 +1770,8 @@ def render_groups_tab():
 def render_building_tab():
     """Render dedicated building view and sign management."""
     # Preload project options
-    conn = get_connection()
-    pdf = pd.read_sql_query('SELECT id, name FROM projects ORDER BY name', conn)
-    conn.close()
-    project_options = ([{'label': r.name, 'value': r.id} for r in pdf.itertuples()]) if not pdf.empty else []
+    with get_conn(readonly=True) as conn:
+        project_options = [{'label': name, 'value': pid} for pid, name in conn.execute('SELECT id, name FROM projects ORDER BY name')]
     return dbc.Row([
         dbc.Col([
             dbc.Card([
@@ -1563,12 +1863,14 @@ def render_building_tab():
 def render_estimates_tab():
     """Render the cost estimation and export tab."""
     # Populate project options fresh on each render
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT id, name FROM projects ORDER BY name", conn)
-    bdf = pd.read_sql_query("SELECT b.id, b.name, b.project_id, p.name as project_name FROM buildings b JOIN projects p ON b.project_id=p.id ORDER BY p.name, b.name", conn)
-    conn.close()
-    project_options = [{"label": r.name, "value": r.id} for r in df.itertuples()] if not df.empty else []
-    building_options = [{"label": f"{r.name} (Project: {r.project_name})", "value": r.id} for r in bdf.itertuples()] if not bdf.empty else []
+    with get_conn(readonly=True) as conn:
+        project_options = [{"label": name, "value": pid} for pid, name in conn.execute("SELECT id, name FROM projects ORDER BY name")]
+        bdf = pd.read_sql_query("SELECT b.id, b.name, b.project_id, p.name as project_name FROM buildings b JOIN projects p ON b.project_id=p.id ORDER BY p.name, b.name", conn)
+    building_options = []
+    if not bdf.empty:
+        # Build labels column-wise; avoids a namedtuple + f-string per building row
+        labels = bdf['name'].astype(str) + ' (Project: ' + bdf['project_name'].astype(str) + ')'
+        building_options = [{"label": l, "value": i} for i, l in zip(bdf['id'].tolist(), labels.tolist())]
     return dbc.Row([
         dbc.Col([
             dbc.Card([
@@ -1697,8 +1999,9 @@ def render_estimates_tab():
         ])
     ])
 
+@lru_cache(maxsize=1)
 def render_import_tab():
-    """Render the data import tab."""
+    """Render the data import tab (static; built once)."""
     return dbc.Row([
         dbc.Col([
             dbc.Card([
@@ -1794,6 +2097,7 @@ def handle_sign_type_multi_image(contents_list, filenames, sign_name):
             if not cover_path:
                 cur.execute('UPDATE sign_types SET image_path=? WHERE id=?', (str(out_path), sign_type_id))
                 cover_path = str(out_path)
+                build_node_thumbnail(sign_type_id, out_path)
             saved += 1
         except Exception as e:
             errors.append(f"{fname}: {e}")
@@ -1845,6 +2149,7 @@ def set_cover_image(n_clicks_list, sign_name):
     sign_type_id = row[0]
     cur.execute('UPDATE sign_types SET image_path=? WHERE id=?', (path, sign_type_id))
     conn.commit(); conn.close()
+    build_node_thumbnail(sign_type_id, path)
     return _render_sign_image_gallery(sign_name)
 
 
@@ -1929,6 +2234,8 @@ def delete_sign_type_image(n_clicks_list, sign_name):
             next_cover = cur.fetchone()
             new_cover = next_cover[0] if next_cover else None
             cur.execute('UPDATE sign_types SET image_path=? WHERE id=?', (new_cover, sign_type_id))
+            if new_cover:
+                build_node_thumbnail(sign_type_id, new_cover)
         conn.commit(); conn.close()
     except Exception as e:
         print(f"[sign-image-delete][error] {e}")
@@ -2073,8 +2380,10 @@ def manual_import_book2(n):
     Output('assign-project-dropdown', 'options'),
     Output('project-edit-dropdown', 'options', allow_duplicate=True),
     Output('projects-debug-list','children', allow_duplicate=True),
+    Output('projects-store', 'data', allow_duplicate=True),
+    Output('dd-refresh-token', 'data', allow_duplicate=True),
     Input('create-project-btn', 'n_clicks'),
-    Input('main-tabs','active_tab'),
+    Input('debounced-tab','data'),
     State('project-name-input', 'value'),
     State('project-desc-input', 'value'),
     State('sales-tax-input', 'value'),
@@ -2091,49 +2400,60 @@ def create_or_refresh_projects(n_clicks, active_tab, name, desc, sales_tax, inst
     - If triggered by button click, attempt to create then reload list.
     """
     triggered = [t['prop_id'].split('.')[0] for t in callback_context.triggered] if callback_context.triggered else []
-    hydrate_only = ('main-tabs' in triggered and active_tab == 'projects-tab' and not n_clicks)
+    hydrate_only = ('debounced-tab' in triggered and active_tab == 'projects-tab' and not n_clicks)
     create_mode = ('create-project-btn' in triggered)
     if not (hydrate_only or create_mode):
         raise PreventUpdate
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         feedback = dash.no_update
         if create_mode:
             if not name:
-                return (dash.no_update, dbc.Alert("Project name required", color='danger'), dash.no_update, dash.no_update, dash.no_update, dash.no_update)
+                return (dash.no_update, dbc.Alert("Project name required", color='danger'), dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update)
+            insert_sql = "INSERT INTO projects (name, description, sales_tax_rate, installation_rate, include_installation, include_sales_tax) VALUES (?,?,?,?,?,?)"
+            if backend == 'sqlite':
+                insert_sql += f" RETURNING {', '.join(_PROJECT_COLS)}"
             try:
-                cur.execute("INSERT INTO projects (name, description, sales_tax_rate, installation_rate, include_installation, include_sales_tax) VALUES (?,?,?,?,?,?)", (
-                    name.strip(),
-                    desc or '',
-                    float(sales_tax or 0)/100.0,
-                    float(install_rate or 0)/100.0,
-                    1 if (include_install_values and 1 in include_install_values) else 0,
-                    1 if (include_tax_values and 1 in include_tax_values) else 0
-                ))
-                conn.commit()
+                pre_key = _data_cache_key()
+                with writer() as conn:
+                    cur = conn.cursor()
+                    cur.execute(insert_sql, (
+                        name.strip(),
+                        desc or '',
+                        float(sales_tax or 0)/100.0,
+                        float(install_rate or 0)/100.0,
+                        1 if (include_install_values and 1 in include_install_values) else 0,
+                        1 if (include_tax_values and 1 in include_tax_values) else 0
+                    ))
+                    new_row = cur.fetchone() if backend == 'sqlite' else None
+                bump_data_version()
+                # Cached list was current before the insert: prepend instead of re-reading
+                if new_row and pre_key is not None and _PROJECTS_CACHE['key'] == pre_key:
+                    _PROJECTS_CACHE.update(key=_data_cache_key(), rows=[tuple(new_row)] + _PROJECTS_CACHE['rows'])
                 feedback = dbc.Alert(f"Project '{name}' created", color='success', dismissable=True)
             except sqlite3.IntegrityError:
                 feedback = dbc.Alert(f"Project '{name}' already exists", color='warning')
             except Exception as e:
-                return dash.no_update, dbc.Alert(f"Error: {e}", color='danger'), dash.no_update, dash.no_update, dash.no_update, dash.no_update
-        df = pd.read_sql_query("SELECT id, name, created_date FROM projects ORDER BY id DESC", conn)
-        conn.close()
-        if df.empty:
-            list_children = html.Div("No projects yet.")
-            project_options = []
-            debug_txt = 'none'
-        else:
-            rows = [html.Li(f"{r.name} (ID {r.id}) - {r.created_date}") for r in df.itertuples()]
-            list_children = html.Ul(rows, className="mb-0")
-            project_options = [{"label": r.name, "value": r.id} for r in df.itertuples()]
-            debug_txt = ' | '.join(f"{r.id}:{r.name}" for r in df.itertuples())
-        tree_fig = safe_tree_figure()
-        return list_children, feedback, tree_fig, project_options, project_options, debug_txt
+                return dash.no_update, dbc.Alert(f"Error: {e}", color='danger'), dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+        projects = _project_rows()
+        list_children, project_options, debug_txt = _projects_list_outputs(projects)
+        store_data = _projects_store_data(projects)
+        token = _dd_refresh_token() if create_mode else dash.no_update
+        return list_children, feedback, _tree_update(), project_options, project_options, debug_txt, store_data, token
     except Exception as e:
-        return dash.no_update, dbc.Alert(f"Error: {e}", color='danger'), dash.no_update, dash.no_update, dash.no_update, dash.no_update
+        return dash.no_update, dbc.Alert(f"Error: {e}", color='danger'), dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
 
-@app.callback(
+# Edit form is filled from projects-store in the browser; no server round-trip per selection.
+app.clientside_callback(
+    """
+    function(projectId, projects) {
+        var nu = window.dash_clientside.no_update;
+        var r = projectId && (projects || []).find(function(p) { return p.id === projectId; });
+        if (!r) { return [nu, nu, nu, nu, nu, nu]; }
+        var pct = function(v) { return Math.round((v || 0) * 1000000) / 10000; };
+        return [r.name, r.description || '', pct(r.sales_tax_rate), pct(r.installation_rate),
+                r.include_installation ? [1] : [], r.include_sales_tax ? [1] : []];
+    }
+    """,
     Output('project-name-input','value'),
     Output('project-desc-input','value'),
     Output('sales-tax-input','value'),
@@ -2141,22 +2461,15 @@ def create_or_refresh_projects(n_clicks, active_tab, name, desc, sales_tax, inst
     Output('include-installation-input','value'),
     Output('include-sales-tax-input','value'),
     Input('project-edit-dropdown','value'),
+    State('projects-store','data'),
     prevent_initial_call=True
 )
-def load_project_for_edit(project_id):
-    if not project_id:
-        raise PreventUpdate
-    conn = get_connection()
-    df = pd.read_sql_query('SELECT * FROM projects WHERE id=?', conn, params=(project_id,))
-    conn.close()
-    if df.empty:
-        raise PreventUpdate
-    r = df.iloc[0]
-    return r['name'], r.get('description',''), round((r.get('sales_tax_rate') or 0)*100,4), round((r.get('installation_rate') or 0)*100,4), ([1] if r.get('include_installation') else []), ([1] if r.get('include_sales_tax') else [])
 
 @app.callback(
     Output('project-create-feedback','children', allow_duplicate=True),
     Output('project-tree','figure', allow_duplicate=True),
+    Output('projects-store','data', allow_duplicate=True),
+    Output('dd-refresh-token','data', allow_duplicate=True),
     Input('update-project-btn','n_clicks'),
     State('project-edit-dropdown','value'),
     State('project-name-input','value'),
@@ -2171,22 +2484,35 @@ def update_project(n_clicks, project_id, name, desc, sales_tax, install_rate, in
     if not n_clicks:
         raise PreventUpdate
     if not project_id or not name:
-        return dbc.Alert('Select project and ensure name present', color='danger'), dash.no_update
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute('''UPDATE projects SET name=?, description=?, sales_tax_rate=?, installation_rate=?, include_installation=?, include_sales_tax=?, last_modified=CURRENT_TIMESTAMP WHERE id=?''', (
-        name.strip(), desc or '', float(sales_tax or 0)/100.0, float(install_rate or 0)/100.0,
-        1 if (include_install_values and 1 in include_install_values) else 0,
-        1 if (include_tax_values and 1 in include_tax_values) else 0,
-        project_id
-    ))
-    conn.commit(); conn.close()
-    return dbc.Alert('Project updated', color='success'), safe_tree_figure()
+        return dbc.Alert('Select project and ensure name present', color='danger'), dash.no_update, dash.no_update, dash.no_update
+    with writer() as conn:
+        conn.execute('''UPDATE projects SET name=?, description=?, sales_tax_rate=?, installation_rate=?, include_installation=?, include_sales_tax=?, last_modified=CURRENT_TIMESTAMP WHERE id=?''', (
+            name.strip(), desc or '', float(sales_tax or 0)/100.0, float(install_rate or 0)/100.0,
+            1 if (include_install_values and 1 in include_install_values) else 0,
+            1 if (include_tax_values and 1 in include_tax_values) else 0,
+            project_id
+        ))
+    bump_data_version()
+    feedback = dbc.Alert('Project updated', color='success')
+    store_data = _projects_store_data()
+    return feedback, _tree_update(), store_data, _dd_refresh_token()
 
 # Unified refresh for project-edit-dropdown and debug list
 ## removed refresh_project_dropdown to simplify; debug string handled in create/delete callbacks
 
 # ------------------ Building Management & Sign Assignment ------------------ #
+# Case-insensitive building-name match that can use idx_buildings_project_name
+# (project_id, name COLLATE NOCASE); LOWER(name) would only seek on project_id.
+# SQL Server's default collation is already case-insensitive.
+_BUILDING_NAME_MATCH = "name=? COLLATE NOCASE" if backend == 'sqlite' else "name=?"
+_PROJECT_BUILDINGS_SQL = 'SELECT id, name FROM buildings WHERE project_id=? ORDER BY name'
+
+@lru_cache(maxsize=64)
+def _building_options_cached(project_id, _key):
+    with get_conn() as conn:
+        return [{"label": name, "value": bid}
+                for bid, name in conn.execute("SELECT id, name FROM buildings WHERE project_id = ? ORDER BY id", (project_id,))]
+
 @app.callback(
     Output('building-dropdown', 'options'),
     Output('building-dropdown', 'value'),
@@ -2196,12 +2522,8 @@ def update_project(n_clicks, project_id, name, desc, sales_tax, install_rate, in
 def load_buildings_for_project(project_id):
     if not project_id:
         return [], None, []
-    conn = get_connection()
-    buildings = pd.read_sql_query("SELECT id, name FROM buildings WHERE project_id = ? ORDER BY id", conn, params=(project_id,))
-    sign_types = pd.read_sql_query("SELECT id, name, unit_price FROM sign_types ORDER BY name", conn)
-    conn.close()
-    building_options = [{"label": r.name, "value": r.id} for r in buildings.itertuples()]
-    sign_type_options = [{"label": f"{r.name} (${r.unit_price})", "value": r.id} for r in sign_types.itertuples()]
+    building_options = _keyed_cache_call(_building_options_cached, project_id)
+    sign_type_options = _sign_type_cache()['options']
     return building_options, (building_options[0]['value'] if building_options else None), sign_type_options
 
 @app.callback(
@@ -2212,27 +2534,38 @@ def load_buildings_for_project(project_id):
     State('assign-project-dropdown', 'value'),
     State('new-building-name', 'value'),
     State('new-building-desc', 'value'),
+    State('building-dropdown', 'options'),
     prevent_initial_call=True
 )
-def add_building(n_clicks, project_id, name, desc):
+def add_building(n_clicks, project_id, name, desc, current_options):
     if not n_clicks:
         raise PreventUpdate
     if not project_id or not name:
         return dash.no_update, "Select project and enter name", dash.no_update
-    conn = get_connection()
-    cur = conn.cursor()
-    # Duplicate name check (case-insensitive) within project
-    cur.execute("SELECT 1 FROM buildings WHERE project_id=? AND LOWER(name)=LOWER(?)", (project_id, name.strip()))
-    if cur.fetchone():
-        conn.close()
-        return dash.no_update, f"Building name '{name}' already exists", dash.no_update
-    cur.execute("INSERT INTO buildings (project_id, name, description) VALUES (?,?,?)", (project_id, name.strip(), desc or ''))
-    conn.commit()
-    buildings = pd.read_sql_query("SELECT id, name FROM buildings WHERE project_id = ? ORDER BY id", conn, params=(project_id,))
-    conn.close()
-    options = [{"label": r.name, "value": r.id} for r in buildings.itertuples()]
-    tree_fig = safe_tree_figure()
-    return options, f"Building '{name}' added", tree_fig
+    with writer() as conn:
+        cur = conn.cursor()
+        insert_sql = "INSERT INTO buildings (project_id, name, description) VALUES (?,?,?)"
+        if backend == 'sqlite':
+            # idx_buildings_project_name (project_id, name NOCASE) rejects duplicates;
+            # DO NOTHING + no returned row replaces a separate existence check.
+            cur.execute(insert_sql + " ON CONFLICT DO NOTHING RETURNING id", (project_id, name.strip(), desc or ''))
+            new_row = cur.fetchone()
+            if new_row is None:
+                return dash.no_update, f"Building name '{name}' already exists", dash.no_update
+        else:
+            cur.execute(f"SELECT 1 FROM buildings WHERE project_id=? AND {_BUILDING_NAME_MATCH}", (project_id, name.strip()))
+            if cur.fetchone():
+                return dash.no_update, f"Building name '{name}' already exists", dash.no_update
+            cur.execute(insert_sql, (project_id, name.strip(), desc or ''))
+            new_row = None
+        if new_row and current_options is not None:
+            # Options are ordered by id, so the new building goes last
+            options = list(current_options) + [{"label": name.strip(), "value": new_row[0]}]
+        else:
+            cur.execute("SELECT id, name FROM buildings WHERE project_id = ? ORDER BY id", (project_id,))
+            options = [{"label": b_name, "value": bid} for bid, b_name in cur]
+    bump_data_version()
+    return options, f"Building '{name}' added", _tree_update()
 
 @app.callback(
     Output('building-dropdown','options', allow_duplicate=True),
@@ -2242,48 +2575,84 @@ def add_building(n_clicks, project_id, name, desc):
     State('assign-project-dropdown','value'),
     State('building-dropdown','value'),
     State('rename-building-input','value'),
+    State('building-dropdown','options'),
     prevent_initial_call=True
 )
-def rename_building(n_clicks, project_id, building_id, new_name):
+def rename_building(n_clicks, project_id, building_id, new_name, current_options):
     if not n_clicks:
         raise PreventUpdate
     if not (project_id and building_id and new_name and new_name.strip()):
         return dash.no_update, 'Provide building and new name', dash.no_update
-    conn = get_connection()
-    cur = conn.cursor()
-    # uniqueness within project
-    cur.execute('SELECT 1 FROM buildings WHERE project_id=? AND LOWER(name)=LOWER(?) AND id<>?', (project_id, new_name.strip(), building_id))
-    if cur.fetchone():
-        conn.close()
-        return dash.no_update, f"Name '{new_name}' already exists", dash.no_update
-    cur.execute('UPDATE buildings SET name=?, last_modified=CURRENT_TIMESTAMP WHERE id=?', (new_name.strip(), building_id))
-    conn.commit()
-    bdf = pd.read_sql_query('SELECT id, name FROM buildings WHERE project_id=? ORDER BY id', conn, params=(project_id,))
-    conn.close()
-    options = [{'label': r.name, 'value': r.id} for r in bdf.itertuples()]
-    return options, 'Building renamed', safe_tree_figure()
+    with writer() as conn:
+        cur = conn.cursor()
+        # uniqueness within project (the unique index enforces it on SQLite)
+        if backend != 'sqlite':
+            cur.execute(f'SELECT 1 FROM buildings WHERE project_id=? AND {_BUILDING_NAME_MATCH} AND id<>?', (project_id, new_name.strip(), building_id))
+            if cur.fetchone():
+                return dash.no_update, f"Name '{new_name}' already exists", dash.no_update
+        try:
+            cur.execute('UPDATE buildings SET name=?, last_modified=CURRENT_TIMESTAMP WHERE id=?', (new_name.strip(), building_id))
+        except sqlite3.IntegrityError:
+            return dash.no_update, f"Name '{new_name}' already exists", dash.no_update
+        if current_options is None:
+            cur.execute('SELECT id, name FROM buildings WHERE project_id=? ORDER BY id', (project_id,))
+            current_options = [{'label': b_name, 'value': bid} for bid, b_name in cur]
+    bump_data_version()
+    options = [{'label': new_name.strip() if o['value'] == building_id else o['label'], 'value': o['value']}
+               for o in current_options]
+    return options, 'Building renamed', _tree_update()
 
 def _fetch_building_signs(building_id):
-    conn = get_connection()
-    df = pd.read_sql_query('''
-        SELECT st.name as sign_name, bs.quantity, st.unit_price, (bs.quantity * st.unit_price) as total
-        FROM building_signs bs
-        JOIN sign_types st ON bs.sign_type_id = st.id
-        WHERE bs.building_id = ?
-        ORDER BY st.name
-    ''', conn, params=(building_id,))
-    conn.close()
+    with get_conn(readonly=True) as conn:
+        df = pd.read_sql_query('''
+            SELECT st.name as sign_name, bs.quantity, st.unit_price, (bs.quantity * st.unit_price) as total
+            FROM building_signs bs
+            JOIN sign_types st ON bs.sign_type_id = st.id
+            WHERE bs.building_id = ?
+            ORDER BY st.name
+        ''', conn, params=(building_id,))
     return df.to_dict('records')
 
+def _upsert_link_quantities(cur, table, parent_col, key_col, parent_id, pairs):
+    """Set quantity for each (key_id, qty) pair under parent_id on a link table in one batch.
+
+    Used for building_signs / building_sign_groups (parent building_id) and
+    sign_group_members (parent group_id); each has a unique (parent, key) index.
+    """
+    params = [(parent_id, key_id, q) for key_id, q in pairs]
+    if not params:
+        return
+    if backend == 'mssql':
+        for p_id, key_id, q in params:
+            cur.execute(f'UPDATE {table} SET quantity=? WHERE {parent_col}=? AND {key_col}=?', (q, p_id, key_id))
+            if cur.rowcount == 0:
+                cur.execute(f'INSERT INTO {table} ({parent_col}, {key_col}, quantity) VALUES (?,?,?)', (p_id, key_id, q))
+        return
+    cur.executemany(f'INSERT INTO {table} ({parent_col}, {key_col}, quantity) VALUES (?,?,?) '
+                    f'ON CONFLICT({parent_col}, {key_col}) DO UPDATE SET quantity=excluded.quantity', params)
+
+def _ids_by_name(cur, table, names):
+    """Map name -> id for the given names with a single IN query."""
+    names = sorted({n for n in names if n})
+    if not names:
+        return {}
+    placeholders = ','.join(['?']*len(names))
+    cur.execute(f'SELECT name, id FROM {table} WHERE name IN ({placeholders})', names)
+    return dict(cur)
+
+@lru_cache(maxsize=1024)
+def _building_name_cached(building_id, _key):
+    # Errors propagate so a transient failure is never cached
+    with get_conn(readonly=True) as conn:
+        row = conn.execute('SELECT name FROM buildings WHERE id=?', (building_id,)).fetchone()
+    return row[0] if row else ''
+
 def _fetch_building_name(building_id):
+    """Building name by id ('' if missing or unreadable)."""
     try:
-        conn = get_connection()
-        df = pd.read_sql_query('SELECT name FROM buildings WHERE id=?', conn, params=(building_id,))
-        conn.close()
-        if df.empty:
-            return ''
-        return df.iloc[0]['name']
-    except Exception:
+        return _keyed_cache_call(_building_name_cached, building_id)
+    except Exception as e:
+        print(f"[building-name][warn] {e}")
         return ''
 
 @app.callback(
@@ -2303,38 +2672,23 @@ def manage_building_signs(building_id, add_clicks, save_clicks, sign_type_id, qt
     if not building_id:
         return [], dash.no_update, dash.no_update
     action_msg = dash.no_update
-    conn = get_connection()
-    cur = conn.cursor()
     if 'add-sign-to-building-btn' in triggered and sign_type_id:
         qty = max(1, int(qty or 1))
-        cur.execute("SELECT id, quantity FROM building_signs WHERE building_id=? AND sign_type_id=?", (building_id, sign_type_id))
-        existing = cur.fetchone()
-        if existing:
-            cur.execute("UPDATE building_signs SET quantity=? WHERE id=?", (qty, existing[0]))
-        else:
-            cur.execute("INSERT INTO building_signs (building_id, sign_type_id, quantity) VALUES (?,?,?)", (building_id, sign_type_id, qty))
+        with writer() as conn:
+            _upsert_link_quantities(conn.cursor(), 'building_signs', 'building_id', 'sign_type_id', building_id, [(sign_type_id, qty)])
         action_msg = "Sign added/updated"
     elif 'save-building-signs-btn' in triggered and current_rows:
-        for row in current_rows:
-            name = row.get('sign_name')
-            q = max(0, int(row.get('quantity') or 0))
-            cur.execute("SELECT id FROM sign_types WHERE name = ?", (name,))
-            st_row = cur.fetchone()
-            if not st_row:
-                continue
-            st_id = st_row[0]
-            cur.execute("SELECT id FROM building_signs WHERE building_id=? AND sign_type_id=?", (building_id, st_id))
-            ex = cur.fetchone()
-            if ex:
-                cur.execute("UPDATE building_signs SET quantity=? WHERE id=?", (q, ex[0]))
-            else:
-                cur.execute("INSERT INTO building_signs (building_id, sign_type_id, quantity) VALUES (?,?,?)", (building_id, st_id, q))
+        st_ids = _sign_type_cache()['by_name']
+        pairs = [(st_ids[row.get('sign_name')], max(0, int(row.get('quantity') or 0)))
+                 for row in current_rows if row.get('sign_name') in st_ids]
+        with writer() as conn:
+            _upsert_link_quantities(conn.cursor(), 'building_signs', 'building_id', 'sign_type_id', building_id, pairs)
         action_msg = "Quantities saved"
     if action_msg is not dash.no_update:
-        conn.commit()
-    conn.close()
+        bump_data_version()
     data = _fetch_building_signs(building_id)
-    tree_fig = safe_tree_figure()
+    # Switching buildings is read-only; only rebuild the tree after a write
+    tree_fig = _tree_update() if action_msg is not dash.no_update else dash.no_update
     return data, action_msg, tree_fig
 
 # -------- Sign Groups within Projects Tab -------- #
@@ -2343,30 +2697,42 @@ def manage_building_signs(building_id, add_clicks, save_clicks, sign_type_id, qt
     Input('assign-project-dropdown','value')
 )
 def load_group_options_for_project(_project_id):
-    conn = get_connection()
-    gdf = pd.read_sql_query('SELECT id, name FROM sign_groups ORDER BY name', conn)
-    conn.close()
-    return ([{'label': r.name, 'value': r.id} for r in gdf.itertuples()]) if not gdf.empty else []
+    return _keyed_cache_call(_group_options_cached, None)
+
+@lru_cache(maxsize=64)
+def _group_options_cached(project_id, _key):
+    """All sign groups (project_id None) or those assigned within a project."""
+    with get_conn() as conn:
+        if project_id is None:
+            groups = conn.execute('SELECT id, name FROM sign_groups ORDER BY name')
+        else:
+            groups = conn.execute('''SELECT DISTINCT sg.id, sg.name FROM sign_groups sg
+                                      JOIN building_sign_groups bsg ON bsg.group_id=sg.id
+                                      JOIN buildings b ON bsg.building_id=b.id
+                                      WHERE b.project_id=? ORDER BY sg.name''', (project_id,))
+        return [{'label': name, 'value': gid} for gid, name in groups]
 
 def _fetch_building_groups(building_id):
-    conn = get_connection()
-    df = pd.read_sql_query('''SELECT sg.name as group_name, bsg.quantity, sg.id as group_id
-                               FROM building_sign_groups bsg
-                               JOIN sign_groups sg ON bsg.group_id = sg.id
-                               WHERE bsg.building_id=? ORDER BY sg.name''', conn, params=(building_id,))
-    conn.close()
+    with get_conn(readonly=True) as conn:
+        df = pd.read_sql_query('''SELECT sg.name as group_name, bsg.quantity, sg.id as group_id
+                                   FROM building_sign_groups bsg
+                                   JOIN sign_groups sg ON bsg.group_id = sg.id
+                                   WHERE bsg.building_id=? ORDER BY sg.name''', conn, params=(building_id,))
     return df.to_dict('records')
 
+@lru_cache(maxsize=256)
+def _assigned_group_options_cached(building_id, _key):
+    with get_conn(readonly=True) as conn:
+        groups = conn.execute('''SELECT sg.id, sg.name FROM sign_groups sg
+                                  JOIN building_sign_groups bsg ON bsg.group_id=sg.id
+                                  WHERE bsg.building_id=? ORDER BY sg.name''', (building_id,))
+        return [{'label': name, 'value': gid} for gid, name in groups]
+
 def _fetch_assigned_group_options(building_id):
     """Return dropdown options for groups already assigned to a building."""
     if not building_id:
         return []
-    conn = get_connection()
-    df = pd.read_sql_query('''SELECT sg.id, sg.name FROM sign_groups sg
-                               JOIN building_sign_groups bsg ON bsg.group_id=sg.id
-                               WHERE bsg.building_id=? ORDER BY sg.name''', conn, params=(building_id,))
-    conn.close()
-    return [{'label': r['name'], 'value': r['id']} for _, r in df.iterrows()]
+    return _keyed_cache_call(_assigned_group_options_cached, building_id)
 
 @app.callback(
     Output('project-building-groups-table','data'),
@@ -2384,35 +2750,24 @@ def manage_building_groups_inline(building_id, add_clicks, save_clicks, group_id
     triggered = [t['prop_id'].split('.')[0] for t in callback_context.triggered] if callback_context.triggered else []
     if not building_id:
         return [], dash.no_update, dash.no_update
-    conn = get_connection()
-    cur = conn.cursor()
     msg = dash.no_update
     if 'add-group-to-building-btn' in triggered and group_id:
         q = max(1, int(qty or 1))
-        cur.execute('SELECT id, quantity FROM building_sign_groups WHERE building_id=? AND group_id=?', (building_id, group_id))
-        ex = cur.fetchone()
-        if ex:
-            cur.execute('UPDATE building_sign_groups SET quantity=? WHERE id=?', (q, ex[0]))
-        else:
-            cur.execute('INSERT INTO building_sign_groups (building_id, group_id, quantity) VALUES (?,?,?)', (building_id, group_id, q))
+        with writer() as conn:
+            _upsert_link_quantities(conn.cursor(), 'building_sign_groups', 'building_id', 'group_id', building_id, [(group_id, q)])
         msg = 'Group added/updated'
     elif 'save-building-groups-btn' in triggered and rows:
-        for r in rows:
-            gname = r.get('group_name')
-            q = max(0, int(r.get('quantity') or 0))
-            cur.execute('SELECT id FROM sign_groups WHERE name=?', (gname,))
-            gr = cur.fetchone()
-            if not gr:
-                continue
-            cur.execute('SELECT id FROM building_sign_groups WHERE building_id=? AND group_id=?', (building_id, gr[0]))
-            ex = cur.fetchone()
-            if ex:
-                cur.execute('UPDATE building_sign_groups SET quantity=? WHERE id=?', (q, ex[0]))
+        with writer() as conn:
+            cur = conn.cursor()
+            g_ids = _ids_by_name(cur, 'sign_groups', [r.get('group_name') for r in rows])
+            pairs = [(g_ids[r.get('group_name')], max(0, int(r.get('quantity') or 0)))
+                     for r in rows if r.get('group_name') in g_ids]
+            _upsert_link_quantities(cur, 'building_sign_groups', 'building_id', 'group_id', building_id, pairs)
         msg = 'Group quantities saved'
-    conn.commit()
+    if msg is not dash.no_update:
+        bump_data_version()
     group_rows = _fetch_building_groups(building_id)
-    conn.close()
-    tree_fig = safe_tree_figure()
+    tree_fig = _tree_update() if msg is not dash.no_update else dash.no_update
     return group_rows, msg, tree_fig
 
 # --- Filter group options (Show All vs project-assigned) & populate deletion dropdown --- #
@@ -2432,21 +2787,11 @@ def refresh_project_group_dropdowns(project_id, building_id, show_all_values, _g
         # Group options
         show_all = bool(show_all_values and 'all' in show_all_values)
         if show_all:
-            conn = get_connection()
-            gdf = pd.read_sql_query('SELECT id, name FROM sign_groups ORDER BY name', conn)
-            conn.close()
-            group_opts = [{'label': r['name'], 'value': r['id']} for _, r in gdf.iterrows()]
+            group_opts = _keyed_cache_call(_group_options_cached, None)
+        elif project_id:
+            group_opts = _keyed_cache_call(_group_options_cached, project_id)
         else:
-            if project_id:
-                conn = get_connection()
-                gdf = pd.read_sql_query('''SELECT DISTINCT sg.id, sg.name FROM sign_groups sg
-                                            JOIN building_sign_groups bsg ON bsg.group_id=sg.id
-                                            JOIN buildings b ON bsg.building_id=b.id
-                                            WHERE b.project_id=? ORDER BY sg.name''', conn, params=(project_id,))
-                conn.close()
-                group_opts = [{'label': r['name'], 'value': r['id']} for _, r in gdf.iterrows()]
-            else:
-                group_opts = []
+            group_opts = []
         return group_opts, assigned_opts
     except Exception as e:
         print(f"[groups][filter][error] {e}")
@@ -2469,23 +2814,20 @@ def remove_group_from_building(n_clicks, building_id, group_id):
     if not building_id or not group_id:
         return dash.no_update, 'Select building and group to remove', dash.no_update, dash.no_update
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute('DELETE FROM building_sign_groups WHERE building_id=? AND group_id=?', (building_id, group_id))
-        conn.commit()
-        df = pd.read_sql_query('''SELECT sg.name as group_name, bsg.quantity, sg.id as group_id
-                                   FROM building_sign_groups bsg
-                                   JOIN sign_groups sg ON bsg.group_id=sg.id
-                                   WHERE bsg.building_id=? ORDER BY sg.name''', conn, params=(building_id,))
-        conn.close()
-        table_rows = df.to_dict('records')
+        with writer() as conn:
+            conn.execute('DELETE FROM building_sign_groups WHERE building_id=? AND group_id=?', (building_id, group_id))
+        bump_data_version()
+        table_rows = _fetch_building_groups(building_id)
         assigned_opts = _fetch_assigned_group_options(building_id)
-        return table_rows, 'Group removed', safe_tree_figure(), assigned_opts
+        return table_rows, 'Group removed', _tree_update(), assigned_opts
     except Exception as e:
         print(f"[groups][remove][error] {e}")
         return dash.no_update, f'Error removing: {e}', dash.no_update, dash.no_update
 
 # --- Global error toast trigger (simple heuristic scanning for keyword) --- #
+_ERROR_TEXT_RE = re.compile(r'error|warning|already exists', re.IGNORECASE)
+_ERROR_ALERT_COLORS = {'danger', 'warning'}
+
 @app.callback(
     Output('app-error-toast','is_open'),
     Output('app-error-toast','children'),
@@ -2497,22 +2839,22 @@ def surface_errors(*feedback_children):
     for child in feedback_children:
         if not child:
             continue
-        # Convert component to string for heuristic search
-        text = ''
-        try:
-            if isinstance(child, (str, int, float)):
-                text = str(child)
-            elif hasattr(child, 'props') and 'children' in child.props:
-                # For dbc.Alert etc.
-                inner = child.props.get('children')
-                text = inner if isinstance(inner, str) else str(inner)
-            else:
-                text = str(child)
-        except Exception:
+        if isinstance(child, (str, int, float)):
             text = str(child)
-        lowered = text.lower()
-        if 'error' in lowered or 'warning' in lowered or 'already exists' in lowered:
-            return True, text
+            if _ERROR_TEXT_RE.search(text):
+                return True, text
+            continue
+        # Components arrive serialized ({'type','props',...}); an Alert's color already
+        # says whether it is an error, so avoid stringifying the whole subtree.
+        props = child.get('props', {}) if isinstance(child, dict) else getattr(child, '__dict__', {})
+        inner = props.get('children', '')
+        color = props.get('color')
+        if color in _ERROR_ALERT_COLORS:
+            return True, inner if isinstance(inner, str) else str(inner)
+        if color is None:
+            text = inner if isinstance(inner, str) else str(inner)
+            if _ERROR_TEXT_RE.search(text):
+                return True, text
     raise PreventUpdate
 
 # ------------------ Runtime status (DB & Code refresh timestamps) ------------------ #
@@ -2644,6 +2986,44 @@ def update_runtime_status(_n):
         return html.Small(f"Status unavailable: {e}", className='text-muted')
 
 # ------------------ Estimate Generation & Export ------------------ #
+# Summary chips from custom-estimate meta: (meta key, label format, badge color).
+# Zero/missing values get no chip.
+_ESTIMATE_META_CHIPS = (
+    ('total_sign_count', "Signs: {:.0f}", 'info'),
+    ('total_area', "Area: {:.1f} sq ft", 'light'),
+    ('auto_install_amount_per_sign', "Auto Inst $/sign sum: ${:.2f}", 'warning'),
+    ('auto_install_hours', "Auto Inst Hours: {:.1f}", 'warning'),
+    ('install_cost', "Install: ${:.2f}", 'danger'),
+)
+_CHIP_TEXT_COLOR = {'light': 'dark'}
+
+# Column order of estimate rows as written to the Excel export.
+_ESTIMATE_COLUMNS = ('Building', 'Item', 'Material', 'Dimensions', 'Quantity', 'Unit_Price', 'Total')
+
+@lru_cache(maxsize=4)
+def _logo_png_bytes(output_width):
+    """assets/LSI_Logo.svg rendered to PNG bytes once per width; None without cairosvg or the file."""
+    logo_path = Path('assets') / 'LSI_Logo.svg'
+    if not logo_path.exists():
+        return None
+    try:
+        import cairosvg  # optional dependency
+        return cairosvg.svg2png(url=str(logo_path), output_width=output_width)
+    except Exception as e:
+        print(f"[logo][warn] svg->png unavailable: {e}")
+        return None
+
+def _project_for_buildings(building_ids):
+    """Project of the selected buildings (selections stay within one project).
+
+    Only the project id is looked up here; the building filter itself goes into the
+    estimate queries (get_project_estimate / compute_custom_estimate).
+    """
+    placeholders = ','.join(['?']*len(building_ids))
+    with get_conn(readonly=True) as conn:
+        row = conn.execute(f'SELECT project_id FROM buildings WHERE id IN ({placeholders}) LIMIT 1', tuple(building_ids)).fetchone()
+    return row[0] if row else None
+
 @app.callback(
     Output('estimate-table', 'data'),
     Output('estimate-summary', 'children'),
@@ -2680,12 +3060,7 @@ def generate_estimate(n_clicks, project_id, building_id, price_mode, install_mod
         return [], dbc.Alert("Select a project or building(s)", color='warning'), True
     # If only buildings chosen, derive project (assume same project; take first)
     if building_ids and not project_id:
-        conn = get_connection()
-        placeholders = ','.join(['?']*len(building_ids))
-        pdf = pd.read_sql_query(f'SELECT DISTINCT project_id FROM buildings WHERE id IN ({placeholders})', conn, params=tuple(building_ids))
-        conn.close()
-        if not pdf.empty:
-            project_id = pdf.iloc[0]['project_id']
+        project_id = _project_for_buildings(building_ids)
     def _coerce(v):
         try: return float(v or 0)
         except: return 0.0
@@ -2699,7 +3074,7 @@ def generate_estimate(n_clicks, project_id, building_id, price_mode, install_mod
     auto_enabled = bool(auto_install_toggle and 1 in auto_install_toggle)
     meta = {}
     if use_default:
-        estimate_data = db_manager.get_project_estimate(project_id) or []
+        estimate_data = db_manager.get_project_estimate(project_id, building_ids or None) or []
     else:
         from utils.estimate_core import compute_custom_estimate
         # Provide building filter directly if user selected building_ids; else None for all
@@ -2715,16 +3090,6 @@ def generate_estimate(n_clicks, project_id, building_id, price_mode, install_mod
             estimate_data = estimate_result
     if not estimate_data:
         return [], dbc.Alert("No data", color='warning'), True
-    # If we used default path and building_ids provided, filter manually
-    if use_default and building_ids:
-        conn = get_connection()
-        placeholders = ','.join(['?']*len(building_ids))
-        ndf = pd.read_sql_query(f'SELECT id, name FROM buildings WHERE id IN ({placeholders})', conn, params=tuple(building_ids))
-        conn.close()
-        selected_names = set(ndf['name'].tolist())
-        estimate_data = [r for r in estimate_data if r['Building'] in selected_names or r['Building']=='ALL']
-    if not estimate_data:
-        return [], dbc.Alert("No data for selection", color='warning'), True
     df = pd.DataFrame(estimate_data)
     # Exterior-only filter: install_type source needed. Join sign_types to determine classification.
     # Harmonize toggles (Dash passes them as lists)
@@ -2737,10 +3102,8 @@ def generate_estimate(n_clicks, project_id, building_id, price_mode, install_mod
     non_exterior_filtered = False
     if ext_only or non_ext_only:
         try:
-            conn = get_connection()
-            it_map_df = pd.read_sql_query('SELECT name, install_type FROM sign_types', conn)
-            conn.close()
-            it_map = {r['name'].lower(): (r['install_type'] or '') for _, r in it_map_df.iterrows()}
+            with get_conn(readonly=True) as conn:
+                it_map = {name.lower(): (install_type or '') for name, install_type in conn.execute('SELECT name, install_type FROM sign_types')}
             def _is_ext(item):
                 base = (str(item).split('Group:')[-1].strip()).lower()
                 return 'ext' in (it_map.get(base, '') or '').lower()
@@ -2753,21 +3116,12 @@ def generate_estimate(n_clicks, project_id, building_id, price_mode, install_mod
         except Exception as _fe:
             print(f"[estimate][ext-only][warn] {_fe}")
     total = df['Total'].sum() if 'Total' in df else 0
-    # Build chips & meta display
-    chips = []
-    chips.append(dbc.Badge(f"Total: ${total:,.2f}", color='primary', className='me-1'))
+    # Build chips & meta display: collect (text, color) pairs, create badges once
+    chip_spec = [(f"Total: ${total:,.2f}", 'primary')]
     if building_ids:
-        chips.append(dbc.Badge(f"Buildings: {len(building_ids)}", color='secondary', className='me-1'))
+        chip_spec.append((f"Buildings: {len(building_ids)}", 'secondary'))
     if not use_default and meta:
-        chips.append(dbc.Badge(f"Signs: {int(meta.get('total_sign_count',0))}", color='info', className='me-1'))
-        if meta.get('total_area'):
-            chips.append(dbc.Badge(f"Area: {meta['total_area']:.1f} sq ft", color='light', text_color='dark', className='me-1'))
-        if meta.get('auto_install_amount_per_sign'):
-            chips.append(dbc.Badge(f"Auto Inst $/sign sum: ${meta['auto_install_amount_per_sign']:.2f}", color='warning', className='me-1'))
-        if meta.get('auto_install_hours'):
-            chips.append(dbc.Badge(f"Auto Inst Hours: {meta['auto_install_hours']:.1f}", color='warning', className='me-1'))
-        if meta.get('install_cost'):
-            chips.append(dbc.Badge(f"Install: ${meta['install_cost']:.2f}", color='danger', className='me-1'))
+        chip_spec.extend((fmt.format(meta[key]), color) for key, fmt, color in _ESTIMATE_META_CHIPS if meta.get(key))
     # Pricing mode note
     note_lines = []
     if price_mode == 'per_area':
@@ -2775,9 +3129,11 @@ def generate_estimate(n_clicks, project_id, building_id, price_mode, install_mod
     if not use_default:
         note_lines.append(f"Install mode: {install_mode}")
     if exterior_filtered:
-        chips.append(dbc.Badge("Filtered: Exterior Only", color='dark', className='me-1'))
+        chip_spec.append(("Filtered: Exterior Only", 'dark'))
     if non_exterior_filtered:
-        chips.append(dbc.Badge("Filtered: Non-Exterior Only", color='dark', className='me-1'))
+        chip_spec.append(("Filtered: Non-Exterior Only", 'dark'))
+    chips = [dbc.Badge(text, color=color, text_color=_CHIP_TEXT_COLOR.get(color), className='me-1')
+             for text, color in chip_spec]
     summary = html.Div([
         html.Div(chips, className='mb-1'),
         html.Small(" | ".join(note_lines)) if note_lines else None
@@ -2797,6 +3153,7 @@ def generate_estimate(n_clicks, project_id, building_id, price_mode, install_mod
     State('install-hours-input','value'),
     State('install-hourly-rate-input','value'),
     State('auto-install-use','value'),
+    State('embed-images-store','data'),
     prevent_initial_call=True
 )
 def export_estimate(n_clicks, project_id, building_id, price_mode, install_mode, inst_percent, inst_per_sign, inst_per_area, inst_hours, inst_hourly, auto_install_toggle, embed_store):
@@ -2812,201 +3169,115 @@ def export_estimate(n_clicks, project_id, building_id, price_mode, install_mode,
         return dash.no_update
     if db_manager is None:
         return dash.no_update
-    # Derive project id from building if needed
+    # If only buildings chosen, derive project (assume same project; take first)
     if building_ids and not project_id:
-        conn = get_connection()
-        placeholders = ','.join(['?']*len(building_ids))
-        pdf = pd.read_sql_query(f'SELECT DISTINCT project_id FROM buildings WHERE id IN ({placeholders})', conn, params=tuple(building_ids))
-        conn.close()
-        if not pdf.empty:
-            project_id = pdf.iloc[0]['project_id']
+        project_id = _project_for_buildings(building_ids)
     try:
-        # Reuse generate_estimate core logic by lightweight inline recompute (duplicated minimal branch for export)
+        # Same two estimate paths as generate_estimate (shared core for the custom modes)
         def _coerce(v):
             try: return float(v or 0)
             except: return 0.0
         inst_percent=_coerce(inst_percent); inst_per_sign=_coerce(inst_per_sign); inst_per_area=_coerce(inst_per_area); inst_hours=_coerce(inst_hours); inst_hourly=_coerce(inst_hourly)
         use_default = (price_mode=='per_sign' and install_mode=='percent')
         if use_default:
-            estimate_data = db_manager.get_project_estimate(project_id) or []
+            estimate_data = db_manager.get_project_estimate(project_id, building_ids or None) or []
         else:
-            estimate_data = []
-            conn = get_connection()
-            proj_df = pd.read_sql_query('SELECT * FROM projects WHERE id=?', conn, params=(project_id,))
-            if proj_df.empty:
-                conn.close(); return dash.no_update
-            project = proj_df.iloc[0]
-            buildings = pd.read_sql_query('SELECT * FROM buildings WHERE project_id=?', conn, params=(project_id,))
-            grand_subtotal=0.0; total_sign_count=0; total_area=0.0; auto_install_amount_per_sign=0.0; auto_install_hours=0.0
-            auto_enabled = bool(auto_install_toggle and 1 in auto_install_toggle)
-            for _, b in buildings.iterrows():
-                b_sub=0.0
-                signs = pd.read_sql_query('''SELECT st.name, st.unit_price, st.material, st.width, st.height, st.price_per_sq_ft, st.per_sign_install_rate, st.install_time_hours, bs.quantity
-                                              FROM building_signs bs JOIN sign_types st ON bs.sign_type_id=st.id WHERE bs.building_id=?''', conn, params=(b['id'],))
-                for _, s in signs.iterrows():
-                    qty = s['quantity'] or 0
-                    total_sign_count += qty
-                    width=_coerce(s['width']); height=_coerce(s['height']); ppsf=_coerce(s['price_per_sq_ft'])
-                    area = width*height if width and height else 0
-                    total_area += area*qty
-                    ps_install=_coerce(s.get('per_sign_install_rate'))
-                    if ps_install>0:
-                        auto_install_amount_per_sign += ps_install * qty
-                    inst_time=_coerce(s.get('install_time_hours'))
-                    if inst_time>0:
-                        auto_install_hours += inst_time * qty
-                    unit_price = compute_unit_price(s.to_dict(), price_mode)
-                    line_total = unit_price*qty
-                    b_sub += line_total
-                    estimate_data.append({'Building':b['name'],'Item':s['name'],'Material':s['material'],'Dimensions':f"{width} x {height}" if width and height else '', 'Quantity':qty,'Unit_Price':unit_price,'Total':line_total})
-                groups = pd.read_sql_query('''SELECT sg.id, sg.name, bsg.quantity FROM building_sign_groups bsg JOIN sign_groups sg ON bsg.group_id=sg.id WHERE bsg.building_id=?''', conn, params=(b['id'],))
-                for _, g in groups.iterrows():
-                    group_members = pd.read_sql_query('''SELECT st.name, st.unit_price, st.width, st.height, st.price_per_sq_ft, st.per_sign_install_rate, st.install_time_hours, st.material_multiplier, sgm.quantity FROM sign_group_members sgm JOIN sign_types st ON sgm.sign_type_id=st.id WHERE sgm.group_id=?''', conn, params=(g['id'],))
-                    group_cost_unit=0.0
-                    for _, m in group_members.iterrows():
-                        m_qty = (m['quantity'] or 0)
-                        width=_coerce(m['width']); height=_coerce(m['height']); ppsf=_coerce(m['price_per_sq_ft'])
-                        area=width*height if width and height else 0
-                        total_sign_count += m_qty * g['quantity']
-                        total_area += area * m_qty * g['quantity']
-                        ps_install=_coerce(m.get('per_sign_install_rate'))
-                        if ps_install>0:
-                            auto_install_amount_per_sign += ps_install * m_qty * g['quantity']
-                        inst_time=_coerce(m.get('install_time_hours'))
-                        if inst_time>0:
-                            auto_install_hours += inst_time * m_qty * g['quantity']
-                        m_unit = compute_unit_price(m.to_dict(), price_mode)
-                        group_cost_unit += m_unit * m_qty
-                    unit_price=group_cost_unit; line_total=unit_price * g['quantity']; b_sub+=line_total
-                    estimate_data.append({'Building':b['name'],'Item':f"Group: {g['name']}",'Material':'Various','Dimensions':'','Quantity':g['quantity'],'Unit_Price':unit_price,'Total':line_total})
-                grand_subtotal+=b_sub
-            install_cost = compute_install_cost(
-                install_mode, grand_subtotal, total_sign_count, total_area,
+            from utils.estimate_core import compute_custom_estimate
+            estimate_data = compute_custom_estimate(
+                DATABASE_PATH, project_id, building_ids or None,
+                price_mode, install_mode,
                 inst_percent, inst_per_sign, inst_per_area, inst_hours, inst_hourly,
-                auto_enabled, auto_install_amount_per_sign, auto_install_hours
+                bool(auto_install_toggle and 1 in auto_install_toggle)
             )
-            if install_mode!='none' and install_cost>0:
-                estimate_data.append({'Building':'ALL','Item':'Installation','Material':'','Dimensions':'','Quantity':1,'Unit_Price':install_cost,'Total':install_cost})
-            if bool(project.get('include_sales_tax')) and project.get('sales_tax_rate'):
-                taxable_total = sum(r['Total'] for r in estimate_data if r['Building']!='ALL' or r['Item']=='Installation')
-                tax_cost = taxable_total * float(project['sales_tax_rate'])
-                estimate_data.append({'Building':'ALL','Item':'Sales Tax','Material':'','Dimensions':'','Quantity':1,'Unit_Price':tax_cost,'Total':tax_cost})
-            conn.close()
         if not estimate_data:
             return dash.no_update
-        # Filter to building if requested
-        if building_ids:
-            conn = get_connection()
-            placeholders = ','.join(['?']*len(building_ids))
-            ndf = pd.read_sql_query(f'SELECT name FROM buildings WHERE id IN ({placeholders})', conn, params=tuple(building_ids))
-            conn.close()
-            selected_names = set(ndf['name'].tolist())
-            estimate_data = [r for r in estimate_data if r['Building'] in selected_names or r['Building']=='ALL']
-            if not estimate_data:
-                return dash.no_update
-        df = pd.DataFrame(estimate_data)
         buffer = io.BytesIO()
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
         from openpyxl.drawing.image import Image as XLImage
-        from tempfile import NamedTemporaryFile
-        logo_path = Path('assets') / 'LSI_Logo.svg'
+        from openpyxl.styles import Alignment, Font
+        # Write-only workbook: rows are streamed in order (branding, header, data, footer)
+        # instead of materialising every cell and shifting rows/columns afterwards.
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Estimate')
+        # Preload image paths map (sign name -> path)
+        image_map = {}
         try:
-            import cairosvg  # optional dependency
-        except Exception:
-            cairosvg = None
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Estimate')
-            wb = writer.book
-            ws = wb['Estimate']
-            # Preload image paths map (sign name -> path)
-            image_map = {}
-            try:
-                conn = get_connection()
-                idf = pd.read_sql_query('SELECT name, image_path FROM sign_types WHERE image_path IS NOT NULL AND image_path<>""', conn)
-                conn.close()
-                for _, ir in idf.iterrows():
-                    ip = ir['image_path']
+            with get_conn(readonly=True) as conn:
+                img_rows = conn.execute("SELECT name, image_path FROM sign_types WHERE image_path IS NOT NULL AND image_path<>''")
+                for s_name, ip in img_rows:
                     if ip and Path(ip).exists():
-                        image_map[ir['name'].lower()] = Path(ip)
-            except Exception as e:
-                print(f"[excel][thumb-preload][warn] {e}")
-            # Insert branding header above table
-            ws.insert_rows(1, amount=4)
-            ws.merge_cells('A1:D3')
-            ws['A1'] = 'Sign Estimation Project Export'
-            # Safely copy font/alignment if row 5 exists
-            try:
-                base_font = ws['A5'].font
-                base_align = ws['A5'].alignment
-            except Exception:
-                base_font = ws['A1'].font
-                base_align = ws['A1'].alignment
-            ws['A1'].font = base_font.copy(bold=True)
-            ws['A1'].alignment = base_align.copy(horizontal='left', vertical='center', wrap_text=True)
-            if cairosvg and logo_path.exists():
-                try:
-                    with NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-                        png_temp = tmp.name
-                    cairosvg.svg2png(url=str(logo_path), write_to=png_temp, output_width=320)
-                    img = XLImage(png_temp)
-                    img.anchor = 'F1'
-                    ws.add_image(img)
-                except Exception:
-                    pass
-            # Optional thumbnail column (insert after A header if images present)
+                        image_map[s_name.lower()] = Path(ip)
+        except Exception as e:
+            print(f"[excel][thumb-preload][warn] {e}")
+        embed_images = True
+        try:
+            embed_images = bool(embed_store and embed_store.get('embed'))
+        except Exception:
             embed_images = True
+        # Optional thumbnail column A ahead of the estimate columns
+        thumbs = bool(image_map and embed_images)
+        if thumbs:
+            ws.column_dimensions['A'].width = 14
+        # Branding header (rows 1-4, title merged over A1:D3); table header lands on row 5
+        title = WriteOnlyCell(ws, value='Sign Estimation Project Export')
+        title.font = Font(bold=True)
+        title.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
+        ws.append([title])
+        for _ in range(3):
+            ws.append([])
+        ws.merged_cells.add('A1:D3')
+        logo_png = _logo_png_bytes(320)
+        if logo_png:
             try:
-                embed_images = bool(embed_store and embed_store.get('embed'))
+                img = XLImage(io.BytesIO(logo_png))
+                img.anchor = 'F1'
+                ws.add_image(img)
             except Exception:
-                embed_images = True
+                pass
+        header_cells = []
+        for col in (('Image',) if thumbs else ()) + _ESTIMATE_COLUMNS:
+            cell = WriteOnlyCell(ws, value=col)
+            cell.font = Font(bold=True)
+            header_cells.append(cell)
+        ws.append(header_cells)
+        header_row = 5
+        get_thumb = None
+        if thumbs:
             try:
-                if image_map and embed_images:
-                    # Add new column for thumbnails at column A shifting existing
-                    ws.insert_cols(1, amount=1)
-                    ws['A5'] = 'Image'
-                    from utils.image_cache import get_or_build_thumbnail
-                    max_row = ws.max_row
-                    # Data starts at row 5 now (header offset + inserted rows) ; find column indexes for Item and Building to compute matching sign name
-                    # Find 'Item' header (shifted one col to right due to insert).
-                    header_row = 5
-                    item_col = None
-                    building_col = None
-                    for cell in ws[header_row]:
-                        if cell.value == 'Item':
-                            item_col = cell.column
-                        if cell.value == 'Building':
-                            building_col = cell.column
-                    if item_col:
-                        for r_idx in range(header_row+1, max_row+1):
-                            cell_item = ws.cell(row=r_idx, column=item_col).value
-                            if not cell_item:
-                                continue
-                            base_item = str(cell_item)
-                            if base_item.startswith('Group:'):
-                                base_item = base_item.replace('Group:','').strip()
-                            key = base_item.lower()
-                            pth = image_map.get(key)
-                            if not pth:
-                                continue
-                            tp = get_or_build_thumbnail(pth, 120, 60)
-                            if tp and Path(tp).exists():
-                                try:
-                                    thumb_img = XLImage(str(tp))
-                                    thumb_img.anchor = f"A{r_idx}"
-                                    ws.add_image(thumb_img)
-                                except Exception:
-                                    pass
-                    ws.column_dimensions['A'].width = 14
+                from utils.image_cache import get_or_build_thumbnail as get_thumb
             except Exception as ee:
                 print(f"[excel][thumb][warn] {ee}")
-            # Footer branding line after table
-            footer_row = ws.max_row + 2
-            ws.merge_cells(start_row=footer_row, start_column=1, end_row=footer_row, end_column=6)
-            ws.cell(row=footer_row, column=1, value='© 2025 LSI Graphics, LLC — Generated by Sign Package Estimator')
+        lead = (None,) if thumbs else ()
+        for r_idx, rec in enumerate(estimate_data, start=header_row + 1):
+            # NaN (float != itself) from DataFrame-built rows is written as an empty cell
+            ws.append(lead + tuple(None if v != v else v for v in map(rec.get, _ESTIMATE_COLUMNS)))
+            item = rec.get('Item')
+            if not (get_thumb and item):
+                continue
+            base_item = str(item)
+            if base_item.startswith('Group:'):
+                base_item = base_item.replace('Group:', '').strip()
+            pth = image_map.get(base_item.lower())
+            if not pth:
+                continue
             try:
-                ws.cell(row=footer_row, column=1).font = base_font.copy(italic=True, size=11)
-            except Exception:
-                pass
-            ws.cell(row=footer_row, column=1).alignment = base_align.copy(horizontal='center')
+                tp = get_thumb(pth, 120, 60)
+                if tp and Path(tp).exists():
+                    thumb_img = XLImage(str(tp))
+                    thumb_img.anchor = f"A{r_idx}"
+                    ws.add_image(thumb_img)
+            except Exception as ee:
+                print(f"[excel][thumb][warn] {ee}")
+        # Footer branding line after table
+        footer_row = header_row + len(estimate_data) + 2
+        ws.append([])
+        footer = WriteOnlyCell(ws, value='© 2025 LSI Graphics, LLC — Generated by Sign Package Estimator')
+        footer.font = Font(italic=True, size=11)
+        footer.alignment = Alignment(horizontal='center')
+        ws.append([footer])
+        ws.merged_cells.add(f'A{footer_row}:F{footer_row}')
+        wb.save(buffer)
         buffer.seek(0)
         suffix = ''
         if building_ids:
@@ -3014,9 +3285,13 @@ def export_estimate(n_clicks, project_id, building_id, price_mode, install_mode,
         return dict(content=base64.b64encode(buffer.read()).decode(), filename=f'project_{project_id}{suffix}_estimate.xlsx', type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     except Exception as e:
         print(f"[export][error] {e}")
+        from openpyxl import Workbook
         err_buf = io.BytesIO()
-        with pd.ExcelWriter(err_buf, engine='openpyxl') as writer:
-            pd.DataFrame([{"Error": str(e)}]).to_excel(writer, index=False, sheet_name='Error')
+        err_wb = Workbook(write_only=True)
+        err_ws = err_wb.create_sheet('Error')
+        err_ws.append(['Error'])
+        err_ws.append([str(e)])
+        err_wb.save(err_buf)
         err_buf.seek(0)
         return dict(content=base64.b64encode(err_buf.read()).decode(), filename=f'project_{project_id}_export_error.xlsx', type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
@@ -3073,8 +3348,7 @@ def export_estimate_pdf(n_clicks, table_data, summary_children, pdf_title, disab
         # Build multi-image lookup: sign_name -> ordered list of image paths (cover first)
         multi_lookup = {}
         try:
-            import sqlite3 as _sqlite
-            conn = _sqlite.connect(DATABASE_PATH)
+            conn = get_connection(readonly=True)
             cur = conn.cursor()
             # For all distinct sign Items in the table (strip any 'Group:' prefix and quantity suffix)
             item_names = set()
@@ -3094,7 +3368,7 @@ def export_estimate_pdf(n_clicks, table_data, summary_children, pdf_title, disab
                     cur.execute('''SELECT sti.image_path FROM sign_type_images sti 
                                    JOIN sign_types st ON st.id=sti.sign_type_id 
                                    WHERE st.name=? ORDER BY sti.display_order ASC, sti.id ASC''', (name,))
-                    rows = [r[0] for r in cur.fetchall() if r and r[0]]
+                    rows = [r[0] for r in cur if r and r[0]]
                     existing = [p for p in rows if os.path.exists(p)]
                     if existing:
                         multi_lookup[name] = existing
@@ -3197,19 +3471,17 @@ def export_tree_png(n_clicks, fig_dict):
         total_h = header_h + base_img.height + footer_h
         out_img = PILImage.new('RGBA', (width, total_h), (255,255,255,255))
         draw = ImageDraw.Draw(out_img)
-        logo_path = Path('assets') / 'LSI_Logo.svg'
         try:
-            import cairosvg, tempfile
-            if logo_path.exists():
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-                    cairosvg.svg2png(url=str(logo_path), write_to=tmp.name, output_width=360)
-                    logo_png = PILImage.open(tmp.name).convert('RGBA')
-                    lh = 95
-                    ratio = lh / logo_png.height
-                    lw = int(logo_png.width * ratio)
-                    logo_png = logo_png.resize((lw, lh))
-                    # Center horizontally
-                    out_img.paste(logo_png, ((width - lw)//2, int((header_h - lh)/2)), logo_png)
+            logo_bytes = _logo_png_bytes(360)
+            if not logo_bytes:
+                raise RuntimeError('logo unavailable')
+            logo_png = PILImage.open(io.BytesIO(logo_bytes)).convert('RGBA')
+            lh = 95
+            ratio = lh / logo_png.height
+            lw = int(logo_png.width * ratio)
+            logo_png = logo_png.resize((lw, lh))
+            # Center horizontally
+            out_img.paste(logo_png, ((width - lw)//2, int((header_h - lh)/2)), logo_png)
         except Exception:
             # Fallback simple text if svg -> png conversion unavailable
             try:
@@ -3284,16 +3556,17 @@ def switch_tree_view(mode, spacing_factor, padding):
     if mode == 'cyto':
         nodes = get_project_tree_data()
         # Preload sign types metadata
-        conn = get_connection()
+        st_map = {}
         try:
-            st_df = pd.read_sql_query('SELECT name, unit_price, width, height, price_per_sq_ft, material_multiplier, material, description, image_path FROM sign_types', conn)
-        except Exception:
-            st_df = pd.DataFrame(columns=['name','unit_price','width','height','price_per_sq_ft','material_multiplier','material','description'])
-        finally:
-            conn.close()
-        st_map = {r['name']: r for _, r in st_df.iterrows()}
+            with get_conn(readonly=True) as conn:
+                cur = conn.execute('SELECT name, id, unit_price, width, height, price_per_sq_ft, material_multiplier, material, description, image_path FROM sign_types')
+                cols = [d[0] for d in cur.description]
+                st_map = {r[0]: dict(zip(cols, r)) for r in cur}
+        except Exception as e:
+            print(f"[cyto][warn] sign type preload failed: {e}")
         elements = []
-        id_map = {n['id']: n for n in nodes}
+        # Only membership is needed for the edge pass
+        id_set = {n['id'] for n in nodes}
         for n in nodes:
             data = {'id': n['id'], 'label': n['label'], 'type': n['type']}
             if n['type'] == 'sign':
@@ -3317,13 +3590,12 @@ def switch_tree_view(mode, spacing_factor, padding):
                         'unit_price': info.get('unit_price') or 0,
                         'price_per_sq_ft': info.get('price_per_sq_ft') or 0,
                         'material_multiplier': info.get('material_multiplier') or 0,
-                        'image_path': info.get('image_path') or ''
+                        # 64x64 WebP thumbnail instead of the original upload
+                        'image_path': thumb_url(info['id'], info.get('image_path')) if info.get('image_path') else ''
                     })
             elements.append({'data': data, 'classes': n['type']})
-        for n in nodes:
-            parent = n.get('parent')
-            if parent and parent in id_map:
-                elements.append({'data': {'source': parent, 'target': n['id']}})
+        elements.extend({'data': {'source': n['parent'], 'target': n['id']}}
+                        for n in nodes if n.get('parent') and n['parent'] in id_set)
         stylesheet = [
             {'selector': 'node','style': {'content':'data(label)','text-wrap':'wrap','text-max-width':120,'text-valign':'center','color':'#fff','font-size':'9px','background-color':'#4a90e2','padding':'4px'}},
             {'selector': '.project','style': {'background-color':'#1f77b4','font-size':'11px','font-weight':'bold'}},
@@ -3360,7 +3632,7 @@ def switch_tree_view(mode, spacing_factor, padding):
 # Initial tree population when app loads / Projects tab first shown
 @app.callback(
     Output('project-tree','figure'),
-    Input('main-tabs','active_tab')
+    Input('debounced-tab','data')
 )
 def init_tree(active_tab):
     if active_tab == 'projects-tab':
@@ -3444,6 +3716,8 @@ def update_cyto_layout(spacing_factor, padding, label_width, node_size, toggle_l
     Output('assign-project-dropdown','options', allow_duplicate=True),
     Output('project-edit-dropdown','options', allow_duplicate=True),
     Output('projects-debug-list','children', allow_duplicate=True),
+    Output('projects-store','data', allow_duplicate=True),
+    Output('dd-refresh-token','data', allow_duplicate=True),
     Input('delete-project-confirm','submit_n_clicks'),
     State('project-edit-dropdown','value'),
     prevent_initial_call=True
@@ -3457,38 +3731,36 @@ def delete_project(confirm_clicks, project_id):
                 dash.no_update,
                 dash.no_update,
                 dash.no_update,
+                dash.no_update,
+                dash.no_update,
                 dash.no_update)
     try:
-        conn = get_connection()
-        cur = conn.cursor()
         print(f"[delete_project] Deleting project id={project_id}")
-        cur.execute('DELETE FROM building_sign_groups WHERE building_id IN (SELECT id FROM buildings WHERE project_id=?)', (project_id,))
-        cur.execute('DELETE FROM building_signs WHERE building_id IN (SELECT id FROM buildings WHERE project_id=?)', (project_id,))
-        cur.execute('DELETE FROM buildings WHERE project_id=?', (project_id,))
-        cur.execute('DELETE FROM projects WHERE id=?', (project_id,))
-        conn.commit()
-        df = pd.read_sql_query('SELECT id, name, created_date FROM projects ORDER BY id DESC', conn)
-        conn.close()
-        if df.empty:
-            list_children = html.Div('No projects yet.')
-            options = []
-        else:
-            rows = [html.Li(f"{r.name} (ID {r.id}) - {r.created_date}") for r in df.itertuples()]
-            list_children = html.Ul(rows, className='mb-0')
-            options = [{'label': r.name, 'value': r.id} for r in df.itertuples()]
-        debug_txt = ' | '.join(f"{r.id}:{r.name}" for r in df.itertuples()) if not df.empty else 'none'
+        with writer() as conn:
+            cur = conn.cursor()
+            cur.execute('DELETE FROM building_sign_groups WHERE building_id IN (SELECT id FROM buildings WHERE project_id=?)', (project_id,))
+            cur.execute('DELETE FROM building_signs WHERE building_id IN (SELECT id FROM buildings WHERE project_id=?)', (project_id,))
+            cur.execute('DELETE FROM buildings WHERE project_id=?', (project_id,))
+            cur.execute('DELETE FROM projects WHERE id=?', (project_id,))
+        bump_data_version()
+        projects = _project_rows()
+        list_children, options, debug_txt = _projects_list_outputs(projects)
         return (list_children,
                 dbc.Alert('Project deleted', color='info'),
-                safe_tree_figure(),
+                _tree_update(),
                 options,
                 options,
-                debug_txt)
+                debug_txt,
+                _projects_store_data(projects),
+                _dd_refresh_token())
     except Exception as e:
         return (dash.no_update,
                 dbc.Alert(f'Error deleting: {e}', color='danger'),
                 dash.no_update,
                 dash.no_update,
                 dash.no_update,
+                dash.no_update,
+                dash.no_update,
                 dash.no_update)
 
 # Show delete confirmation dialog
@@ -3507,6 +3779,16 @@ def show_delete_confirm(n_clicks, project_id):
     return True, dash.no_update
 
 # Dynamic disabling of install parameter inputs + hint text
+# mode -> (percent, per-sign, per-area, hours, hourly-rate disabled flags, hint)
+_INSTALL_MODE_TABLE = {
+    'percent': (False, True, True, True, True, 'Percent: Uses % of subtotal for installation.'),
+    'per_sign': (True, False, True, True, True, 'Per Sign: Uses Install $/Sign * total signs (auto if enabled when blank).'),
+    'per_area': (True, True, False, True, True, 'Per Area: Install $/SqFt * total sign area.'),
+    'hours': (True, True, True, False, False, 'Hours: (Hours or auto sum) * $/Hour.'),
+    'none': (True, True, True, True, True, 'None: No installation cost added.'),
+}
+_INSTALL_MODE_DEFAULT = (True, True, True, True, True, '')
+
 @app.callback(
     Output('install-percent-input','disabled'),
     Output('install-per-sign-rate','disabled'),
@@ -3519,181 +3801,132 @@ def show_delete_confirm(n_clicks, project_id):
 def update_install_inputs(mode):
     if not mode:
         raise PreventUpdate
-    percent_dis = mode != 'percent'
-    per_sign_dis = mode != 'per_sign'
-    per_area_dis = mode != 'per_area'
-    hours_hours_dis = mode != 'hours'
-    hours_rate_dis = mode != 'hours'
-    hints = {
-        'percent': 'Percent: Uses % of subtotal for installation.',
-        'per_sign': 'Per Sign: Uses Install $/Sign * total signs (auto if enabled when blank).',
-        'per_area': 'Per Area: Install $/SqFt * total sign area.',
-        'hours': 'Hours: (Hours or auto sum) * $/Hour.',
-        'none': 'None: No installation cost added.'
-    }
-    return percent_dis, per_sign_dis, per_area_dis, hours_hours_dis, hours_rate_dis, hints.get(mode,'')
+    return _INSTALL_MODE_TABLE.get(mode, _INSTALL_MODE_DEFAULT)
 
 # ------------------ Sign Types Table CRUD ------------------ #
+_SIGN_TYPE_COLS = ('name, description, material_alt, unit_price, material, price_per_sq_ft, width, height, '
+                   'material_multiplier, install_type, install_time_hours, per_sign_install_rate, image_path')
+_SIGN_TYPE_UPSERT_SQL = (
+    f'INSERT INTO sign_types ({_SIGN_TYPE_COLS}) '
+    'VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?) '
+    'ON CONFLICT(name) DO UPDATE SET description=excluded.description, material_alt=excluded.material_alt, unit_price=excluded.unit_price, '
+    'material=excluded.material, price_per_sq_ft=excluded.price_per_sq_ft, width=excluded.width, height=excluded.height, '
+    'material_multiplier=excluded.material_multiplier, install_type=excluded.install_type, install_time_hours=excluded.install_time_hours, '
+    'per_sign_install_rate=excluded.per_sign_install_rate, image_path=COALESCE(excluded.image_path, image_path)'
+)
+
+def _sign_type_params(rows):
+    """Valid named sign-table rows, their bind tuples (column order of _SIGN_TYPE_COLS) and skipped row labels.
+
+    Rows with a non-text name or text field are skipped up front, so one bad row cannot abort the batched save.
+    """
+    def n(v):
+        try:
+            return float(v or 0)
+        except Exception:
+            return 0.0
+    named, params, skipped = [], [], []
+    for row in rows:
+        name = row.get('name')
+        if name is None or name == '':
+            continue
+        text = [row.get(c) for c in ('description', 'material_alt', 'material', 'install_type', 'image_path')]
+        if not isinstance(name, str) or any(v is not None and not isinstance(v, str) for v in text):
+            skipped.append(str(name))
+            continue
+        if not name.strip():
+            continue
+        named.append(row)
+        params.append((
+            name.strip(),
+            (row.get('description') or '')[:255],
+            (row.get('material_alt') or '')[:120],
+            n(row.get('unit_price')),
+            (row.get('material') or '')[:120],
+            n(row.get('price_per_sq_ft')),
+            n(row.get('width')),
+            n(row.get('height')),
+            n(row.get('material_multiplier')),
+            (row.get('install_type') or '')[:60],
+            n(row.get('install_time_hours')),
+            n(row.get('per_sign_install_rate')),
+            row.get('image_path')
+        ))
+    return named, params, skipped
+
+def _sign_save_alert(saved, skipped):
+    if skipped:
+        return dbc.Alert(f"Saved {saved} sign types; skipped {len(skipped)} invalid row(s): {', '.join(skipped)}", color='warning')
+    return dbc.Alert(f'Saved {saved} sign types', color='success')
+
 @app.callback(
     Output('signs-table', 'data', allow_duplicate=True),
     Output('signs-save-status', 'children'),
-    Output('signs-table-master-store','data', allow_duplicate=True),
-    Input('main-tabs', 'active_tab'),
     Input('signs-table', 'data_timestamp'),
     Input('add-sign-btn', 'n_clicks'),
+    State('debounced-tab', 'data'),
     State('signs-table', 'data'),
-    prevent_initial_call='initial_duplicate'
+    prevent_initial_call=True
 )
-def manage_sign_types(active_tab, data_ts, add_clicks, data_rows):
+def manage_sign_types(data_ts, add_clicks, active_tab, data_rows):
+    """Add blank rows and persist edits; rows only ever hold the current page (see page_signs_table)."""
     triggered = [t['prop_id'].split('.')[0] for t in callback_context.triggered] if callback_context.triggered else []
 
-    # 1) Initial load: populate table when Signs tab becomes active
-    if 'main-tabs' in triggered and active_tab == 'signs-tab':
-        try:
-            conn = get_connection()
-            df = pd.read_sql_query(
-                "SELECT name, description, material_alt, unit_price, material, price_per_sq_ft, material_multiplier, width, height, install_type, install_time_hours, per_sign_install_rate, image_path FROM sign_types ORDER BY name",
-                conn
-            )
-            conn.close()
-        except Exception:
-            df = pd.DataFrame(columns=['name','description','material_alt','unit_price','material','price_per_sq_ft','material_multiplier','width','height','install_type','install_time_hours','per_sign_install_rate','image_path'])
-        records = df.to_dict('records')
-        return records, '', records
-
-    # 2) Add new blank row
+    # 1) Add new blank row
     if 'add-sign-btn' in triggered and active_tab == 'signs-tab':
         rows = list(data_rows or [])
         rows.append({
             'name':'','description':'','material_alt':'','unit_price':0,'material':'','price_per_sq_ft':0,
             'material_multiplier':0,'width':0,'height':0,'install_type':'','install_time_hours':0,'per_sign_install_rate':0,'image_path':None
         })
-        return rows, 'New row added', rows
+        return rows, 'New row added'
 
-    # 3) Persist edits
+    # 2) Persist edits
     if 'signs-table' in triggered and active_tab == 'signs-tab':
         rows = list(data_rows or [])
         if not rows:
-            return [], '', []
+            return [], ''
         try:
-            conn = get_connection(); cur = conn.cursor()
-            saved = 0
-            cleaned = []
-            def n(v):
-                try:
-                    return float(v or 0)
-                except Exception:
-                    return 0.0
-            if backend == 'sqlite':
-                sql = (
-                    'INSERT INTO sign_types (name, description, material_alt, unit_price, material, price_per_sq_ft, width, height, '
-                    'material_multiplier, install_type, install_time_hours, per_sign_install_rate, image_path) '
-                    'VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?) '
-                    'ON CONFLICT(name) DO UPDATE SET description=excluded.description, material_alt=excluded.material_alt, unit_price=excluded.unit_price, '
-                    'material=excluded.material, price_per_sq_ft=excluded.price_per_sq_ft, width=excluded.width, height=excluded.height, '
-                    'material_multiplier=excluded.material_multiplier, install_type=excluded.install_type, install_time_hours=excluded.install_time_hours, '
-                    'per_sign_install_rate=excluded.per_sign_install_rate, image_path=COALESCE(excluded.image_path, image_path)'
-                )
-                for row in rows:
-                    name = (row.get('name') or '').strip()
-                    if not name:
-                        continue
-                    cur.execute(sql, (
-                        name,
-                        (row.get('description') or '')[:255],
-                        (row.get('material_alt') or '')[:120],
-                        n(row.get('unit_price')),
-                        (row.get('material') or '')[:120],
-                        n(row.get('price_per_sq_ft')),
-                        n(row.get('width')),
-                        n(row.get('height')),
-                        n(row.get('material_multiplier')),
-                        (row.get('install_type') or '')[:60],
-                        n(row.get('install_time_hours')),
-                        n(row.get('per_sign_install_rate')),
-                        row.get('image_path')
-                    ))
-                    saved += 1
-                    cleaned.append(row)
-            else:
-                # MSSQL path: UPDATE first; if nothing updated, INSERT
-                for row in rows:
-                    name = (row.get('name') or '').strip()
-                    if not name:
-                        continue
-                    desc = (row.get('description') or '')[:255]
-                    mat_alt = (row.get('material_alt') or '')[:120]
-                    unit = n(row.get('unit_price'))
-                    mat = (row.get('material') or '')[:120]
-                    ppsf = n(row.get('price_per_sq_ft'))
-                    w = n(row.get('width'))
-                    h = n(row.get('height'))
-                    mult = n(row.get('material_multiplier'))
-                    inst_type = (row.get('install_type') or '')[:60]
-                    inst_hours = n(row.get('install_time_hours'))
-                    per_sign = n(row.get('per_sign_install_rate'))
-                    img = row.get('image_path')
-                    cur.execute(
-                        'UPDATE sign_types SET description=?, material_alt=?, unit_price=?, material=?, price_per_sq_ft=?, width=?, height=?, '
-                        'material_multiplier=?, install_type=?, install_time_hours=?, per_sign_install_rate=?, image_path=? WHERE name=?',
-                        (desc, mat_alt, unit, mat, ppsf, w, h, mult, inst_type, inst_hours, per_sign, img, name)
-                    )
-                    if getattr(cur, 'rowcount', 0) == 0:
+            cleaned, params, skipped = _sign_type_params(rows)
+            with writer() as conn:
+                cur = conn.cursor()
+                if backend == 'sqlite':
+                    cur.executemany(_SIGN_TYPE_UPSERT_SQL, params)
+                else:
+                    # MSSQL path: UPDATE first; if nothing updated, INSERT
+                    for p in params:
                         cur.execute(
-                            'INSERT INTO sign_types (name, description, material_alt, unit_price, material, price_per_sq_ft, width, height, material_multiplier, install_type, install_time_hours, per_sign_install_rate, image_path) '
-                            'VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)',
-                            (name, desc, mat_alt, unit, mat, ppsf, w, h, mult, inst_type, inst_hours, per_sign, img)
+                            'UPDATE sign_types SET description=?, material_alt=?, unit_price=?, material=?, price_per_sq_ft=?, width=?, height=?, '
+                            'material_multiplier=?, install_type=?, install_time_hours=?, per_sign_install_rate=?, image_path=? WHERE name=?',
+                            p[1:] + p[:1]
                         )
-                    saved += 1
-                    cleaned.append(row)
-            conn.commit(); conn.close()
-            return cleaned, dbc.Alert(f'Saved {saved} sign types', color='success'), cleaned
+                        if getattr(cur, 'rowcount', 0) == 0:
+                            cur.execute(f'INSERT INTO sign_types ({_SIGN_TYPE_COLS}) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)', p)
+            bump_data_version()
+            return cleaned, _sign_save_alert(len(params), skipped)
         except Exception as e:
-            return rows, dbc.Alert(f'Error saving sign types: {e}', color='danger'), rows
+            return rows, dbc.Alert(f'Error saving sign types: {e}', color='danger')
 
     # No relevant trigger -> no update
     raise PreventUpdate
 
-# Dynamic page size control for sign types table
+# Dynamic page size control for sign types table (install type filter is applied in page_signs_table)
 @app.callback(
     Output('signs-table','page_size'),
+    Output('signs-table','page_current'),
     Input('signs-page-size-dropdown','value'),
-    State('signs-table','data'),
     prevent_initial_call=True
 )
-def update_signs_page_size(size, rows):
+def update_signs_page_size(size):
     if size is None:
         raise PreventUpdate
-    if size == -1:
-        # All rows
-        return len(rows) if rows else 10000
-    return size
-
-# Filter sign types by install type (ext vs non-ext)
-@app.callback(
-    Output('signs-table','data', allow_duplicate=True),
-    Input('signs-install-filter','value'),
-    Input('signs-table-master-store','data'),
-    prevent_initial_call='initial_duplicate'
-)
-def filter_signs_by_install(filter_value, master_rows):
-    if filter_value is None or filter_value == 'all':
-        return master_rows
-    try:
-        if filter_value == 'ext':
-            return [r for r in master_rows if (r.get('install_type') or '').strip().lower() == 'ext']
-        elif filter_value == 'non_ext':
-            return [r for r in master_rows if (r.get('install_type') or '').strip().lower() != 'ext']
-        return master_rows
-    except Exception as e:
-        print(f"[filter_signs_by_install][error] {e}")
-        return master_rows
+    return size, 0
 
 ## Legacy single-image upload callback removed in favor of multi-image system above.
 
 # Serve uploaded sign images (simple static route)
 try:
-    from flask import send_file, abort
+    from flask import send_file, abort, request
     @app.server.route('/sign-images/<path:filename>')
     def serve_sign_image(filename):
         base_dir = Path('sign_images')
@@ -3710,16 +3943,21 @@ try:
             'jpg':'image/jpeg',
             'jpeg':'image/jpeg',
             'gif':'image/gif',
+            'webp':'image/webp',
             'svg':'image/svg+xml'
         }.get(ext, 'application/octet-stream')
-        return send_file(str(target), mimetype=mime)
+        resp = send_file(str(target), mimetype=mime)
+        # Node thumbnails are versioned by ?v=<mtime>, so they can be cached hard
+        if request.args.get('v'):
+            resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return resp
 except Exception as e:
     print(f"[sign-image][route][warn] Could not register image route: {e}")
 
 # Tiny debug stats updater (tab focused or after save/import) 
 @app.callback(
     Output('debug-signs-stats','children'),
-    Input('main-tabs','active_tab'),
+    Input('debounced-tab','data'),
     Input('signs-save-status','children'),
     Input('material-pricing-feedback','children'),
     prevent_initial_call=True
@@ -3728,24 +3966,21 @@ def update_debug_stats(active_tab, sign_save_msg, material_msg):
     if active_tab != 'signs-tab':
         raise PreventUpdate
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute('SELECT COUNT(*) FROM sign_types')
-        sign_count = cur.fetchone()[0]
-        cur.execute('SELECT COUNT(*) FROM material_pricing')
-        mat_count = cur.fetchone()[0]
-        # Backend-specific top/limit syntax
-        if backend == 'mssql':
-            cur.execute("SELECT TOP 3 name FROM sign_types ORDER BY last_modified DESC")
-            recent_signs = [r[0] for r in cur.fetchall()]
-            cur.execute("SELECT TOP 3 material_name FROM material_pricing ORDER BY last_updated DESC")
-            recent_mats = [r[0] for r in cur.fetchall()]
-        else:
-            cur.execute("SELECT name FROM sign_types ORDER BY last_modified DESC LIMIT 3")
-            recent_signs = [r[0] for r in cur.fetchall()]
-            cur.execute("SELECT material_name FROM material_pricing ORDER BY last_updated DESC LIMIT 3")
-            recent_mats = [r[0] for r in cur.fetchall()]
-        conn.close()
+        with get_conn(readonly=True) as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT (SELECT COUNT(*) FROM sign_types), (SELECT COUNT(*) FROM material_pricing)')
+            sign_count, mat_count = cur.fetchone()
+            # Backend-specific top/limit syntax
+            if backend == 'mssql':
+                cur.execute("SELECT TOP 3 name FROM sign_types ORDER BY last_modified DESC")
+                recent_signs = [r[0] for r in cur]
+                cur.execute("SELECT TOP 3 material_name FROM material_pricing ORDER BY last_updated DESC")
+                recent_mats = [r[0] for r in cur]
+            else:
+                cur.execute("SELECT name FROM sign_types ORDER BY last_modified DESC LIMIT 3")
+                recent_signs = [r[0] for r in cur]
+                cur.execute("SELECT material_name FROM material_pricing ORDER BY last_updated DESC LIMIT 3")
+                recent_mats = [r[0] for r in cur]
         return f"sign_types: {sign_count} (recent: {', '.join(recent_signs) if recent_signs else 'n/a'}) | materials: {mat_count} (recent: {', '.join(recent_mats) if recent_mats else 'n/a'})"
     except Exception as e:
         return f"debug error: {e}"
@@ -3837,15 +4072,13 @@ def static_tree_hover(hoverData):
         raise PreventUpdate
     # Fetch sign details including image
     try:
-        conn = get_connection()
-        sdf = pd.read_sql_query('SELECT name, description, material, width, height, unit_price, price_per_sq_ft, material_multiplier, image_path FROM sign_types WHERE LOWER(name)=LOWER(?)', conn, params=(base,))
-        conn.close()
+        with get_conn(readonly=True) as conn:
+            r = _fetchone_dict(conn, 'SELECT name, description, material, width, height, unit_price, price_per_sq_ft, material_multiplier, image_path FROM sign_types WHERE LOWER(name)=LOWER(?)', (base,))
     except Exception as e:
         print(f"[static-hover][error] {e}")
         raise PreventUpdate
-    if sdf.empty:
+    if r is None:
         raise PreventUpdate
-    r = sdf.iloc[0]
     def fmt(num):
         try:
             return f"{float(num):,.2f}"
@@ -3880,114 +4113,102 @@ def static_tree_hover(hoverData):
     return body, style
 
 # ------------------ Material Pricing CRUD & Recalc ------------------ #
+def _material_params(rows):
+    """(material_name, price_per_sq_ft) tuples for valid table rows, plus labels of skipped rows."""
+    params, skipped = [], []
+    for row in rows:
+        name, price = row.get('material_name'), row.get('price_per_sq_ft')
+        if name is None or name == '':
+            continue
+        try:
+            if not isinstance(name, str) or not name.strip():
+                raise ValueError(name)
+            price = float(price or 0)
+            if price < 0:
+                raise ValueError(price)
+        except (TypeError, ValueError):
+            skipped.append(str(name))
+            continue
+        params.append((name.strip()[:120], price))
+    return params, skipped
+
 @app.callback(
     Output('material-pricing-table','data'),
     Output('material-pricing-feedback','children'),
-    Input('main-tabs','active_tab'),
     Input('add-material-btn','n_clicks'),
     Input('save-materials-btn','n_clicks'),
     Input('recalc-sign-prices-btn','n_clicks'),
     State('material-pricing-table','data'),
     prevent_initial_call=True
 )
-def manage_material_pricing(active_tab, add_clicks, save_clicks, recalc_clicks, rows):
-    triggered = [t['prop_id'].split('.')[0] for t in callback_context.triggered] if callback_context.triggered else []
-
-    # 1. Tab switched to Sign Types: load fresh data
-    if 'main-tabs' in triggered and active_tab == 'signs-tab':
+def manage_material_pricing(add_clicks, save_clicks, recalc_clicks, rows):
+    """Add, save and recalc for the material pricing table (initial load is hydrate_signs_tab)."""
+    triggered = callback_context.triggered_id
+
+    # 1. Add new blank row
+    if triggered == 'add-material-btn':
+        return list(rows or []) + [{'material_name': '', 'price_per_sq_ft': 0}], ''
+
+    # 2. Persist the table: upsert edited rows, delete rows removed from it
+    if triggered == 'save-materials-btn':
+        params, skipped = _material_params(rows or [])
+        keep = {p[0] for p in params} | set(skipped)
         try:
-            conn = get_connection()
-            df = pd.read_sql_query(
-                "SELECT name, description, material_alt, unit_price, material, price_per_sq_ft, material_multiplier, width, height, install_type, install_time_hours, per_sign_install_rate, image_path FROM sign_types ORDER BY name",
-                conn
-            )
-            conn.close()
-        except Exception:
-            df = pd.DataFrame(columns=['name','description','material_alt','unit_price','material','price_per_sq_ft','material_multiplier','width','height','install_type','install_time_hours','per_sign_install_rate','image_path'])
-        records = df.to_dict('records')
-        return records, '', records
-
-    # 2. Add new blank row
-    if 'add-sign-btn' in triggered and active_tab == 'signs-tab':
-        rows = rows or []
-        rows.append({
-            'name':'','description':'','material_alt':'','unit_price':0,'material':'','price_per_sq_ft':0,
-            'material_multiplier':0,'width':0,'height':0,'install_type':'','install_time_hours':0,'per_sign_install_rate':0,'image_path':None
-        })
-        return rows, 'New row added', rows
-
-    # 3. User edited table -> persist changes
-    if 'signs-table' in triggered and active_tab == 'signs-tab':
-        rows = rows or []
-        if not rows:
-            return [], '', []
+            with writer() as conn:
+                cur = conn.cursor()
+                if backend == 'sqlite':
+                    cur.executemany('INSERT INTO material_pricing (material_name, price_per_sq_ft) VALUES (?,?) '
+                                    'ON CONFLICT(material_name) DO UPDATE SET price_per_sq_ft=excluded.price_per_sq_ft, '
+                                    'last_updated=CURRENT_TIMESTAMP', params)
+                else:
+                    for name, price in params:
+                        cur.execute('UPDATE material_pricing SET price_per_sq_ft=?, last_updated=CURRENT_TIMESTAMP WHERE material_name=?', (price, name))
+                        if getattr(cur, 'rowcount', 0) == 0:
+                            cur.execute('INSERT INTO material_pricing (material_name, price_per_sq_ft) VALUES (?,?)', (name, price))
+                existing = [n for (n,) in cur.execute('SELECT material_name FROM material_pricing')]
+                removed = [(n,) for n in existing if n not in keep]
+                if removed:
+                    cur.executemany('DELETE FROM material_pricing WHERE material_name=?', removed)
+            bump_data_version()
+            with get_conn(readonly=True) as conn:
+                materials = [{'material_name': m, 'price_per_sq_ft': p} for m, p in conn.execute(_MATERIALS_SQL)]
+        except Exception as e:
+            return rows, dbc.Alert(f'Error saving materials: {e}', color='danger')
+        msg = f'Saved {len(params)} materials' + (f', removed {len(removed)}' if removed else '')
+        if skipped:
+            return materials, dbc.Alert(f"{msg}; skipped {len(skipped)} invalid row(s): {', '.join(skipped)}", color='warning')
+        return materials, dbc.Alert(msg, color='success')
+
+    # 3. Reprice sign types from the saved material rates
+    if triggered == 'recalc-sign-prices-btn':
         try:
-            conn = get_connection(); cur = conn.cursor()
-            saved = 0
-            cleaned = []
-            def n(v):
-                try: return float(v or 0)
-                except Exception: return 0.0
-            sql = (
-                'INSERT INTO sign_types (name, description, material_alt, unit_price, material, price_per_sq_ft, width, height, '
-                'material_multiplier, install_type, install_time_hours, per_sign_install_rate, image_path) '
-                'VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?) '
-                'ON CONFLICT(name) DO UPDATE SET description=excluded.description, material_alt=excluded.material_alt, unit_price=excluded.unit_price, '
-                'material=excluded.material, price_per_sq_ft=excluded.price_per_sq_ft, width=excluded.width, height=excluded.height, '
-                'material_multiplier=excluded.material_multiplier, install_type=excluded.install_type, install_time_hours=excluded.install_time_hours, '
-                'per_sign_install_rate=excluded.per_sign_install_rate, image_path=COALESCE(excluded.image_path, image_path)'
-            )
-            for row in rows:
-                name = (row.get('name') or '').strip()
-                if not name:
-                    continue
-                try:
-                    cur.execute(sql, (
-                        name,
-                        (row.get('description') or '')[:255],
-                        (row.get('material_alt') or '')[:120],
-                        n(row.get('unit_price')),
-                        (row.get('material') or '')[:120],
-                        n(row.get('price_per_sq_ft')),
-                        n(row.get('width')),
-                        n(row.get('height')),
-                        n(row.get('material_multiplier')),
-                        (row.get('install_type') or '')[:60],
-                        n(row.get('install_time_hours')),
-                        n(row.get('per_sign_install_rate')),
-                        row.get('image_path')
-                    ))
-                    saved += 1
-                    cleaned.append(row)
-                except Exception:
-                    continue
-            conn.commit(); conn.close()
-            return cleaned, dbc.Alert(f'Saved {saved} sign types', color='success'), cleaned
+            updated = db_manager.recalc_prices_from_materials()
         except Exception as e:
-            return rows, dbc.Alert(f'Error saving sign types: {e}', color='danger'), rows
+            return dash.no_update, dbc.Alert(f'Recalculation failed: {e}', color='danger')
+        bump_data_version()
+        return dash.no_update, dbc.Alert(f'Recalculated prices for {updated} sign types', color='success')
 
     # No relevant trigger -> no update
     raise PreventUpdate
+
 def save_group(n_clicks, name, desc):
     if not n_clicks:
         raise PreventUpdate
     name = (name or '').strip()
     if not name:
         return dbc.Alert('Name required', color='danger'), dash.no_update, dash.no_update
-    conn = get_connection()
-    cur = conn.cursor()
     try:
-        cur.execute('''
-            INSERT INTO sign_groups (name, description) VALUES (?,?)
-            ON CONFLICT(name) DO UPDATE SET description=excluded.description
-        ''', (name, (desc or '')[:255]))
-        conn.commit()
-        groups_df = pd.read_sql_query('SELECT id, name FROM sign_groups ORDER BY name', conn)
-        conn.close()
-        options = [{'label': r.name, 'value': r.id} for r in groups_df.itertuples()]
+        with writer() as conn:
+            conn.execute('''
+                INSERT INTO sign_groups (name, description) VALUES (?,?)
+                ON CONFLICT(name) DO UPDATE SET description=excluded.description
+            ''', (name, (desc or '')[:255]))
+        bump_data_version()
+        with get_conn(readonly=True) as conn:
+            options = [{'label': g_name, 'value': gid}
+                       for gid, g_name in conn.execute('SELECT id, name FROM sign_groups ORDER BY name')]
         return dbc.Alert(f"Group '{name}' saved", color='success'), options, options
     except Exception as e:
-        conn.close()
         return dbc.Alert(f'Error: {e}', color='danger'), dash.no_update, dash.no_update
 
 @app.callback(
@@ -4005,50 +4226,37 @@ def manage_group_members(group_id, add_clicks, save_clicks, sign_type_id, qty, r
     triggered = [t['prop_id'].split('.')[0] for t in callback_context.triggered] if callback_context.triggered else []
     if not group_id:
         raise PreventUpdate
-    conn = get_connection()
-    cur = conn.cursor()
     feedback = dash.no_update
     if 'group-add-sign-btn' in triggered and sign_type_id:
-        cur.execute('SELECT id FROM sign_group_members WHERE group_id=? AND sign_type_id=?', (group_id, sign_type_id))
-        ex = cur.fetchone()
         q = max(1, int(qty or 1))
-        if ex:
-            cur.execute('UPDATE sign_group_members SET quantity=? WHERE id=?', (q, ex[0]))
-        else:
-            cur.execute('INSERT INTO sign_group_members (group_id, sign_type_id, quantity) VALUES (?,?,?)', (group_id, sign_type_id, q))
-        conn.commit()
+        with writer() as conn:
+            _upsert_link_quantities(conn.cursor(), 'sign_group_members', 'group_id', 'sign_type_id', group_id, [(sign_type_id, q)])
+        bump_data_version()
         feedback = 'Member added/updated'
     elif 'group-save-members-btn' in triggered and rows:
-        for r in rows:
-            name = r.get('sign_name')
-            q = max(0, int(r.get('quantity') or 0))
-            cur.execute('SELECT id FROM sign_types WHERE name=?', (name,))
-            st = cur.fetchone()
-            if not st:
-                continue
-            cur.execute('SELECT id FROM sign_group_members WHERE group_id=? AND sign_type_id=?', (group_id, st[0]))
-            ex = cur.fetchone()
-            if ex:
-                cur.execute('UPDATE sign_group_members SET quantity=? WHERE id=?', (q, ex[0]))
-        conn.commit()
+        with writer() as conn:
+            cur = conn.cursor()
+            st_ids = _ids_by_name(cur, 'sign_types', [r.get('sign_name') for r in rows])
+            pairs = [(st_ids[r.get('sign_name')], max(0, int(r.get('quantity') or 0)))
+                     for r in rows if r.get('sign_name') in st_ids]
+            _upsert_link_quantities(cur, 'sign_group_members', 'group_id', 'sign_type_id', group_id, pairs)
+        bump_data_version()
         feedback = 'Member quantities saved'
     # Load
-    df = pd.read_sql_query('''SELECT st.name as sign_name, sgm.quantity FROM sign_group_members sgm JOIN sign_types st ON sgm.sign_type_id=st.id WHERE sgm.group_id=? ORDER BY st.name''', conn, params=(group_id,))
-    conn.close()
+    with get_conn(readonly=True) as conn:
+        df = pd.read_sql_query('''SELECT st.name as sign_name, sgm.quantity FROM sign_group_members sgm JOIN sign_types st ON sgm.sign_type_id=st.id WHERE sgm.group_id=? ORDER BY st.name''', conn, params=(group_id,))
     return df.to_dict('records'), feedback
 
 # ------------------ Assign Groups to Buildings ------------------ #
 @app.callback(
     Output('group-assign-project-dropdown','options'),
-    Input('main-tabs','active_tab')
+    Input('debounced-tab','data')
 )
 def populate_group_project_options(active_tab):
     if active_tab != 'groups-tab':
         raise PreventUpdate
-    conn = get_connection()
-    df = pd.read_sql_query('SELECT id, name FROM projects ORDER BY name', conn)
-    conn.close()
-    return [{'label': r.name, 'value': r.id} for r in df.itertuples()]
+    with get_conn(readonly=True) as conn:
+        return [{'label': name, 'value': pid} for pid, name in conn.execute('SELECT id, name FROM projects ORDER BY name')]
 
 @app.callback(
     Output('group-assign-building-dropdown','options'),
@@ -4058,10 +4266,8 @@ def populate_group_project_options(active_tab):
 def populate_group_buildings(project_id):
     if not project_id:
         return [], None
-    conn = get_connection()
-    df = pd.read_sql_query('SELECT id, name FROM buildings WHERE project_id=? ORDER BY name', conn, params=(project_id,))
-    conn.close()
-    opts = [{'label': r.name,'value': r.id} for r in df.itertuples()]
+    with get_conn(readonly=True) as conn:
+        opts = [{'label': name, 'value': bid} for bid, name in conn.execute(_PROJECT_BUILDINGS_SQL, (project_id,))]
     return opts, (opts[0]['value'] if opts else None)
 
 @app.callback(
@@ -4079,36 +4285,64 @@ def manage_building_groups(building_id, add_clicks, save_clicks, group_id, qty,
     triggered = [t['prop_id'].split('.')[0] for t in callback_context.triggered] if callback_context.triggered else []
     if not building_id:
         raise PreventUpdate
-    conn = get_connection()
-    cur = conn.cursor()
     feedback = dash.no_update
     if 'group-assign-btn' in triggered and group_id:
-        cur.execute('SELECT id FROM building_sign_groups WHERE building_id=? AND group_id=?', (building_id, group_id))
-        ex = cur.fetchone()
         q = max(1, int(qty or 1))
-        if ex:
-            cur.execute('UPDATE building_sign_groups SET quantity=? WHERE id=?', (q, ex[0]))
-        else:
-            cur.execute('INSERT INTO building_sign_groups (building_id, group_id, quantity) VALUES (?,?,?)', (building_id, group_id, q))
-        conn.commit()
+        with writer() as conn:
+            _upsert_link_quantities(conn.cursor(), 'building_sign_groups', 'building_id', 'group_id', building_id, [(group_id, q)])
+        bump_data_version()
         feedback = 'Group assigned'
     elif 'building-save-group-qty-btn' in triggered and rows:
-        for r in rows:
-            name = r.get('group_name')
-            q = max(0, int(r.get('quantity') or 0))
-            cur.execute('SELECT id FROM sign_groups WHERE name=?', (name,))
-            gr = cur.fetchone()
-            if not gr: continue
-            cur.execute('SELECT id FROM building_sign_groups WHERE building_id=? AND group_id=?', (building_id, gr[0]))
-            ex = cur.fetchone()
-            if ex:
-                cur.execute('UPDATE building_sign_groups SET quantity=? WHERE id=?', (q, ex[0]))
-        conn.commit(); feedback='Group quantities saved'
-    df = pd.read_sql_query('''SELECT sg.name as group_name, bsg.quantity FROM building_sign_groups bsg JOIN sign_groups sg ON bsg.group_id=sg.id WHERE bsg.building_id=? ORDER BY sg.name''', conn, params=(building_id,))
-    conn.close()
+        with writer() as conn:
+            cur = conn.cursor()
+            g_ids = _ids_by_name(cur, 'sign_groups', [r.get('group_name') for r in rows])
+            pairs = [(g_ids[r.get('group_name')], max(0, int(r.get('quantity') or 0)))
+                     for r in rows if r.get('group_name') in g_ids]
+            _upsert_link_quantities(cur, 'building_sign_groups', 'building_id', 'group_id', building_id, pairs)
+        bump_data_version()
+        feedback = 'Group quantities saved'
+    with get_conn(readonly=True) as conn:
+        df = pd.read_sql_query('''SELECT sg.name as group_name, bsg.quantity FROM building_sign_groups bsg JOIN sign_groups sg ON bsg.group_id=sg.id WHERE bsg.building_id=? ORDER BY sg.name''', conn, params=(building_id,))
     return df.to_dict('records'), feedback
 
 # ------------------ Building View Tab Callbacks ------------------ #
+# Signs and group assignments in one statement; 'kind' tells the rows apart and
+# the window SUM carries the building subtotal on every sign row.
+_BV_VIEW_SQL = ("SELECT 's' AS kind, st.name, bs.quantity, st.unit_price, bs.quantity*st.unit_price, "
+                'SUM(bs.quantity*st.unit_price) OVER () '
+                'FROM building_signs bs JOIN sign_types st ON bs.sign_type_id=st.id WHERE bs.building_id=? '
+                "UNION ALL SELECT 'g', sg.name, NULL, NULL, NULL, NULL "
+                'FROM building_sign_groups bsg JOIN sign_groups sg ON bsg.group_id=sg.id WHERE bsg.building_id=? '
+                'ORDER BY 1, 2')
+
+# Remaining Building View statements, kept as constants so every callback
+# sends the exact same text (and never re-formats the f-string ones).
+_BV_SIGN_TYPES_SQL = 'SELECT id, name, unit_price FROM sign_types ORDER BY name'
+_BV_BUILDING_META_SQL = 'SELECT name, description FROM buildings WHERE id=?'
+_BV_DELETE_SIGN_SQL = ('DELETE FROM building_signs WHERE building_id=? AND sign_type_id IN '
+                       '(SELECT id FROM sign_types WHERE name=?)')
+_BV_DELETE_GROUP_SQL = ('DELETE FROM building_sign_groups WHERE building_id=? AND group_id IN '
+                        '(SELECT id FROM sign_groups WHERE name=?)')
+_BV_SAVE_QTY_SQL = ('UPDATE building_signs SET quantity=? WHERE building_id=? AND sign_type_id IN '
+                    '(SELECT id FROM sign_types WHERE name=?)')
+_BV_RENAME_SQL = ('UPDATE buildings SET name=?, last_modified=CURRENT_TIMESTAMP WHERE id=? AND NOT EXISTS '
+                  f'(SELECT 1 FROM buildings b2 WHERE b2.project_id=? AND b2.{_BUILDING_NAME_MATCH} AND b2.id<>?)')
+
+def _bv_building_view(conn, building_id):
+    """Building View signs table rows, sign/group delete options and summary text from cursor rows."""
+    table_rows, groups = [], []
+    subtotal = 0
+    for kind, name, qty, price, total, sign_subtotal in conn.execute(_BV_VIEW_SQL, (building_id, building_id)):
+        if kind == 's':
+            table_rows.append({'sign_name': name, 'quantity': qty, 'unit_price': price, 'total': total})
+            subtotal = sign_subtotal or 0
+        else:
+            groups.append(name)
+    del_opts = [{'label': r['sign_name'], 'value': r['sign_name']} for r in table_rows]
+    group_del_opts = [{'label': g, 'value': g} for g in groups]
+    summary = f"Subtotal: ${subtotal:,.2f} | Signs: {len(table_rows)} | Groups: {len(groups)}"
+    return table_rows, del_opts, group_del_opts, summary
+
 @app.callback(
     Output('bv-building-dropdown','options'),
     Output('bv-building-dropdown','value'),
@@ -4118,10 +4352,8 @@ def manage_building_groups(building_id, add_clicks, save_clicks, group_id, qty,
 def bv_load_buildings(project_id):
     if not project_id:
         raise PreventUpdate
-    conn = get_connection()
-    df = pd.read_sql_query('SELECT id, name FROM buildings WHERE project_id=? ORDER BY name', conn, params=(project_id,))
-    conn.close()
-    opts = [{'label': r.name, 'value': r.id} for r in df.itertuples()]
+    with get_conn(readonly=True) as conn:
+        opts = [{'label': name, 'value': bid} for bid, name in conn.execute(_PROJECT_BUILDINGS_SQL, (project_id,))]
     return opts, (opts[0]['value'] if opts else None)
 
 @app.callback(
@@ -4137,22 +4369,15 @@ def bv_load_buildings(project_id):
 def bv_load_building(building_id):
     if not building_id:
         raise PreventUpdate
-    conn = get_connection()
-    st_df = pd.read_sql_query('SELECT id, name, unit_price FROM sign_types ORDER BY name', conn)
-    b_df = pd.read_sql_query('SELECT name, description FROM buildings WHERE id=?', conn, params=(building_id,))
-    rows_df = pd.read_sql_query('''SELECT st.name as sign_name, bs.quantity, st.unit_price, (bs.quantity*st.unit_price) as total
-                                   FROM building_signs bs JOIN sign_types st ON bs.sign_type_id=st.id
-                                   WHERE bs.building_id=? ORDER BY st.name''', conn, params=(building_id,))
-    grp_df = pd.read_sql_query('''SELECT sg.name, bsg.quantity FROM building_sign_groups bsg JOIN sign_groups sg ON bsg.group_id=sg.id WHERE bsg.building_id=? ORDER BY sg.name''', conn, params=(building_id,))
-    conn.close()
-    st_opts = [{'label': f"{r.name} (${r.unit_price})", 'value': r.id} for r in st_df.itertuples()]
-    table_rows = rows_df.to_dict('records')
-    del_opts = [{'label': r['sign_name'], 'value': r['sign_name']} for r in table_rows]
-    group_del_opts = [{'label': r.name, 'value': r.name} for r in grp_df.itertuples()] if not grp_df.empty else []
-    meta = '' if b_df.empty else f"{b_df.iloc[0]['name']} - {b_df.iloc[0].get('description','')}"
-    subtotal = sum(r['total'] for r in table_rows) if table_rows else 0
-    group_count = 0 if grp_df.empty else grp_df.shape[0]
-    summary = f"Subtotal: ${subtotal:,.2f} | Signs: {len(table_rows)} | Groups: {group_count}"
+    return _keyed_cache_call(_bv_load_building_cached, building_id)
+
+@lru_cache(maxsize=256)
+def _bv_load_building_cached(building_id, _key):
+    with get_conn(readonly=True) as conn:
+        st_opts = [{'label': f"{name} (${price})", 'value': sid} for sid, name, price in conn.execute(_BV_SIGN_TYPES_SQL)]
+        b_row = conn.execute(_BV_BUILDING_META_SQL, (building_id,)).fetchone()
+        table_rows, del_opts, group_del_opts, summary = _bv_building_view(conn, building_id)
+    meta = '' if b_row is None else f"{b_row[0]} - {b_row[1] or ''}"
     return st_opts, table_rows, del_opts, group_del_opts, meta, summary
 
 @app.callback(
@@ -4174,59 +4399,53 @@ def bv_load_building(building_id):
     prevent_initial_call=True
 )
 def bv_manage_signs(add_clicks, save_clicks, delete_clicks, delete_group_clicks, building_id, sign_type_id, qty, delete_name, delete_group_name, current_rows):
-    triggered = [t['prop_id'].split('.')[0] for t in callback_context.triggered] if callback_context.triggered else []
+    trig = callback_context.triggered[0]['prop_id'].split('.')[0] if callback_context.triggered else ''
     if not building_id:
         raise PreventUpdate
     msg = dash.no_update
-    conn = get_connection()
-    cur = conn.cursor()
-    if 'bv-add-sign-btn' in triggered and sign_type_id:
-        q = max(1, int(qty or 1))
-        cur.execute('SELECT id, quantity FROM building_signs WHERE building_id=? AND sign_type_id=?', (building_id, sign_type_id))
-        ex = cur.fetchone()
-        if ex:
-            cur.execute('UPDATE building_signs SET quantity=? WHERE id=?', (q, ex[0]))
-        else:
-            cur.execute('INSERT INTO building_signs (building_id, sign_type_id, quantity) VALUES (?,?,?)', (building_id, sign_type_id, q))
-        msg = 'Sign added/updated'
-    elif 'bv-save-signs-btn' in triggered and current_rows:
-        for r in current_rows:
-            name = r.get('sign_name')
-            q = max(0, int(r.get('quantity') or 0))
-            cur.execute('SELECT id FROM sign_types WHERE name=?', (name,))
-            st = cur.fetchone()
-            if not st: continue
-            cur.execute('SELECT id FROM building_signs WHERE building_id=? AND sign_type_id=?', (building_id, st[0]))
-            ex = cur.fetchone()
-            if ex:
-                cur.execute('UPDATE building_signs SET quantity=? WHERE id=?', (q, ex[0]))
-        msg = 'Quantities saved'
-    elif 'bv-delete-sign-btn' in triggered and delete_name:
-        cur.execute('SELECT id FROM sign_types WHERE name=?', (delete_name,))
-        st = cur.fetchone()
-        if st:
-            cur.execute('DELETE FROM building_signs WHERE building_id=? AND sign_type_id=?', (building_id, st[0]))
-            msg = 'Sign removed'
-    elif 'bv-delete-group-btn' in triggered and delete_group_name:
-        # Remove group assignment
-        cur.execute('SELECT id FROM sign_groups WHERE name=?', (delete_group_name,))
-        g = cur.fetchone()
-        if g:
-            cur.execute('DELETE FROM building_sign_groups WHERE building_id=? AND group_id=?', (building_id, g[0]))
-            msg = 'Group removed'
-    if msg is not dash.no_update:
-        conn.commit()
-    # Reload
-    rows_df = pd.read_sql_query('''SELECT st.name as sign_name, bs.quantity, st.unit_price, (bs.quantity*st.unit_price) as total
-                                   FROM building_signs bs JOIN sign_types st ON bs.sign_type_id=st.id
-                                   WHERE bs.building_id=? ORDER BY st.name''', conn, params=(building_id,))
-    grp_df = pd.read_sql_query('''SELECT sg.name, bsg.quantity FROM building_sign_groups bsg JOIN sign_groups sg ON bsg.group_id=sg.id WHERE bsg.building_id=? ORDER BY sg.name''', conn, params=(building_id,))
-    conn.close()
-    table_rows = rows_df.to_dict('records')
-    del_opts = [{'label': r['sign_name'], 'value': r['sign_name']} for r in table_rows]
-    group_del_opts = [{'label': r.name, 'value': r.name} for r in grp_df.itertuples()] if not grp_df.empty else []
-    subtotal = sum(r['total'] for r in table_rows) if table_rows else 0
-    summary = f"Subtotal: ${subtotal:,.2f} | Signs: {len(table_rows)} | Groups: {0 if grp_df.empty else grp_df.shape[0]}"
+    # Pick the branch before taking the write lock: a click with nothing to do
+    # should not open an IMMEDIATE transaction. The chosen branch runs as one
+    # transaction (one commit/fsync) inside writer().
+    add = trig == 'bv-add-sign-btn' and sign_type_id
+    save = trig == 'bv-save-signs-btn' and current_rows
+    delete_sign = trig == 'bv-delete-sign-btn' and delete_name
+    delete_group = trig == 'bv-delete-group-btn' and delete_group_name
+    with (writer() if (add or save or delete_sign or delete_group) else nullcontext()) as conn:
+        cur = conn.cursor() if conn is not None else None
+        if add:
+            q = max(1, int(qty or 1))
+            _upsert_link_quantities(cur, 'building_signs', 'building_id', 'sign_type_id', building_id, [(sign_type_id, q)])
+            msg = 'Sign added/updated'
+        elif save:
+            # Rows come from this building's table, so update in place; names resolve in the statement
+            cur.executemany(_BV_SAVE_QTY_SQL, [(max(0, int(r.get('quantity') or 0)), building_id, r.get('sign_name'))
+                                               for r in current_rows if r.get('sign_name')])
+            msg = 'Quantities saved'
+        elif delete_sign:
+            # Name -> id resolved inline; one statement instead of SELECT + DELETE
+            cur.execute(_BV_DELETE_SIGN_SQL, (building_id, delete_name))
+            if cur.rowcount:
+                msg = 'Sign removed'
+        elif delete_group:
+            # Remove group assignment
+            cur.execute(_BV_DELETE_GROUP_SQL, (building_id, delete_group_name))
+            if cur.rowcount:
+                msg = 'Group removed'
+    if msg is dash.no_update:
+        raise PreventUpdate  # nothing written, so nothing on screen changes
+    bump_data_version()
+    # Reload (same statement text as bv_load_building, so the prepared statements are reused)
+    with get_conn(readonly=True) as conn:
+        table_rows, del_opts, group_del_opts, summary = _bv_building_view(conn, building_id)
+    # Only send outputs whose payload changed: the signs table (and its delete
+    # options) is untouched by group removal or by saving unchanged quantities,
+    # and only group removal changes the group options.
+    if table_rows == current_rows:
+        table_rows = del_opts = dash.no_update
+        if not delete_group:
+            summary = dash.no_update
+    if not delete_group:
+        group_del_opts = dash.no_update
     return table_rows, del_opts, group_del_opts, summary, msg
 
 @app.callback(
@@ -4244,22 +4463,19 @@ def bv_rename_building(n_clicks, project_id, building_id, new_name):
         raise PreventUpdate
     if not (project_id and building_id and new_name and new_name.strip()):
         raise PreventUpdate
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute('SELECT 1 FROM buildings WHERE project_id=? AND LOWER(name)=LOWER(?) AND id<>?', (project_id, new_name.strip(), building_id))
-    if cur.fetchone():
-        conn.close()
-        raise PreventUpdate
-    cur.execute('UPDATE buildings SET name=?, last_modified=CURRENT_TIMESTAMP WHERE id=?', (new_name.strip(), building_id))
-    conn.commit()
-    bdf = pd.read_sql_query('SELECT id, name, description FROM buildings WHERE project_id=? ORDER BY name', conn, params=(project_id,))
-    conn.close()
-    opts = [{'label': r.name, 'value': r.id} for r in bdf.itertuples()]
-    meta = ''
-    for r in bdf.itertuples():
-        if r.id == building_id:
-            meta = f"{r.name} - {getattr(r,'description','')}"
-            break
+    with writer() as conn:
+        cur = conn.cursor()
+        # Duplicate-name guard and rename in one statement (seeks idx_buildings_project_name)
+        cur.execute(_BV_RENAME_SQL, (new_name.strip(), building_id, project_id, new_name.strip(), building_id))
+        if cur.rowcount == 0:
+            raise PreventUpdate
+        cur.execute('SELECT description FROM buildings WHERE id=?', (building_id,))
+        desc = (cur.fetchone() or (None,))[0]
+    bump_data_version()
+    with get_conn(readonly=True) as conn:
+        opts = [{'label': name, 'value': bid} for bid, name in conn.execute(_PROJECT_BUILDINGS_SQL, (project_id,))]
+    # The renamed row's values are already known; no need to find it in the list
+    meta = f"{new_name.strip()} - {desc or ''}"
     return opts, building_id, meta
 
 ## Duplicate /health route removed (earlier Flask @server.route('/health') remains active)
@@ -4272,9 +4488,12 @@ def find_free_port(preferred: int) -> int:
     """
     port = preferred
     host = APP_HOST or '127.0.0.1'
+    # On Windows SO_REUSEADDR lets the probe bind a port another process is
+    # listening on, so a busy port looks free; SO_EXCLUSIVEADDRUSE reports it.
+    reuse_opt = getattr(socket, 'SO_EXCLUSIVEADDRUSE', socket.SO_REUSEADDR)
     for _ in range(25):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.setsockopt(socket.SOL_SOCKET, reuse_opt, 1)
             try:
                 s.bind((host, port))
                 return port
@@ -4298,13 +4517,13 @@ def start_server():
         pass
     if AUTO_BACKUP_INTERVAL_SEC > 0:
         print(f"[startup] Auto backup every {AUTO_BACKUP_INTERVAL_SEC}s -> {BACKUP_DIR}")
-        import threading, time, shutil
+        import threading, time
         def _auto_backup_loop():
             while True:
                 try:
                     ts = datetime.now().strftime('%Y%m%d_%H%M%S')
                     target = BACKUP_DIR / f'sign_estimation_{ts}.db'
-                    shutil.copy2(DATABASE_PATH, target)
+                    backup_sqlite(target, DATABASE_PATH)
                 except Exception as e:  # noqa: BLE001
                     print(f"[backup][warn] {e}")
                 time.sleep(AUTO_BACKUP_INTERVAL_SEC)
@@ -21,6 +21,10 @@ APP_PORT = int(os.getenv("SIGN_APP_PORT", "8050"))
 # Enable/disable Dash debug (should be False for shared use)
 DASH_DEBUG = os.getenv("SIGN_APP_DEBUG", "0").lower() in {"1","true","yes"}
 
+# SQLite journal mode applied on first connection (persists on the file).
+# WAL lets readers run alongside a writer; set to DELETE to opt out.
+SQLITE_JOURNAL_MODE = os.getenv("SIGN_APP_SQLITE_JOURNAL_MODE", "WAL").upper()
+
 # Optional: seconds between lightweight auto-backups (0 disables)
 AUTO_BACKUP_INTERVAL_SEC = int(os.getenv("SIGN_APP_AUTO_BACKUP_SEC", "0"))
 BACKUP_DIR = Path(os.getenv("SIGN_APP_BACKUP_DIR", str(BASE_DIR / "backups")))
@@ -6,10 +6,15 @@ Usage (Windows PowerShell):
 from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
-import shutil
 import sys
 
 BASE = Path(__file__).resolve().parent.parent
+# Ensure project root on path when invoked directly
+if str(BASE) not in sys.path:
+    sys.path.insert(0, str(BASE))
+
+from utils.db_util import backup_sqlite
+
 DB = BASE / 'sign_estimation.db'
 BACKUPS = BASE / 'backups'
 BACKUPS.mkdir(exist_ok=True)
@@ -20,7 +25,7 @@ def main():
         return 1
     ts = datetime.now().strftime('%Y%m%d_%H%M%S')
     target = BACKUPS / f'sign_estimation_{ts}.db'
-    shutil.copy2(DB, target)
+    backup_sqlite(target, str(DB))
     print('Backup created:', target)
     return 0
 
@@ -15,32 +15,37 @@ from pathlib import Path
 
 DEFAULT_DB = 'sign_estimation.db'
 
+# Material names are lower-cased once into an indexed temp table; the UPDATE then
+# joins against it instead of running a LOWER() correlated subquery per row.
+NORM_SQL = """
+DROP TABLE IF EXISTS temp.mp_norm;
+CREATE TEMP TABLE mp_norm (name_lc TEXT PRIMARY KEY, p REAL);
+INSERT OR REPLACE INTO mp_norm (name_lc, p)
+SELECT LOWER(material_name), price_per_sq_ft FROM material_pricing;
+"""
+
 SQL = """
 UPDATE sign_types
-SET price_per_sq_ft = (
-        SELECT mp.price_per_sq_ft FROM material_pricing mp
-        WHERE LOWER(mp.material_name)=LOWER(sign_types.material)
-    ),
+SET price_per_sq_ft = m.p,
     unit_price = CASE WHEN width>0 AND height>0 THEN (
-        width * height * COALESCE((
-            SELECT mp.price_per_sq_ft FROM material_pricing mp
-            WHERE LOWER(mp.material_name)=LOWER(sign_types.material)
-        ), price_per_sq_ft)
+        width * height * COALESCE(m.p, price_per_sq_ft)
     ) ELSE unit_price END,
     last_modified = CURRENT_TIMESTAMP
-WHERE material IS NOT NULL AND material <> ''
-  AND EXISTS (SELECT 1 FROM material_pricing mp WHERE LOWER(mp.material_name)=LOWER(sign_types.material));
+FROM mp_norm m
+WHERE m.name_lc = LOWER(sign_types.material)
+  AND sign_types.material IS NOT NULL AND sign_types.material <> '';
 """
 
 COUNT_SQL = """
 SELECT COUNT(*) FROM sign_types st
-JOIN material_pricing mp ON LOWER(st.material)=LOWER(mp.material_name)
+JOIN mp_norm m ON m.name_lc = LOWER(st.material)
 WHERE st.width>0 AND st.height>0;
 """
 
 def recalc(db_path: Path) -> int:
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
+    cur.executescript(NORM_SQL)
     # Pre-count potential rows
     cur.execute(COUNT_SQL)
     eligible = cur.fetchone()[0]
@@ -53,3 +53,17 @@ def test_best_cost_method_priority():
     # Should still prefer unit_price over sq_ft_material or sq_ft_sign
     best = calc.get_best_cost_method(result['cost_methods'])
     assert best['method'] == 'Unit Price'
+
+
+def test_compute_unit_price_vec_matches_scalar():
+    import pandas as pd
+    from calculations import compute_unit_price, compute_unit_price_vec
+    rows = [
+        {'unit_price': 50.0, 'width': 8, 'height': 2, 'price_per_sq_ft': 12.0, 'material_multiplier': 0},
+        {'unit_price': 50.0, 'width': 8, 'height': 2, 'price_per_sq_ft': 0, 'material_multiplier': 3.0},
+        {'unit_price': 20.0, 'width': 0, 'height': 2, 'price_per_sq_ft': 12.0, 'material_multiplier': 0},
+        {'unit_price': None, 'width': None, 'height': 4, 'price_per_sq_ft': None, 'material_multiplier': None},
+    ]
+    df = pd.DataFrame(rows)
+    for mode in ('per_sign', 'per_area'):
+        assert compute_unit_price_vec(df, mode).tolist() == [compute_unit_price(r, mode) for r in rows]
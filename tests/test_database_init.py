@@ -34,3 +34,22 @@ def test_database_initialization_creates_tables():
     missing = expected.difference(tables)
     assert not missing, f"Missing tables: {missing}"
     conn.close()
+
+
+def test_link_table_duplicates_merged_into_unique_pair():
+    DatabaseManager(TEST_DB)
+    conn = sqlite3.connect(TEST_DB)
+    cur = conn.cursor()
+    cur.execute("DROP INDEX IF EXISTS idx_building_signs_pair")
+    cur.execute("INSERT INTO projects (name) VALUES ('Dup Proj')")
+    cur.execute("INSERT INTO buildings (project_id, name) VALUES (?, 'B1')", (cur.lastrowid,))
+    bid = cur.lastrowid
+    cur.execute("INSERT INTO sign_types (name) VALUES ('Dup Sign')")
+    stid = cur.lastrowid
+    cur.executemany("INSERT INTO building_signs (building_id, sign_type_id, quantity) VALUES (?,?,?)", [(bid, stid, 2), (bid, stid, 3)])
+    conn.commit(); conn.close()
+    DatabaseManager(TEST_DB)  # re-init runs the merge + unique index
+    conn = sqlite3.connect(TEST_DB)
+    rows = conn.execute("SELECT quantity FROM building_signs WHERE building_id=? AND sign_type_id=?", (bid, stid)).fetchall()
+    conn.close()
+    assert rows == [(5,)]
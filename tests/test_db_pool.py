@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from utils import db_util
+from utils.db_util import SQLitePool
+
+
+def test_pool_reuses_connections(tmp_path):
+    pool = SQLitePool(str(tmp_path / 'pool.db'), size=2)
+    c1 = pool.acquire()
+    c1.execute('CREATE TABLE t (x INTEGER)')
+    c1.commit()
+    c1.close()
+    c2 = pool.acquire()
+    assert c2 is c1, 'Released connection should be handed out again'
+    c2.close()
+    c2.close()  # double close must not queue the connection twice
+    assert pool.acquire() is c1
+    assert pool.acquire() is not c1
+    pool.close_all()
+
+
+def test_pool_rolls_back_uncommitted(tmp_path):
+    pool = SQLitePool(str(tmp_path / 'pool.db'), size=2)
+    c = pool.acquire()
+    c.execute('CREATE TABLE t (x INTEGER)')
+    c.commit()
+    c.execute('INSERT INTO t VALUES (1)')
+    c.close()  # no commit -> discarded
+    c = pool.acquire()
+    assert c.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    c.close()
+    pool.close_all()
+
+
+def test_writer_commits_or_rolls_back(tmp_path, monkeypatch):
+    db = str(tmp_path / 'writer.db')
+    monkeypatch.setattr(db_util, 'DATABASE_PATH', db)
+    monkeypatch.setattr(db_util, '_write_conn', None)
+    with db_util.writer() as conn:
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.execute('INSERT INTO t VALUES (1)')
+    with pytest.raises(RuntimeError):
+        with db_util.writer() as conn:
+            conn.execute('INSERT INTO t VALUES (2)')
+            raise RuntimeError('boom')
+    check = sqlite3.connect(db)
+    assert check.execute('SELECT x FROM t').fetchall() == [(1,)]
+    check.close()
+    db_util._write_conn.close()
+
+
+def test_readonly_pool_rejects_writes(tmp_path):
+    db = str(tmp_path / 'ro.db')
+    rw = sqlite3.connect(db)
+    rw.execute('CREATE TABLE t (x INTEGER)')
+    rw.execute('INSERT INTO t VALUES (1)')
+    rw.commit()
+    rw.close()
+    pool = SQLitePool(db, size=1, readonly=True)
+    c = pool.acquire()
+    assert c.execute('SELECT x FROM t').fetchall() == [(1,)]
+    with pytest.raises(sqlite3.OperationalError):
+        c.execute('INSERT INTO t VALUES (2)')
+    c.close()
+    pool.close_all()
+
+
+def test_backup_sqlite_copies_and_rejects_missing_source(tmp_path):
+    src = tmp_path / 'src.db'
+    conn = sqlite3.connect(src)
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    conn.execute('INSERT INTO t VALUES (1)')
+    conn.commit()
+    conn.close()
+    db_util.backup_sqlite(tmp_path / 'copy.db', str(src))
+    assert sqlite3.connect(tmp_path / 'copy.db').execute('SELECT x FROM t').fetchone() == (1,)
+    missing = tmp_path / 'missing.db'
+    with pytest.raises(FileNotFoundError):
+        db_util.backup_sqlite(tmp_path / 'copy2.db', str(missing))
+    assert not missing.exists()
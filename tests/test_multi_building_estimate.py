@@ -65,3 +65,40 @@ def test_multi_building_subset_filter():
     assert any(r['Item']=='Sales Tax' for r in rows_one)
     # Meta sign count matches expected (2 signs)
     assert meta_one['total_sign_count'] == 2
+
+
+def test_default_estimate_building_filter():
+    setup_module(None)
+    dbm, pid, (b1, b2) = seed_multi()
+    rows = dbm.get_project_estimate(pid, [b2])
+    assert {r['Building'] for r in rows} == {'Building B', 'ALL'}
+    install = next(r for r in rows if r['Item'] == 'Installation')
+    # Install applies to the selected building's subtotal only (4*50)
+    assert abs(install['Total'] - 20) < 0.01
+
+
+def test_null_quantities_count_as_zero(tmp_path):
+    db = str(tmp_path / 'null_qty.db')
+    dbm = DatabaseManager(db)
+    conn = sqlite3.connect(db)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO projects (name) VALUES ('P')")
+    pid = cur.lastrowid
+    cur.execute("INSERT INTO buildings (project_id, name) VALUES (?, 'B')", (pid,))
+    bid = cur.lastrowid
+    cur.execute("INSERT INTO sign_types (name, unit_price) VALUES ('S1', 10)")
+    st = cur.lastrowid
+    cur.execute("INSERT INTO sign_types (name, unit_price) VALUES ('S2', 20)")
+    st2 = cur.lastrowid
+    cur.execute("INSERT INTO building_signs (building_id, sign_type_id, quantity) VALUES (?,?,NULL)", (bid, st))
+    cur.execute("INSERT INTO building_signs (building_id, sign_type_id, quantity) VALUES (?,?,2)", (bid, st2))
+    cur.execute("INSERT INTO sign_groups (name) VALUES ('G')")
+    gid = cur.lastrowid
+    cur.execute("INSERT INTO sign_group_members (group_id, sign_type_id, quantity) VALUES (?,?,1)", (gid, st))
+    cur.execute("INSERT INTO building_sign_groups (building_id, group_id, quantity) VALUES (?,?,NULL)", (bid, gid))
+    conn.commit()
+    conn.close()
+    rows = {r['Item']: r for r in dbm.get_project_estimate(pid)}
+    assert rows['S1']['Quantity'] == 0 and rows['S1']['Total'] == 0
+    assert rows['S2']['Total'] == 40
+    assert rows['Group: G']['Total'] == 0
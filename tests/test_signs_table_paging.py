@@ -0,0 +1,78 @@
+import sqlite3
+from contextlib import contextmanager
+
+import app
+from app import _datatable_filter_sql, _signs_page, _SIGNS_TAB_COLS, _SIGNS_TAB_NUMERIC_COLS
+
+
+def test_filter_query_translates_to_sql():
+    clauses, params = _datatable_filter_sql('{name} scontains "Door" && {unit_price} >= 5 && {bogus} = 1',
+                                            _SIGNS_TAB_COLS, _SIGNS_TAB_NUMERIC_COLS)
+    assert clauses == ["name LIKE ? ESCAPE '\\'", 'unit_price >= ?']
+    assert params == ['%Door%', 5.0]
+
+
+def test_numeric_looking_values_stay_text():
+    _, params = _datatable_filter_sql('{name} contains 101 && {name} = 101 && {unit_price} contains 5',
+                                      _SIGNS_TAB_COLS, _SIGNS_TAB_NUMERIC_COLS)
+    assert params == ['%101%', '101', '%5%']
+
+
+def test_like_wildcards_are_literal():
+    _, params = _datatable_filter_sql('{name} contains "50%_off" && {name} datestartswith a[b', _SIGNS_TAB_COLS)
+    assert params == ['%50\\%\\_off%', 'a\\[b%']
+
+
+def test_empty_filter_query():
+    assert _datatable_filter_sql('', _SIGNS_TAB_COLS) == ([], [])
+
+
+def _seed(db):
+    conn = sqlite3.connect(db)
+    conn.execute(f"CREATE TABLE sign_types ({', '.join(_SIGNS_TAB_COLS)})")
+    rows = [('101', 10.0, 'ext'), ('A101', 5.5, 'int'), ('B2', 20.0, 'EXT '), ('C3', 1.0, None), ('D4', 7.0, 'int')]
+    for name, price, install in rows:
+        conn.execute('INSERT INTO sign_types (name, unit_price, install_type) VALUES (?,?,?)', (name, price, install))
+    conn.commit()
+    conn.close()
+
+
+def test_signs_page_filters_sorts_and_clamps(tmp_path, monkeypatch):
+    db = str(tmp_path / 'signs.db')
+    _seed(db)
+
+    @contextmanager
+    def fake_conn(readonly=False):
+        conn = sqlite3.connect(db)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    monkeypatch.setattr(app, 'get_conn', fake_conn)
+
+    names = lambda rows: [r['name'] for r in rows]
+    rows, total, _ = _signs_page(0, 10, filter_query='{name} contains 101')
+    assert (names(rows), total) == (['101', 'A101'], 2)
+    rows, _, _ = _signs_page(0, 10, filter_query='{name} = 101')
+    assert names(rows) == ['101']
+    rows, _, _ = _signs_page(0, 10, filter_query='{unit_price} contains 5')
+    assert names(rows) == ['A101']
+    rows, _, _ = _signs_page(0, 2, sort_by=[{'column_id': 'unit_price', 'direction': 'desc'}])
+    assert names(rows) == ['B2', '101']
+    rows, total, _ = _signs_page(0, 10, install_filter='ext')
+    assert (names(rows), total) == (['101', 'B2'], 2)
+    rows, total, _ = _signs_page(0, 10, install_filter='non_ext')
+    assert (names(rows), total) == (['A101', 'C3', 'D4'], 3)
+    rows, _, _ = _signs_page(0, 10, filter_query='{name} contains "%"')
+    assert rows == []
+    # Past the last page -> last page, and the clamped index is reported back
+    rows, total, page = _signs_page(9, 2)
+    assert (names(rows), total, page) == (['D4'], 5, 2)
+
+
+def test_sign_type_params_skips_malformed_rows():
+    rows = [{'name': 'A1', 'unit_price': '12'}, {'name': 'B2', 'description': 5}, {'name': 7}, {'name': ' '}, {'name': None}]
+    named, params, skipped = app._sign_type_params(rows)
+    assert [r['name'] for r in named] == ['A1']
+    assert params[0][0] == 'A1' and params[0][3] == 12.0
+    assert skipped == ['B2', '7']
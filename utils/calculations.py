@@ -29,69 +29,78 @@ class CostCalculator:
             )
             if sign_df.empty:
                 return {"error": "Sign type not found"}
-            sign = sign_df.iloc[0]
+            return self._sign_cost(conn, sign_df.iloc[0], quantity, custom_dimensions, custom_material)
+        finally:
+            conn.close()
 
-            # Dimensions and area
-            if custom_dimensions:
-                width, height = custom_dimensions
-            else:
-                width, height = sign.get("width"), sign.get("height")
-            area = (width or 0) * (height or 0)
+    def _sign_cost(
+        self,
+        conn: sqlite3.Connection,
+        sign,
+        quantity: int = 1,
+        custom_dimensions: Optional[Tuple[float, float]] = None,
+        custom_material: Optional[str] = None,
+    ) -> Dict:
+        """Cost methods for an already-loaded sign_types row (dict or Series)."""
+        # Dimensions and area
+        if custom_dimensions:
+            width, height = custom_dimensions
+        else:
+            width, height = sign.get("width"), sign.get("height")
+        area = (width or 0) * (height or 0)
 
-            material = custom_material if custom_material else sign.get("material")
+        material = custom_material if custom_material else sign.get("material")
 
-            cost_methods: Dict[str, Dict] = {}
-            # 1) Unit price
-            unit_price = float(sign.get("unit_price") or 0)
-            if unit_price:
-                cost_methods["unit_price"] = {
-                    "method": "Unit Price",
-                    "unit_cost": unit_price,
-                    "quantity": quantity,
-                    "total_cost": unit_price * quantity,
-                    "details": f"${unit_price:.2f} per unit × {quantity} units",
-                }
+        cost_methods: Dict[str, Dict] = {}
+        # 1) Unit price
+        unit_price = float(sign.get("unit_price") or 0)
+        if unit_price:
+            cost_methods["unit_price"] = {
+                "method": "Unit Price",
+                "unit_cost": unit_price,
+                "quantity": quantity,
+                "total_cost": unit_price * quantity,
+                "details": f"${unit_price:.2f} per unit × {quantity} units",
+            }
+
+        # 2) Sign's own ppsf
+        ppsf_sign = float(sign.get("price_per_sq_ft") or 0)
+        if ppsf_sign and area > 0:
+            cost_methods["sq_ft_sign"] = {
+                "method": "Square Foot (Sign Type)",
+                "price_per_sq_ft": ppsf_sign,
+                "area": area,
+                "quantity": quantity,
+                "total_cost": ppsf_sign * area * quantity,
+                "details": f"${ppsf_sign:.2f}/sq ft × {area:.2f} sq ft × {quantity} units",
+            }
 
-            # 2) Sign's own ppsf
-            ppsf_sign = float(sign.get("price_per_sq_ft") or 0)
-            if ppsf_sign and area > 0:
-                cost_methods["sq_ft_sign"] = {
-                    "method": "Square Foot (Sign Type)",
-                    "price_per_sq_ft": ppsf_sign,
+        # 3) Material pricing table
+        if material and area > 0:
+            mat_df = pd.read_sql_query(
+                "SELECT price_per_sq_ft FROM material_pricing WHERE material_name = ?",
+                conn,
+                params=(material,),
+            )
+            if not mat_df.empty:
+                mat_ppsf = float(mat_df.iloc[0]["price_per_sq_ft"] or 0)
+                cost_methods["sq_ft_material"] = {
+                    "method": "Square Foot (Material)",
+                    "price_per_sq_ft": mat_ppsf,
                     "area": area,
                     "quantity": quantity,
-                    "total_cost": ppsf_sign * area * quantity,
-                    "details": f"${ppsf_sign:.2f}/sq ft × {area:.2f} sq ft × {quantity} units",
+                    "total_cost": mat_ppsf * area * quantity,
+                    "details": f"${mat_ppsf:.2f}/sq ft × {area:.2f} sq ft × {quantity} units",
                 }
 
-            # 3) Material pricing table
-            if material and area > 0:
-                mat_df = pd.read_sql_query(
-                    "SELECT price_per_sq_ft FROM material_pricing WHERE material_name = ?",
-                    conn,
-                    params=(material,),
-                )
-                if not mat_df.empty:
-                    mat_ppsf = float(mat_df.iloc[0]["price_per_sq_ft"] or 0)
-                    cost_methods["sq_ft_material"] = {
-                        "method": "Square Foot (Material)",
-                        "price_per_sq_ft": mat_ppsf,
-                        "area": area,
-                        "quantity": quantity,
-                        "total_cost": mat_ppsf * area * quantity,
-                        "details": f"${mat_ppsf:.2f}/sq ft × {area:.2f} sq ft × {quantity} units",
-                    }
-
-            return {
-                "sign_name": sign.get("name"),
-                "material": material,
-                "dimensions": f"{width} × {height}" if width and height else "Not specified",
-                "area": area,
-                "quantity": quantity,
-                "cost_methods": cost_methods,
-            }
-        finally:
-            conn.close()
+        return {
+            "sign_name": sign.get("name"),
+            "material": material,
+            "dimensions": f"{width} × {height}" if width and height else "Not specified",
+            "area": area,
+            "quantity": quantity,
+            "cost_methods": cost_methods,
+        }
 
     def get_best_cost_method(self, cost_methods: Dict) -> Optional[Dict]:
         """Pick the preferred method in priority order."""
@@ -126,8 +135,10 @@ class CostCalculator:
             )
             group_cost_breakdown = []
             total_group_cost = 0.0
-            for _, member in members_df.iterrows():
-                sign_cost = self.calculate_sign_cost(member["id"], member["group_quantity"])  # type: ignore[index]
+            # Members already carry their sign_types row; price them without re-querying
+            members = members_df.astype(object).where(members_df.notna(), None)
+            for member in members.to_dict("records"):
+                sign_cost = self._sign_cost(conn, member, member["group_quantity"])
                 if "error" not in sign_cost:
                     best = self.get_best_cost_method(sign_cost["cost_methods"])  # type: ignore[index]
                     if best:
@@ -301,25 +312,46 @@ class CostCalculator:
 
 
 # ------------------ Helper functions used elsewhere ------------------ #
-def compute_unit_price(row: Dict, price_mode: str) -> float:
-    """Compute unit price for a sign or group member based on pricing mode."""
+def compute_unit_price(row, price_mode: str) -> float:
+    """Compute unit price for a sign or group member based on pricing mode.
+
+    ``row`` may be a dict or a namedtuple (e.g. from ``itertuples()``); the
+    latter is read by attribute without building a per-row dict.
+    """
     def _f(v):
         try:
             return float(v or 0)
         except Exception:
             return 0.0
 
+    get = row.get if isinstance(row, dict) else (lambda k: getattr(row, k, None))
     if price_mode == "per_area":
-        width = _f(row.get("width"))
-        height = _f(row.get("height"))
+        width = _f(get("width"))
+        height = _f(get("height"))
         area = width * height if width and height else 0
         if area > 0:
-            ppsf = _f(row.get("price_per_sq_ft"))
+            ppsf = _f(get("price_per_sq_ft"))
             if ppsf <= 0:
-                ppsf = _f(row.get("material_multiplier"))
+                ppsf = _f(get("material_multiplier"))
             if ppsf > 0:
                 return area * ppsf
-    return _f(row.get("unit_price"))
+    return _f(get("unit_price"))
+
+
+def compute_unit_price_vec(df: pd.DataFrame, price_mode: str) -> pd.Series:
+    """Vectorized compute_unit_price over DataFrame rows (missing/NULL values count as 0)."""
+    def col(name: str) -> pd.Series:
+        if name not in df:
+            return pd.Series(0.0, index=df.index)
+        return pd.to_numeric(df[name], errors="coerce").fillna(0.0)
+
+    unit = col("unit_price")
+    if price_mode != "per_area":
+        return unit
+    area = col("width") * col("height")
+    ppsf = col("price_per_sq_ft")
+    ppsf = ppsf.where(ppsf > 0, col("material_multiplier"))
+    return (area * ppsf).where((area > 0) & (ppsf > 0), unit)
 
 
 def compute_install_cost(
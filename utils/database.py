@@ -27,8 +27,10 @@ import sqlite3
 import pandas as pd
 import json
 import os
+import sys
 from datetime import datetime
-import shutil
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
 try:  # optional dependency only when MSSQL backend selected
@@ -37,6 +39,7 @@ except Exception:  # pragma: no cover
     pyodbc = None  # type: ignore
 
 from config import DB_BACKEND, MSSQL_CONN_STRING, DATABASE_PATH
+from utils.db_util import backup_sqlite
 
 
 class SQLiteDatabaseManager:
@@ -44,9 +47,19 @@ class SQLiteDatabaseManager:
         self.db_path = db_path
         self.init_database()
     
+    def _connect(self):
+        """sqlite3 connection; on a WAL database, commits skip the per-commit fsync."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+                conn.execute("PRAGMA synchronous=NORMAL")  # safe under WAL (checkpoints still fsync)
+        except sqlite3.Error:
+            pass
+        return conn
+
     def init_database(self):
         """Initialize the SQLite database with required tables."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute("PRAGMA foreign_keys = ON")
 
@@ -115,7 +128,12 @@ class SQLiteDatabaseManager:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 material_name TEXT NOT NULL UNIQUE,
                 price_per_sq_ft REAL NOT NULL,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'''
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+            # "Most recent" lookups (debug stats) read these newest-first with LIMIT
+            '''CREATE INDEX IF NOT EXISTS idx_sign_types_last_modified ON sign_types(last_modified DESC)''',
+            '''CREATE INDEX IF NOT EXISTS idx_material_pricing_last_updated ON material_pricing(last_updated DESC)''',
+            # Case-insensitive sign type lookups (notes, images, tags, templates) use lower(name)=lower(?)
+            '''CREATE INDEX IF NOT EXISTS idx_sign_types_lower_name ON sign_types(lower(name))'''
         ]
         for stmt in statements:
             cursor.execute(stmt)
@@ -123,7 +141,7 @@ class SQLiteDatabaseManager:
         existing_cols = set()
         try:
             cursor.execute('PRAGMA table_info(sign_types)')
-            for row in cursor.fetchall():
+            for row in cursor:
                 existing_cols.add(row[1])
         except Exception:
             pass
@@ -207,7 +225,7 @@ class SQLiteDatabaseManager:
         # Add profile_id to projects if missing
         try:
             cursor.execute('PRAGMA table_info(projects)')
-            proj_cols = [r[1] for r in cursor.fetchall()]
+            proj_cols = [r[1] for r in cursor]
             if 'pricing_profile_id' not in proj_cols:
                 cursor.execute('ALTER TABLE projects ADD COLUMN pricing_profile_id INTEGER REFERENCES pricing_profiles(id)')
         except Exception:
@@ -272,6 +290,24 @@ class SQLiteDatabaseManager:
                 cursor.execute('INSERT INTO sign_type_images (sign_type_id, image_path, display_order) VALUES (?,?,0)', (sid, ipath))
         except Exception:
             pass
+
+        # One row per (building, sign type) / (building, group) / (group, sign type) so
+        # quantity saves can upsert with ON CONFLICT. Legacy duplicates are merged
+        # (quantities summed) first.
+        for table, parent_col, key_col in (('building_signs', 'building_id', 'sign_type_id'),
+                                           ('building_sign_groups', 'building_id', 'group_id'),
+                                           ('sign_group_members', 'group_id', 'sign_type_id')):
+            try:
+                cursor.execute(f'''SELECT {parent_col}, {key_col}, MAX(id), SUM(quantity) FROM {table}
+                                  GROUP BY {parent_col}, {key_col} HAVING COUNT(*) > 1''')
+                for p_id, key_id, keep_id, qty in cursor.fetchall():
+                    cursor.execute(f'UPDATE {table} SET quantity=? WHERE id=?', (qty, keep_id))
+                    cursor.execute(f'DELETE FROM {table} WHERE {parent_col}=? AND {key_col}=? AND id<>?', (p_id, key_id, keep_id))
+                cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_pair ON {table}({parent_col}, {key_col})')
+            except Exception as e:
+                print(f"[db][warn] unique index on {table}: {e}")
+        # Superseded by idx_sign_group_members_pair (same columns, unique)
+        cursor.execute('DROP INDEX IF EXISTS idx_sign_group_members_group')
         conn.commit(); conn.close()
     
     def import_csv_data(self, csv_file_path, table_mapping=None):
@@ -284,7 +320,7 @@ class SQLiteDatabaseManager:
         """
         try:
             df = pd.read_csv(csv_file_path)
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             
             # Default mapping if none provided
             if table_mapping is None:
@@ -329,7 +365,7 @@ class SQLiteDatabaseManager:
                     self._log_audit('import_or_replace','sign_types', None, {
                         'name': str(row.get('name', '')),
                         'unit_price': float(unit_price or 0)
-                    })
+                    }, conn=conn)
                 except Exception:
                     pass
             
@@ -343,25 +379,40 @@ class SQLiteDatabaseManager:
     def export_to_excel(self, output_path, project_id=None):
         """Export project data to Excel format with company branding."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                # Export projects
-                projects_df = pd.read_sql_query("SELECT * FROM projects", conn)
-                projects_df.to_excel(writer, sheet_name='Projects', index=False)
-                
-                # Export sign types
-                signs_df = pd.read_sql_query("SELECT * FROM sign_types", conn)
-                signs_df.to_excel(writer, sheet_name='Sign Types', index=False)
-                
-                if project_id:
-                    # Export specific project details
-                    project_detail = self.get_project_estimate(project_id)
-                    if project_detail:
-                        detail_df = pd.DataFrame(project_detail)
-                        detail_df.to_excel(writer, sheet_name=f'Project_{project_id}_Detail', index=False)
-            
-            conn.close()
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font
+            # Write-only workbook: only header cells carry a style; data rows are appended
+            # as plain tuples so openpyxl never builds styled Cell objects for them.
+            wb = Workbook(write_only=True)
+
+            def _sheet(title, columns, rows):
+                ws = wb.create_sheet(title)
+                header = []
+                for col in columns:
+                    cell = WriteOnlyCell(ws, value=col)
+                    cell.font = Font(bold=True)
+                    header.append(cell)
+                ws.append(header)
+                for row in rows:
+                    ws.append(tuple(row))
+
+            conn = self._connect()
+            try:
+                for title, table in (('Projects', 'projects'), ('Sign Types', 'sign_types')):
+                    cur = conn.execute(f"SELECT * FROM {table}")
+                    _sheet(title, [d[0] for d in cur.description], cur.fetchall())
+            finally:
+                conn.close()
+
+            if project_id:
+                # Export specific project details
+                project_detail = self.get_project_estimate(project_id)
+                if project_detail:
+                    columns = list(project_detail[0])
+                    _sheet(f'Project_{project_id}_Detail', columns,
+                           ([r.get(c) for c in columns] for r in project_detail))
+            wb.save(output_path)
             return True, f"Data exported to {output_path}"
             
         except Exception as e:
@@ -376,24 +427,25 @@ class SQLiteDatabaseManager:
         Returns: (success: bool, message: str)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cur = conn.cursor()
             cur.execute("UPDATE sign_types SET image_path = ?, last_modified=CURRENT_TIMESTAMP WHERE lower(name)=lower(?)", (image_rel_path, sign_name))
             if cur.rowcount == 0:
                 conn.close()
                 return False, f"Sign type '{sign_name}' not found"
+            self._log_audit('update_image','sign_types', None, {'name': sign_name, 'image_path': image_rel_path}, conn=conn)
             conn.commit(); conn.close()
-            try:
-                self._log_audit('update_image','sign_types', None, {'name': sign_name, 'image_path': image_rel_path})
-            except Exception:
-                pass
             return True, 'Image path updated'
         except Exception as e:
             return False, f'Error setting image: {e}'
     
-    def get_project_estimate(self, project_id):
-        """Calculate comprehensive project estimate."""
-        conn = sqlite3.connect(self.db_path)
+    def get_project_estimate(self, project_id, building_ids=None):
+        """Calculate comprehensive project estimate.
+
+        building_ids: optional list restricting the estimate (and the
+        installation / tax lines derived from it) to those buildings.
+        """
+        conn = self._connect()
         _proj_df = pd.read_sql_query("SELECT * FROM projects WHERE id = ?", conn, params=(project_id,))
         if _proj_df.empty:
             conn.close()
@@ -412,73 +464,81 @@ class SQLiteDatabaseManager:
         estimate_data = []
         total_cost = 0.0
 
-        buildings = pd.read_sql_query(
-            "SELECT * FROM buildings WHERE project_id = ?",
-            conn, params=(project_id,)
-        )
-        for _, building in buildings.iterrows():
-            building_cost = 0.0
-            signs = pd.read_sql_query('''
-                SELECT st.name, st.unit_price, st.material, st.width, st.height,
-                       bs.quantity, bs.custom_price
-                FROM building_signs bs
-                JOIN sign_types st ON bs.sign_type_id = st.id
-                WHERE bs.building_id = ?
-            ''', conn, params=(building['id'],))
-            for _, sign in signs.iterrows():
-                price = sign['custom_price'] if sign['custom_price'] else sign['unit_price']
-                # Apply margin multiplier if pricing profile present
-                if profile is not None and 'margin_multiplier' in profile and profile['margin_multiplier'] not in (None, 0, 1):
-                    try:
-                        price = float(price) * float(profile['margin_multiplier'])
-                    except Exception:
-                        pass
-                line_total = price * sign['quantity']
-                building_cost += line_total
+        margin = 1.0
+        if profile is not None and 'margin_multiplier' in profile and profile['margin_multiplier'] not in (None, 0, 1):
+            try:
+                margin = float(profile['margin_multiplier'])
+            except Exception:
+                margin = 1.0
+
+        # Joined queries for the whole project (rather than one query per
+        # building and per group), walked in building order with plain tuples.
+        b_filter = ''
+        b_params = [project_id]
+        if building_ids:
+            b_filter = f" AND b.id IN ({','.join(['?']*len(building_ids))})"
+            b_params += list(building_ids)
+        cur = conn.cursor()
+        cur.execute(f"SELECT b.id, b.name FROM buildings b WHERE b.project_id = ?{b_filter} ORDER BY b.name COLLATE NOCASE, b.id", b_params)
+        # One name object per building (and one per distinct material below) shared by all
+        # of its rows instead of a fresh string per row.
+        building_order = cur.fetchall()
+        cur.execute(f'''
+            SELECT b.id, st.name, st.unit_price, st.material, st.width, st.height,
+                   COALESCE(bs.quantity, 0), bs.custom_price
+            FROM buildings b
+            JOIN building_signs bs ON bs.building_id = b.id
+            JOIN sign_types st ON bs.sign_type_id = st.id
+            WHERE b.project_id = ?{b_filter}
+            ORDER BY b.id, bs.sign_type_id
+        ''', b_params)
+        sign_rows = cur.fetchall()
+        # Per-group unit total (sum of member price * member qty)
+        cur.execute(f'''
+            SELECT b.id, sg.name, COALESCE(bsg.quantity, 0),
+                   (SELECT COALESCE(SUM(COALESCE(st.unit_price, 0) * sgm.quantity), 0)
+                      FROM sign_group_members sgm
+                      JOIN sign_types st ON sgm.sign_type_id = st.id
+                     WHERE sgm.group_id = sg.id)
+            FROM buildings b
+            JOIN building_sign_groups bsg ON bsg.building_id = b.id
+            JOIN sign_groups sg ON bsg.group_id = sg.id
+            WHERE b.project_id = ?{b_filter}
+            ORDER BY b.id, bsg.group_id
+        ''', b_params)
+        group_rows = cur.fetchall()
+
+        signs_by_b = {bid: list(rows) for bid, rows in groupby(sign_rows, key=itemgetter(0))}
+        groups_by_b = {bid: list(rows) for bid, rows in groupby(group_rows, key=itemgetter(0))}
+        for bid, b_name in building_order:
+            for _, s_name, unit_price, material, width, height, qty, custom_price in signs_by_b.get(bid, ()):
+                if material:
+                    material = sys.intern(material)
+                price = (custom_price if custom_price else unit_price or 0) * margin
+                line_total = price * qty
+                total_cost += line_total
                 estimate_data.append({
-                    'Building': building['name'],
-                    'Item': sign['name'],
-                    'Material': sign['material'],
-                    'Dimensions': f"{sign['width']} x {sign['height']}" if sign['width'] and sign['height'] else '',
-                    'Quantity': sign['quantity'],
+                    'Building': b_name,
+                    'Item': s_name,
+                    'Material': material,
+                    'Dimensions': f"{width} x {height}" if width and height else '',
+                    'Quantity': qty,
                     'Unit_Price': price,
                     'Total': line_total
                 })
-            groups = pd.read_sql_query('''
-                SELECT sg.name as group_name, bsg.quantity as group_quantity
-                FROM building_sign_groups bsg
-                JOIN sign_groups sg ON bsg.group_id = sg.id
-                WHERE bsg.building_id = ?
-            ''', conn, params=(building['id'],))
-            for _, group in groups.iterrows():
-                group_signs = pd.read_sql_query('''
-                    SELECT st.name, st.unit_price, sgm.quantity
-                    FROM sign_group_members sgm
-                    JOIN sign_types st ON sgm.sign_type_id = st.id
-                    JOIN sign_groups sg ON sgm.group_id = sg.id
-                    WHERE sg.name = ?
-                ''', conn, params=(group['group_name'],))
-                group_total = 0.0
-                for _, row in group_signs.iterrows():
-                    gp = row['unit_price']
-                    if profile is not None and 'margin_multiplier' in profile and profile['margin_multiplier'] not in (None, 0, 1):
-                        try:
-                            gp = float(gp) * float(profile['margin_multiplier'])
-                        except Exception:
-                            pass
-                    group_total += gp * row['quantity']
-                line_total = group_total * group['group_quantity']
-                building_cost += line_total
+            for _, g_name, g_qty, g_unit in groups_by_b.get(bid, ()):
+                group_total = g_unit * margin
+                line_total = group_total * g_qty
+                total_cost += line_total
                 estimate_data.append({
-                    'Building': building['name'],
-                    'Item': f"Group: {group['group_name']}",
+                    'Building': b_name,
+                    'Item': f"Group: {g_name}",
                     'Material': 'Various',
                     'Dimensions': '',
-                    'Quantity': group['group_quantity'],
+                    'Quantity': g_qty,
                     'Unit_Price': group_total,
                     'Total': line_total
                 })
-            total_cost += building_cost
 
         # Resolve effective installation & tax rates: profile overrides when present
         eff_install_rate = project['installation_rate']
@@ -528,29 +588,24 @@ class SQLiteDatabaseManager:
             * Set unit_price = width * height * price_per_sq_ft (overwrite existing)
         Returns count of rows updated.
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cur = conn.cursor()
-        cur.execute('''
-            SELECT st.id, st.width, st.height, mp.price_per_sq_ft
-            FROM sign_types st
-            JOIN material_pricing mp ON LOWER(st.material)=LOWER(mp.material_name)
-            WHERE st.width > 0 AND st.height > 0
-        ''')
-        rows = cur.fetchall()
-        updated = 0
-        for sid, w, h, ppsf in rows:
-            try:
-                area = float(w) * float(h)
-                unit_price = area * float(ppsf)
-            except Exception:
-                continue
-            cur.execute('''UPDATE sign_types
-                           SET price_per_sq_ft=?, unit_price=?, last_modified=CURRENT_TIMESTAMP
-                           WHERE id=?''', (float(ppsf), float(unit_price), sid))
-            updated += 1
+        # Normalize material names once into an indexed temp table so the update is a
+        # single keyed join instead of LOWER() on both sides per row.
+        cur.execute('DROP TABLE IF EXISTS temp.mp_norm')
+        cur.execute('CREATE TEMP TABLE mp_norm (name_lc TEXT PRIMARY KEY, p REAL)')
+        cur.execute('''INSERT OR REPLACE INTO mp_norm (name_lc, p)
+                       SELECT LOWER(material_name), price_per_sq_ft FROM material_pricing
+                       WHERE price_per_sq_ft IS NOT NULL''')
+        cur.execute('''UPDATE sign_types
+                       SET price_per_sq_ft=m.p, unit_price=width*height*m.p, last_modified=CURRENT_TIMESTAMP
+                       FROM mp_norm m
+                       WHERE m.name_lc=LOWER(sign_types.material) AND sign_types.width > 0 AND sign_types.height > 0''')
+        updated = max(cur.rowcount, 0)
+        cur.execute('DROP TABLE temp.mp_norm')
         try:
             if updated:
-                self._log_audit('recalc_prices','sign_types', None, {'rows_updated': updated})
+                self._log_audit('recalc_prices','sign_types', None, {'rows_updated': updated}, conn=conn)
         except Exception:
             pass
         conn.commit()
@@ -573,56 +628,63 @@ class SQLiteDatabaseManager:
     def backup_database(self, backup_path):
         """Create a backup of the database."""
         try:
-            shutil.copy2(self.db_path, backup_path)
+            backup_sqlite(backup_path, self.db_path)
             return True, f"Database backed up to {backup_path}"
         except Exception as e:
             return False, f"Backup failed: {str(e)}"
 
     # ----------------------- Category One Feature Methods -----------------------
-    def _log_audit(self, action: str, entity: str, entity_id: int | None, meta: dict | None = None):
+    def _log_audit(self, action: str, entity: str, entity_id: int | None, meta: dict | None = None, conn=None):
+        """Record an audit row; pass the caller's ``conn`` to write it in the same transaction.
+
+        A separate connection opened while the caller still holds its write lock
+        would just wait out the busy timeout and fail.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cur = conn.cursor()
-            cur.execute('INSERT INTO audit_log(action, entity, entity_id, meta) VALUES (?,?,?,?)',
-                        (action, entity, entity_id, json.dumps(meta or {})))
-            conn.commit(); conn.close()
+            row = (action, entity, entity_id, json.dumps(meta or {}))
+            if conn is not None:
+                conn.execute('INSERT INTO audit_log(action, entity, entity_id, meta) VALUES (?,?,?,?)', row)
+                return
+            own = self._connect()
+            own.execute('INSERT INTO audit_log(action, entity, entity_id, meta) VALUES (?,?,?,?)', row)
+            own.commit(); own.close()
         except Exception:
             pass
 
     # Role management (simple)
     def set_user_role(self, username: str, role: str):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('INSERT INTO user_roles(username, role) VALUES(?,?) ON CONFLICT(username) DO UPDATE SET role=excluded.role', (username, role))
+        self._log_audit('set_role','user_roles', None, {'username': username, 'role': role}, conn=conn)
         conn.commit(); conn.close()
-        self._log_audit('set_role','user_roles', None, {'username': username, 'role': role})
 
     def get_user_role(self, username: str) -> str | None:
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('SELECT role FROM user_roles WHERE username=?',(username,))
         row = cur.fetchone(); conn.close(); return row[0] if row else None
 
     # Pricing profiles
     def create_pricing_profile(self, name: str, sales_tax_rate: float = 0.0, installation_rate: float = 0.0, margin_multiplier: float = 1.0, is_default: bool = False):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('''INSERT INTO pricing_profiles(name, sales_tax_rate, installation_rate, margin_multiplier, is_default)
                        VALUES(?,?,?,?,?)''', (name, sales_tax_rate, installation_rate, margin_multiplier, 1 if is_default else 0))
         pid = cur.lastrowid
         if is_default:
-            cur.execute('UPDATE pricing_profiles SET is_default=0 WHERE id<>?', (pid,))
+            cur.execute('UPDATE pricing_profiles SET is_default=0 WHERE is_default=1 AND id<>?', (pid,))
             cur.execute('UPDATE projects SET pricing_profile_id=? WHERE pricing_profile_id IS NULL', (pid,))
+        self._log_audit('create','pricing_profiles', pid, {'name': name}, conn=conn)
         conn.commit(); conn.close()
-        self._log_audit('create','pricing_profiles', pid, {'name': name})
         return pid
 
     def assign_pricing_profile_to_project(self, project_id: int, profile_id: int):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('UPDATE projects SET pricing_profile_id=?, last_modified=CURRENT_TIMESTAMP WHERE id=?', (profile_id, project_id))
+        self._log_audit('assign_profile','projects', project_id, {'profile_id': profile_id}, conn=conn)
         conn.commit(); conn.close()
-        self._log_audit('assign_profile','projects', project_id, {'profile_id': profile_id})
 
     # Tagging
     def ensure_tag(self, name: str) -> int:
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('INSERT INTO sign_type_tags(name) VALUES(?) ON CONFLICT(name) DO NOTHING', (name,))
         conn.commit()
         cur.execute('SELECT id FROM sign_type_tags WHERE name=?',(name,))
@@ -630,7 +692,7 @@ class SQLiteDatabaseManager:
         conn.close(); return tid
 
     def tag_sign_type(self, sign_type_name: str, tag_name: str):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('SELECT id FROM sign_types WHERE lower(name)=lower(?)',(sign_type_name,))
         row = cur.fetchone()
         if not row:
@@ -638,62 +700,64 @@ class SQLiteDatabaseManager:
         stid = row[0]
         tid = self.ensure_tag(tag_name)
         cur.execute('INSERT OR IGNORE INTO sign_type_tag_map(sign_type_id, tag_id) VALUES(?,?)',(stid, tid))
+        self._log_audit('tag','sign_types', stid, {'tag': tag_name}, conn=conn)
         conn.commit(); conn.close()
-        self._log_audit('tag','sign_types', stid, {'tag': tag_name})
         return True, 'tag added'
 
     def list_tags_for_sign_type(self, sign_type_name: str):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('''SELECT stt.name FROM sign_type_tags stt
                        JOIN sign_type_tag_map m ON m.tag_id=stt.id
                        JOIN sign_types s ON s.id=m.sign_type_id
                        WHERE lower(s.name)=lower(?) ORDER BY stt.name''',(sign_type_name,))
-        rows = [r[0] for r in cur.fetchall()]; conn.close(); return rows
+        rows = [r[0] for r in cur]; conn.close(); return rows
 
     # Notes
     def add_note(self, entity_type: str, entity_id: int, note: str, include_in_export: bool = True):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('INSERT INTO notes(entity_type, entity_id, note, include_in_export) VALUES(?,?,?,?)', (entity_type, entity_id, note, 1 if include_in_export else 0))
-        nid = cur.lastrowid; conn.commit(); conn.close()
-        self._log_audit('add_note', entity_type, entity_id, {'note_id': nid})
+        nid = cur.lastrowid
+        self._log_audit('add_note', entity_type, entity_id, {'note_id': nid}, conn=conn)
+        conn.commit(); conn.close()
         return nid
 
     def list_notes(self, entity_type: str, entity_id: int, export_only: bool = False):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
-        if export_only:
-            cur.execute('SELECT id, note, created_at FROM notes WHERE entity_type=? AND entity_id=? AND include_in_export=1 ORDER BY created_at',(entity_type, entity_id))
-        else:
-            cur.execute('SELECT id, note, include_in_export, created_at FROM notes WHERE entity_type=? AND entity_id=? ORDER BY created_at',(entity_type, entity_id))
+        """sqlite3.Row rows (id, note, include_in_export, created_at) for one entity."""
+        conn = self._connect(); conn.row_factory = sqlite3.Row; cur = conn.cursor()
+        export_filter = ' AND include_in_export=1' if export_only else ''
+        cur.execute(f'SELECT id, note, include_in_export, created_at FROM notes WHERE entity_type=? AND entity_id=?{export_filter} ORDER BY created_at',(entity_type, entity_id))
         rows = cur.fetchall(); conn.close(); return rows
 
     # Bid templates
     def create_bid_template(self, name: str, description: str = '') -> int:
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('INSERT INTO bid_templates(name, description) VALUES(?,?)',(name, description))
-        tid = cur.lastrowid; conn.commit(); conn.close()
-        self._log_audit('create','bid_templates', tid, {'name': name})
+        tid = cur.lastrowid
+        self._log_audit('create','bid_templates', tid, {'name': name}, conn=conn)
+        conn.commit(); conn.close()
         return tid
 
     def add_item_to_template(self, template_id: int, sign_type_name: str, quantity: int = 1):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('SELECT id FROM sign_types WHERE lower(name)=lower(?)',(sign_type_name,))
         row = cur.fetchone()
         if not row:
             conn.close(); return False, 'sign type not found'
         stid = row[0]
         cur.execute('INSERT INTO bid_template_items(template_id, sign_type_id, quantity) VALUES(?,?,?)',(template_id, stid, quantity))
+        self._log_audit('add_item','bid_templates', template_id, {'sign_type_id': stid, 'qty': quantity}, conn=conn)
         conn.commit(); conn.close()
-        self._log_audit('add_item','bid_templates', template_id, {'sign_type_id': stid, 'qty': quantity})
         return True, 'item added'
 
     def apply_template_to_building(self, template_id: int, building_id: int, group_as_single: bool = False):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('SELECT sign_type_id, quantity FROM bid_template_items WHERE template_id=?',(template_id,))
         items = cur.fetchall()
-        for stid, qty in items:
-            cur.execute('INSERT INTO building_signs(building_id, sign_type_id, quantity) VALUES(?,?,?)',(building_id, stid, qty))
+        cur.executemany('''INSERT INTO building_signs(building_id, sign_type_id, quantity) VALUES(?,?,?)
+                           ON CONFLICT(building_id, sign_type_id) DO UPDATE SET quantity=quantity+excluded.quantity''',
+                        [(building_id, stid, qty) for stid, qty in items])
+        self._log_audit('apply_template','buildings', building_id, {'template_id': template_id, 'count': len(items)}, conn=conn)
         conn.commit(); conn.close()
-        self._log_audit('apply_template','buildings', building_id, {'template_id': template_id, 'count': len(items)})
         return len(items)
 
     # Estimate snapshots
@@ -704,19 +768,20 @@ class SQLiteDatabaseManager:
         payload = json.dumps(data, sort_keys=True)
         import hashlib
         snap_hash = hashlib.sha1(payload.encode('utf-8')).hexdigest()
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('INSERT INTO estimate_snapshots(project_id, label, snapshot_hash, data) VALUES(?,?,?,?)',(project_id, label, snap_hash, payload))
-        sid = cur.lastrowid; conn.commit(); conn.close()
-        self._log_audit('snapshot','projects', project_id, {'snapshot_id': sid})
+        sid = cur.lastrowid
+        self._log_audit('snapshot','projects', project_id, {'snapshot_id': sid}, conn=conn)
+        conn.commit(); conn.close()
         return True, sid
 
     def list_estimate_snapshots(self, project_id: int):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('SELECT id, label, snapshot_hash, created_at FROM estimate_snapshots WHERE project_id=? ORDER BY created_at DESC',(project_id,))
         rows = cur.fetchall(); conn.close(); return rows
 
     def diff_snapshots(self, snapshot_a: int, snapshot_b: int):
-        conn = sqlite3.connect(self.db_path); cur = conn.cursor()
+        conn = self._connect(); cur = conn.cursor()
         cur.execute('SELECT data FROM estimate_snapshots WHERE id=?',(snapshot_a,)); a = cur.fetchone()
         cur.execute('SELECT data FROM estimate_snapshots WHERE id=?',(snapshot_b,)); b = cur.fetchone()
         conn.close()
@@ -863,6 +928,16 @@ class MssqlDatabaseManager:
             "CONSTRAINT fk_bsg_building FOREIGN KEY(building_id) REFERENCES buildings(id) ON DELETE CASCADE,"
             "CONSTRAINT fk_bsg_group FOREIGN KEY(group_id) REFERENCES sign_groups(id) ON DELETE CASCADE"
             ")"))
+        # One row per pair (matches the SQLite idx_*_pair indexes); quantity lookups and
+        # deletes by (parent, key) become index seeks
+        for table, parent_col, key_col in (('building_signs', 'building_id', 'sign_type_id'),
+                                           ('building_sign_groups', 'building_id', 'group_id'),
+                                           ('sign_group_members', 'group_id', 'sign_type_id')):
+            try:
+                cur.execute(f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='idx_{table}_pair') "
+                            f"CREATE UNIQUE INDEX idx_{table}_pair ON {table}({parent_col}, {key_col})")
+            except Exception as e:
+                print(f"[db][warn] unique index on {table}: {e}")
 
         ensure_table('material_pricing', (
             "CREATE TABLE material_pricing ("
@@ -931,7 +1006,7 @@ class MssqlDatabaseManager:
         except Exception as e:  # pragma: no cover - error path
             return False, f"Error importing CSV: {e}"
 
-    def get_project_estimate(self, project_id):
+    def get_project_estimate(self, project_id, building_ids=None):
         conn = self._connect()
         projects_df = pd.read_sql("SELECT * FROM projects WHERE id = ?", conn, params=[project_id])
         if projects_df.empty:
@@ -939,7 +1014,12 @@ class MssqlDatabaseManager:
         project = projects_df.iloc[0]
         estimate_data = []
         total_cost = 0.0
-        buildings = pd.read_sql("SELECT * FROM buildings WHERE project_id=?", conn, params=[project_id])
+        b_sql = "SELECT * FROM buildings WHERE project_id=?"
+        b_params = [project_id]
+        if building_ids:
+            b_sql += f" AND id IN ({','.join(['?']*len(building_ids))})"
+            b_params += list(building_ids)
+        buildings = pd.read_sql(b_sql, conn, params=b_params)
         for _, building in buildings.iterrows():
             building_cost = 0.0
             signs = pd.read_sql('''SELECT st.name, st.unit_price, st.material, st.width, st.height, bs.quantity, bs.custom_price
@@ -5,9 +5,9 @@ without forcing all legacy code to immediately refactor into the new
 DatabaseManager API.
 
 Usage:
-    from utils.db_util import get_connection, backend
+    from utils.db_util import get_connection, get_conn, backend
 
-    with get_connection() as conn:
+    with get_conn() as conn:
         cur = conn.cursor()
         ...
 
@@ -15,16 +15,24 @@ Features:
  - Lazy import of backend driver (sqlite3 / pyodbc)
  - Context manager convenience via connection's own __enter__/__exit__
  - Helper execute_fetchall / execute_fetchone for quick scripts
+ - SQLite connections get WAL journaling + tuned PRAGMAs (see SQLITE_PRAGMAS)
+ - SQLite connections are pooled: close() hands the connection back to the
+   process-wide pool instead of tearing it down (see SQLitePool)
+ - writer(): serialized write transactions on one shared connection
+ - get_conn(readonly=True): pooled mode=ro connections for pure reads
 
 Note: For new higher-level operations prefer the methods on DatabaseManager.
 """
 from __future__ import annotations
 import os
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
+from pathlib import Path
 from typing import Any, Iterable
 
-from config import DB_BACKEND, DATABASE_PATH, MSSQL_CONN_STRING
+from config import DB_BACKEND, DATABASE_PATH, MSSQL_CONN_STRING, SQLITE_JOURNAL_MODE
 
 try:  # optional
     import pyodbc  # type: ignore
@@ -33,11 +41,182 @@ except Exception:  # pragma: no cover
 
 backend = DB_BACKEND
 
+# Per-connection PRAGMAs. synchronous=NORMAL is safe under WAL (commits append to
+# the WAL; only checkpoints fsync the main file). journal_mode is handled
+# separately because it persists on the database file.
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+)
 
-def get_connection():
-    """Return a new connection object for current backend.
+_journal_mode_set = False
 
-    Caller is responsible for closing (use 'with').
+# Per-connection LRU of compiled statements (sqlite3 default is 128). Pooled and
+# writer connections are long-lived, so repeated callback SQL skips re-preparing.
+_CACHED_STATEMENTS = 256
+
+
+def _apply_sqlite_pragmas(conn: sqlite3.Connection, readonly: bool = False) -> None:
+    """Apply journal mode (once per process) and per-connection PRAGMAs."""
+    global _journal_mode_set
+    if not readonly and not _journal_mode_set and SQLITE_JOURNAL_MODE:
+        try:
+            conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            _journal_mode_set = True
+        except sqlite3.Error as e:  # e.g. database locked by another process
+            print(f"[db][warn] journal_mode={SQLITE_JOURNAL_MODE} not applied: {e}")
+    # Check the file's actual mode, not the configured one: if WAL could not be
+    # set (locked at startup, read-only media) synchronous=NORMAL is not safe.
+    try:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    except sqlite3.Error:
+        return
+    if str(mode).lower() != 'wal':
+        return
+    for pragma in SQLITE_PRAGMAS:
+        try:
+            conn.execute(pragma)
+        except sqlite3.Error:
+            pass
+
+
+def checkpoint_wal(db_path: str | None = None) -> None:
+    """Fold the WAL back into the main file so plain file copies are complete.
+
+    Call before copying the .db (backups, OneDrive sync). No-op for non-WAL.
+    """
+    if backend == 'mssql':
+        return
+    try:
+        conn = sqlite3.connect(db_path or DATABASE_PATH)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[db][warn] wal checkpoint failed: {e}")
+
+
+def backup_sqlite(target, db_path: str | None = None, pages: int = 1024) -> None:
+    """Copy the live SQLite DB to ``target`` with the online backup API.
+
+    Pages (including any not yet checkpointed from the WAL) are read under
+    SQLite's own locking, so a concurrent write cannot leave a torn copy.
+    ``pages`` bounds each step so the read lock is released between steps.
+    """
+    # Read-only URI: a missing source raises instead of being created empty
+    src_path = Path(db_path or DATABASE_PATH).resolve()
+    if not src_path.exists():
+        raise FileNotFoundError(f"database not found: {src_path}")
+    src = sqlite3.connect(src_path.as_uri() + '?mode=ro', uri=True)
+    try:
+        dst = sqlite3.connect(str(target))
+        try:
+            src.backup(dst, pages=pages)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() returns it to its pool.
+
+    Lets existing ``conn = get_connection(); ...; conn.close()`` code reuse
+    connections without changes.
+    """
+    _pool: 'SQLitePool | None' = None
+    _idle_in_pool = False
+
+    def close(self):  # type: ignore[override]
+        pool = self._pool
+        if pool is None:
+            return super().close()
+        if not self._idle_in_pool:  # tolerate double close()
+            pool.release(self)
+
+    def discard(self):
+        self._pool = None
+        super().close()
+
+
+class SQLitePool:
+    """Small thread-safe pool of pre-configured sqlite connections.
+
+    acquire() never blocks: when the pool is empty a fresh connection is
+    opened, and release() closes surplus connections once ``size`` are idle.
+    With ``readonly`` connections are opened with ``mode=ro``, which skips
+    write-side setup and turns accidental writes into errors.
+    """
+
+    def __init__(self, db_path: str, size: int = 8, readonly: bool = False):
+        self.db_path = db_path
+        self.size = size
+        self.readonly = readonly
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+
+    def _open(self) -> PooledConnection:
+        if self.readonly:
+            uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, factory=PooledConnection, check_same_thread=False,
+                                   cached_statements=_CACHED_STATEMENTS)
+        else:
+            conn = sqlite3.connect(self.db_path, factory=PooledConnection, check_same_thread=False,
+                                   cached_statements=_CACHED_STATEMENTS)
+        _apply_sqlite_pragmas(conn, self.readonly)
+        conn._pool = self
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+        conn._idle_in_pool = False
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        try:
+            if conn.in_transaction:  # caller did not commit; don't leak it to the next user
+                conn.rollback()
+            conn._idle_in_pool = True
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.discard()
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().discard()
+            except queue.Empty:
+                return
+
+
+_POOL_SIZE = int(os.getenv('SIGN_APP_DB_POOL_SIZE', '8'))
+_pool: SQLitePool | None = None
+_ro_pool: SQLitePool | None = None
+
+
+def get_pool(readonly: bool = False) -> SQLitePool:
+    global _pool, _ro_pool
+    if readonly:
+        if _ro_pool is None:
+            _ro_pool = SQLitePool(DATABASE_PATH, _POOL_SIZE, readonly=True)
+        return _ro_pool
+    if _pool is None:
+        _pool = SQLitePool(DATABASE_PATH, _POOL_SIZE)
+    return _pool
+
+
+def get_connection(readonly: bool = False):
+    """Return a connection object for current backend.
+
+    SQLite connections come from the process pool (the read-only pool when
+    ``readonly``); closing them returns them to the pool. Caller is
+    responsible for closing (or use get_conn()).
     """
     if backend == 'mssql':
         if pyodbc is None:
@@ -46,11 +225,69 @@ def get_connection():
             raise RuntimeError('SIGN_APP_MSSQL_CONN not set')
         return pyodbc.connect(MSSQL_CONN_STRING)
     # default sqlite
-    return sqlite3.connect(DATABASE_PATH)
+    return get_pool(readonly).acquire()
+
+
+@contextmanager
+def get_conn(readonly: bool = False):
+    """Context manager yielding a (pooled) connection, released on exit.
+
+    Unlike ``with sqlite3.connect(...)`` this does not commit implicitly;
+    call ``conn.commit()`` after writes as usual. ``readonly`` is ignored
+    for mssql.
+    """
+    conn = get_connection(readonly)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+_write_lock = threading.Lock()
+_write_conn: sqlite3.Connection | None = None
+
+
+@contextmanager
+def writer():
+    """Context manager for a write transaction; commits on exit, rolls back on error.
+
+    SQLite: all writers share one connection behind a process lock and start
+    with BEGIN IMMEDIATE, so the write lock is taken up front instead of being
+    upgraded mid-transaction (which is where SQLITE_BUSY comes from). Readers
+    keep using the pool. MSSQL: a plain connection per call.
+    """
+    global _write_conn
+    if backend == 'mssql':
+        conn = get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return
+    with _write_lock:
+        if _write_conn is None:
+            # isolation_level=None: transactions are managed explicitly below
+            _write_conn = sqlite3.connect(DATABASE_PATH, isolation_level=None, check_same_thread=False,
+                                          cached_statements=_CACHED_STATEMENTS)
+            _apply_sqlite_pragmas(_write_conn)
+        conn = _write_conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
 
 
 def execute_fetchall(sql: str, params: Iterable[Any] | None = None):
-    with get_connection() as conn:
+    with get_conn() as conn:
         cur = conn.cursor()
         cur.execute(sql, tuple(params) if params else ())
         rows = cur.fetchall()
@@ -58,7 +295,7 @@ def execute_fetchall(sql: str, params: Iterable[Any] | None = None):
 
 
 def execute_fetchone(sql: str, params: Iterable[Any] | None = None):
-    with get_connection() as conn:
+    with get_conn() as conn:
         cur = conn.cursor()
         cur.execute(sql, tuple(params) if params else ())
         row = cur.fetchone()
@@ -66,7 +303,7 @@ def execute_fetchone(sql: str, params: Iterable[Any] | None = None):
 
 
 def execute_commit(sql: str, params: Iterable[Any] | None = None):
-    with get_connection() as conn:
+    with get_conn() as conn:
         cur = conn.cursor()
         cur.execute(sql, tuple(params) if params else ())
         conn.commit()
@@ -6,8 +6,12 @@ from typing import List, Dict, Any, Optional, Tuple, Sequence
 from pathlib import Path
 import sqlite3
 import pandas as pd
-from .calculations import compute_unit_price, compute_install_cost
+from .calculations import compute_unit_price_vec, compute_install_cost
 from .db_util import get_connection
+from config import DATABASE_PATH
+
+_NUMERIC_COLS = ('unit_price', 'width', 'height', 'price_per_sq_ft', 'material_multiplier',
+                 'per_sign_install_rate', 'install_time_hours', 'quantity', 'group_qty')
 
 DatabasePath = str | Path
 
@@ -34,17 +38,14 @@ def compute_custom_estimate(
     Rows have keys: Building, Item, Material, Dimensions, Quantity, Unit_Price, Total.
     Appends Installation & Sales Tax rows when applicable (Building='ALL').
     """
-    def _f(v):
-        try:
-            return float(v or 0)
-        except Exception:
-            return 0.0
-    # Prefer explicit db_path when it's a real file (unit tests use temp SQLite files)
+    # Prefer explicit db_path when it's a real file other than the app database
+    # (unit tests use temp SQLite files); the app database goes through the pool.
     try:
-        if isinstance(db_path, (str, Path)) and str(db_path) and Path(db_path).exists():
+        if (isinstance(db_path, (str, Path)) and str(db_path) and Path(db_path).exists()
+                and Path(db_path).resolve() != Path(DATABASE_PATH).resolve()):
             conn = sqlite3.connect(str(db_path))
         else:
-            conn = get_connection()
+            conn = get_connection(readonly=True)
     except Exception:
         # Fallback to env-configured connection
         conn = get_connection()
@@ -53,71 +54,90 @@ def compute_custom_estimate(
         conn.close()
         return []
     project = proj_df.iloc[0]
-    buildings = pd.read_sql_query('SELECT * FROM buildings WHERE project_id=?', conn, params=(project_id,))
-    estimate_data: List[Dict[str, Any]] = []
-    grand_subtotal = 0.0
-    total_sign_count = 0
-    total_area = 0.0
-    auto_install_amount_per_sign = 0.0
-    auto_install_hours = 0.0
-    selected_ids = set(building_ids) if building_ids else None
-    for _, b in buildings.iterrows():
-        if selected_ids and b['id'] not in selected_ids:
-            continue
-        b_sub = 0.0
-        # Signs
-        signs = pd.read_sql_query('''SELECT st.name, st.unit_price, st.material, st.width, st.height, st.price_per_sq_ft, st.per_sign_install_rate, st.install_time_hours, bs.quantity
-                                      FROM building_signs bs JOIN sign_types st ON bs.sign_type_id=st.id WHERE bs.building_id=?''', conn, params=(b['id'],))
-        for _, s in signs.iterrows():
-            qty = _f(s['quantity'])
-            width=_f(s['width']); height=_f(s['height'])
-            area = width*height if width and height else 0
-            total_sign_count += qty
-            total_area += area*qty
-            ps_install=_f(s.get('per_sign_install_rate'))
-            if ps_install>0:
-                auto_install_amount_per_sign += ps_install * qty
-            inst_time=_f(s.get('install_time_hours'))
-            if inst_time>0:
-                auto_install_hours += inst_time * qty
-            unit_price = compute_unit_price(s.to_dict(), price_mode)
-            line_total = unit_price*qty
-            b_sub += line_total
-            estimate_data.append({'Building': b['name'], 'Item': s['name'], 'Material': s['material'], 'Dimensions': f"{width} x {height}" if width and height else '', 'Quantity': qty, 'Unit_Price': unit_price, 'Total': line_total})
-        # Groups
-        groups = pd.read_sql_query('''SELECT sg.id, sg.name, bsg.quantity FROM building_sign_groups bsg JOIN sign_groups sg ON bsg.group_id=sg.id WHERE bsg.building_id=?''', conn, params=(b['id'],))
-        for _, g in groups.iterrows():
-            group_members = pd.read_sql_query('''SELECT st.name, st.unit_price, st.width, st.height, st.price_per_sq_ft, st.per_sign_install_rate, st.install_time_hours, st.material_multiplier, sgm.quantity
-                                                  FROM sign_group_members sgm JOIN sign_types st ON sgm.sign_type_id=st.id WHERE sgm.group_id=?''', conn, params=(g['id'],))
-            group_cost_unit = 0.0
-            for _, m in group_members.iterrows():
-                m_qty = _f(m['quantity'])
-                width=_f(m['width']); height=_f(m['height'])
-                area=width*height if width and height else 0
-                total_sign_count += m_qty * g['quantity']
-                total_area += area * m_qty * g['quantity']
-                ps_install=_f(m.get('per_sign_install_rate'))
-                if ps_install>0:
-                    auto_install_amount_per_sign += ps_install * m_qty * g['quantity']
-                inst_time=_f(m.get('install_time_hours'))
-                if inst_time>0:
-                    auto_install_hours += inst_time * m_qty * g['quantity']
-                m_unit = compute_unit_price(m.to_dict(), price_mode)
-                group_cost_unit += m_unit * m_qty
-            unit_price = group_cost_unit
-            line_total = unit_price * g['quantity']
-            b_sub += line_total
-            estimate_data.append({'Building': b['name'], 'Item': f"Group: {g['name']}", 'Material': 'Various', 'Dimensions': '', 'Quantity': g['quantity'], 'Unit_Price': unit_price, 'Total': line_total})
-        grand_subtotal += b_sub
+    b_sql = 'SELECT id, name FROM buildings WHERE project_id=?'
+    b_params: List[Any] = [project_id]
+    if building_ids:
+        b_sql += f" AND id IN ({','.join(['?']*len(building_ids))})"
+        b_params += list(building_ids)
+    buildings = pd.read_sql_query(b_sql + ' ORDER BY LOWER(name)', conn, params=tuple(b_params))
+    # One query per kind for all selected buildings (instead of per building / per group)
+    placeholders = ','.join(['?']*len(buildings)) or 'NULL'
+    b_ids = tuple(int(i) for i in buildings['id'])
+    signs = pd.read_sql_query(f'''SELECT bs.building_id, st.name, st.unit_price, st.material, st.width, st.height, st.price_per_sq_ft, st.per_sign_install_rate, st.install_time_hours, bs.quantity
+                                   FROM building_signs bs JOIN sign_types st ON bs.sign_type_id=st.id
+                                   WHERE bs.building_id IN ({placeholders}) ORDER BY bs.building_id, bs.id''', conn, params=b_ids)
+    members = pd.read_sql_query(f'''SELECT bsg.building_id, bsg.id AS link_id, sg.name AS group_name, bsg.quantity AS group_qty,
+                                          st.name, st.unit_price, st.width, st.height, st.price_per_sq_ft, st.per_sign_install_rate, st.install_time_hours, st.material_multiplier, sgm.quantity
+                                     FROM building_sign_groups bsg JOIN sign_groups sg ON bsg.group_id=sg.id
+                                     LEFT JOIN sign_group_members sgm ON sgm.group_id=sg.id
+                                     LEFT JOIN sign_types st ON sgm.sign_type_id=st.id
+                                     WHERE bsg.building_id IN ({placeholders}) ORDER BY bsg.building_id, bsg.id''', conn, params=b_ids)
+    b_names = dict(zip(buildings['id'], buildings['name']))
+    b_order = {bid: i for i, bid in enumerate(buildings['id'])}
+
+    # Parse each numeric column once (NULL / non-numeric -> 0.0); the math below is
+    # then plain float64 column arithmetic.
+    for df in (signs, members):
+        for col in _NUMERIC_COLS:
+            if col in df:
+                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
+
+    def _num(df, col):
+        return df[col] if col in df else pd.Series(0.0, index=df.index)
+
+    # Signs: one row each
+    qty = _num(signs, 'quantity')
+    s_area = _num(signs, 'width') * _num(signs, 'height')
+    s_unit = compute_unit_price_vec(signs, price_mode)
+    s_total = s_unit * qty
+    # Groups: member rows -> weight by member qty * group qty, then one line per building/group link
+    m_qty = _num(members, 'quantity').where(members['name'].notna(), 0.0) if not members.empty else _num(members, 'quantity')
+    g_qty = _num(members, 'group_qty')
+    m_unit = compute_unit_price_vec(members, price_mode)
+    members = members.assign(_cost=m_unit * m_qty)
+    links = members.groupby('link_id', sort=False).agg(building_id=('building_id', 'first'), group_name=('group_name', 'first'),
+                                                       group_qty=('group_qty', 'first'), unit=('_cost', 'sum')) if not members.empty else None
+
+    total_sign_count = float(qty.sum() + (m_qty * g_qty).sum())
+    total_area = float((s_area * qty).sum() + (_num(members, 'width') * _num(members, 'height') * m_qty * g_qty).sum())
+    ps_s = _num(signs, 'per_sign_install_rate'); ps_m = _num(members, 'per_sign_install_rate')
+    auto_install_amount_per_sign = float((ps_s.where(ps_s > 0, 0) * qty).sum() + (ps_m.where(ps_m > 0, 0) * m_qty * g_qty).sum())
+    it_s = _num(signs, 'install_time_hours'); it_m = _num(members, 'install_time_hours')
+    auto_install_hours = float((it_s.where(it_s > 0, 0) * qty).sum() + (it_m.where(it_m > 0, 0) * m_qty * g_qty).sum())
+
+    # Assemble output columns for signs and group links, then one stable sort
+    # (building order, signs before groups) keeps query order within a building.
+    w = _num(signs, 'width'); h = _num(signs, 'height')
+    sign_lines = pd.DataFrame({
+        '_b': signs['building_id'].map(b_order), '_k': 0,
+        'Building': signs['building_id'].map(b_names), 'Item': signs['name'], 'Material': signs['material'],
+        'Dimensions': (w.astype(str) + ' x ' + h.astype(str)).where((w != 0) & (h != 0), ''),
+        'Quantity': qty, 'Unit_Price': s_unit, 'Total': s_total,
+    })
+    frames = [sign_lines]
+    if links is not None:
+        gq = links['group_qty'].fillna(0)
+        frames.append(pd.DataFrame({
+            '_b': links['building_id'].map(b_order), '_k': 1,
+            'Building': links['building_id'].map(b_names), 'Item': 'Group: ' + links['group_name'].astype(str),
+            'Material': 'Various', 'Dimensions': '',
+            'Quantity': gq, 'Unit_Price': links['unit'], 'Total': links['unit'] * gq,
+        }))
+    lines = pd.concat(frames, ignore_index=True) if len(frames) > 1 else sign_lines
+    lines = lines.sort_values(['_b', '_k'], kind='stable')
+    grand_subtotal = float(lines['Total'].sum())
+    estimate_data: List[Dict[str, Any]] = lines.drop(columns=['_b', '_k']).to_dict('records')
     install_cost = compute_install_cost(
         install_mode, grand_subtotal, total_sign_count, total_area,
         inst_percent, inst_per_sign, inst_per_area, inst_hours, inst_hourly,
         auto_enabled, auto_install_amount_per_sign, auto_install_hours
     )
+    # Taxable amount = building lines + installation; kept as a running total
+    taxable_total = grand_subtotal
     if install_mode != 'none' and install_cost>0:
         estimate_data.append({'Building':'ALL','Item':'Installation','Material':'','Dimensions':'','Quantity':1,'Unit_Price':install_cost,'Total':install_cost})
+        taxable_total += install_cost
     if bool(project.get('include_sales_tax')) and project.get('sales_tax_rate'):
-        taxable_total = sum(r['Total'] for r in estimate_data if r['Building']!='ALL' or r['Item']=='Installation')
         tax_cost = taxable_total * float(project['sales_tax_rate'])
         estimate_data.append({'Building':'ALL','Item':'Sales Tax','Material':'','Dimensions':'','Quantity':1,'Unit_Price':tax_cost,'Total':tax_cost})
     conn.close()
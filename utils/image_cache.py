@@ -71,3 +71,44 @@ def get_or_build_thumbnail(src_path: str | Path, max_w: int, max_h: int) -> Opti
         return out_path if out_path.exists() else None
     except Exception:
         return None
+
+
+NODE_THUMB_ROOT = Path('sign_images') / '.cache' / 'nodes'
+NODE_THUMB_SIZE = 64
+
+
+def build_node_thumbnail(sign_type_id: int, src_path: str | Path) -> Optional[Path]:
+    """Write the 64x64 WebP used by tree nodes for a sign type's cover image."""
+    try:
+        p = Path(src_path)
+        if not p.exists() or p.is_dir() or p.suffix.lower() == '.svg':
+            return None
+        NODE_THUMB_ROOT.mkdir(parents=True, exist_ok=True)
+        out_path = NODE_THUMB_ROOT / f"{sign_type_id}.webp"
+        from PIL import Image as PILImage  # type: ignore
+        with PILImage.open(p) as im:
+            im = im.convert('RGBA')
+            im.thumbnail((NODE_THUMB_SIZE, NODE_THUMB_SIZE))
+            im.save(out_path, 'webp', quality=70)
+        return out_path if out_path.exists() else None
+    except Exception:
+        return None
+
+
+def thumb_url(sign_type_id: int, src_path: str | Path | None = None) -> str:
+    """URL of a sign type's node thumbnail ('' if none).
+
+    Rebuilds when missing or older than src_path. The mtime query string lets
+    the route send a long-lived Cache-Control header.
+    """
+    out_path = NODE_THUMB_ROOT / f"{sign_type_id}.webp"
+    try:
+        if src_path:
+            src = Path(src_path)
+            if src.exists() and (not out_path.exists() or out_path.stat().st_mtime < src.stat().st_mtime):
+                build_node_thumbnail(sign_type_id, src)
+        if not out_path.exists():
+            return ''
+        return f"/sign-images/.cache/nodes/{sign_type_id}.webp?v={int(out_path.stat().st_mtime)}"
+    except Exception:
+        return ''